@@ -0,0 +1,214 @@
+"""
+Admission Control
+=================
+Bounded concurrency and load shedding for the scoring endpoints.
+
+Scoring is CPU-bound, so running more requests at once than there are
+cores only makes all of them slower; under a burst, Flask threads pile up
+until clients time out and the finished work is thrown away. Instead:
+
+- at most ``max_in_flight`` requests score at a time (per worker process)
+- up to ``max_queue`` more wait, best priority first, each for at most its
+  priority's queue timeout
+- each request's cost is estimated from its candidate count and text size
+  (in cost units, see estimate_units); an exponentially weighted average of
+  observed milliseconds per unit turns the work ahead of a request into a
+  predicted wait
+- requests whose predicted wait exceeds their queue timeout, or that
+  arrive at a full queue, are rejected immediately with
+  AdmissionRejectedError, which the API turns into 503 + Retry-After
+
+Priority classes: 'interactive' requests queue ahead of 'prefetch'
+(background) ones, and an interactive request arriving at a full queue
+evicts a waiting prefetch request. With the default prefetch queue
+timeout of 0, prefetch traffic only runs when a slot is free right away,
+so it is shed first.
+
+Author: DSAA2044 Team
+Date: December 2025
+"""
+
+import heapq
+import itertools
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+PRIORITIES = ('interactive', 'prefetch')
+
+# Characters of text (candidate or history) counted as one cost unit,
+# i.e. roughly as much work as one short candidate
+CHARS_PER_UNIT = 1000
+
+# Corpus rows scanned per cost unit (recommend_from_history)
+ROWS_PER_UNIT = 10000
+
+
+class AdmissionRejectedError(RuntimeError):
+    """Raised when a request is shed; ``retry_after`` is in seconds."""
+    
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class _Waiter:
+    __slots__ = ('units', 'evicted')
+    
+    def __init__(self, units: float):
+        self.units = units
+        self.evicted = False
+
+
+class AdmissionController:
+    """
+    In-flight limit plus a small priority wait queue with predicted-wait
+    shedding.
+    """
+    
+    def __init__(
+        self,
+        max_in_flight: Optional[int] = None,
+        max_queue: int = 16,
+        queue_timeout_ms: float = 500.0,
+        prefetch_queue_timeout_ms: float = 0.0,
+        initial_ms_per_unit: float = 1.0,
+        smoothing: float = 0.2
+    ):
+        self.max_in_flight = max_in_flight or os.cpu_count() or 1
+        self.max_queue = max_queue
+        self.queue_timeout_ms = {
+            'interactive': queue_timeout_ms,
+            'prefetch': prefetch_queue_timeout_ms
+        }
+        self.smoothing = smoothing
+        self.ms_per_unit = initial_ms_per_unit
+        
+        self._cond = threading.Condition()
+        self._in_flight = 0
+        self._in_flight_units = 0.0
+        self._queue = []  # heap of (priority rank, arrival, waiter)
+        self._arrivals = itertools.count()
+        self._stats = {
+            priority: {'admitted': 0, 'queued': 0, 'rejected': 0}
+            for priority in PRIORITIES
+        }
+    
+    @staticmethod
+    def estimate_units(num_candidates: int = 0, text_chars: int = 0, scan_rows: int = 0) -> float:
+        """Cost of a request in units (one unit ~ one short candidate)."""
+        return 1.0 + num_candidates + text_chars / CHARS_PER_UNIT + scan_rows / ROWS_PER_UNIT
+    
+    @contextmanager
+    def admit(self, units: float, priority: str = 'interactive') -> Iterator[None]:
+        """
+        Hold a scoring slot for the body of the ``with`` block.
+        
+        Raises:
+            AdmissionRejectedError: if the request is shed
+        """
+        self._acquire(units, priority)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._release(units, (time.perf_counter() - started) * 1000.0)
+    
+    def _acquire(self, units: float, priority: str):
+        rank = PRIORITIES.index(priority)
+        timeout_ms = self.queue_timeout_ms[priority]
+        
+        with self._cond:
+            # Fast path: a free slot and nobody of equal or better priority waiting
+            if self._in_flight < self.max_in_flight and not any(
+                entry[0] <= rank for entry in self._queue
+            ):
+                self._start(units, priority)
+                return
+            
+            if len(self._queue) >= self.max_queue and not self._evict_below(rank):
+                self._reject(priority, 'queue is full')
+            
+            if timeout_ms <= 0:
+                self._reject(priority, 'no free slot')
+            
+            predicted_ms = self._predicted_wait_ms(rank)
+            if predicted_ms > timeout_ms:
+                self._reject(priority, f'predicted wait {predicted_ms:.0f} ms', predicted_ms)
+            
+            waiter = _Waiter(units)
+            entry = (rank, next(self._arrivals), waiter)
+            heapq.heappush(self._queue, entry)
+            self._stats[priority]['queued'] += 1
+            deadline = time.perf_counter() + timeout_ms / 1000.0
+            
+            while not (
+                self._in_flight < self.max_in_flight and self._queue[0] is entry
+            ):
+                remaining = deadline - time.perf_counter()
+                if waiter.evicted or remaining <= 0:
+                    if not waiter.evicted:
+                        self._queue.remove(entry)
+                        heapq.heapify(self._queue)
+                        self._cond.notify_all()
+                    self._reject(priority, 'evicted by higher priority' if waiter.evicted else 'queue timeout')
+                self._cond.wait(remaining)
+            
+            heapq.heappop(self._queue)
+            self._start(units, priority)
+            # The next waiter may fit into another free slot
+            self._cond.notify_all()
+    
+    def _start(self, units: float, priority: str):
+        self._in_flight += 1
+        self._in_flight_units += units
+        self._stats[priority]['admitted'] += 1
+    
+    def _release(self, units: float, elapsed_ms: float):
+        with self._cond:
+            self._in_flight -= 1
+            self._in_flight_units -= units
+            self.ms_per_unit += self.smoothing * (elapsed_ms / units - self.ms_per_unit)
+            self._cond.notify_all()
+    
+    def _evict_below(self, rank: int) -> bool:
+        """Evict the newest waiter of a worse priority than ``rank``, if any."""
+        candidates = [entry for entry in self._queue if entry[0] > rank]
+        if not candidates:
+            return False
+        
+        victim = max(candidates, key=lambda entry: (entry[0], entry[1]))
+        self._queue.remove(victim)
+        heapq.heapify(self._queue)
+        victim[2].evicted = True
+        self._cond.notify_all()
+        return True
+    
+    def _predicted_wait_ms(self, rank: int) -> float:
+        """Work ahead of a new request of priority ``rank``, spread over the slots."""
+        # In-flight requests are on average half done
+        queued_units = sum(entry[2].units for entry in self._queue if entry[0] <= rank)
+        units_ahead = self._in_flight_units / 2.0 + queued_units
+        return units_ahead * self.ms_per_unit / self.max_in_flight
+    
+    def _reject(self, priority: str, reason: str, predicted_ms: Optional[float] = None):
+        self._stats[priority]['rejected'] += 1
+        if predicted_ms is None:
+            predicted_ms = self._predicted_wait_ms(PRIORITIES.index(priority))
+        retry_after = max(1, math.ceil(predicted_ms / 1000.0))
+        raise AdmissionRejectedError(f"Server overloaded ({reason}), retry later", retry_after)
+    
+    def describe(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                'max_in_flight': self.max_in_flight,
+                'in_flight': self._in_flight,
+                'queued': len(self._queue),
+                'max_queue': self.max_queue,
+                'queue_timeout_ms': dict(self.queue_timeout_ms),
+                'ms_per_unit': round(self.ms_per_unit, 4),
+                'stats': {priority: dict(values) for priority, values in self._stats.items()}
+            }
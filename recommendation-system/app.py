@@ -4,17 +4,65 @@ Flask API for Content-Based Recommendation System
 A simple Flask REST API for the recommendation system.
 
 Endpoints:
-- GET  /api/health          - Health check
+- GET  /api/health          - Health check (reports model load state)
+- GET  /api/health/live     - Liveness probe (process is up)
+- GET  /api/health/ready    - Readiness probe (503 until the model is ready)
 - GET  /api/model/info      - Get model information
+- POST /api/score           - Score candidate posts against a history
+- POST /api/candidates/ingest - Add live posts to the live index
 - POST /api/recommend       - Get recommendations for a query
+- GET  /api/similar/<id>    - Posts similar to a training post
+- POST /api/profile         - Create a server-side user profile
+- GET  /api/profile/<id>    - Get a profile summary
+- POST /api/profile/<id>/append - Add newly read items / seen ids
+- POST /api/profile/<id>/reset  - Clear a profile
+
+With SHADOW_ALGORITHM set, a sample of /api/score and /api/recommend
+requests is re-scored by that second recommender after the response is
+sent, and rank agreement and latency are logged (see shadow_scoring.py).
+
+Scoring requests pass admission control (see admission_control.py): when
+the predicted queueing wait is over budget they get 503 + Retry-After.
+Send "X-Request-Priority: prefetch" (or "priority": "prefetch") for
+background requests so they are shed before interactive ones.
+
+The model is loaded (and warmed up) in a background thread so the server
+binds its port immediately; model endpoints return 503 until it is ready.
+Set MODEL_LOAD_MODE=eager to load before serving instead. Models that fork
+worker processes (NUM_SHARDS > 1 or VECTORIZE_WORKERS > 1) always load
+eagerly, on the main thread.
+
+With MODEL_REGISTRY_CONFIG set, requests can pick one of several named
+models (e.g. per community group or language) with the "model" query
+parameter or JSON field; named models load on first use and are evicted
+least-recently-used beyond MODEL_MEMORY_BUDGET_MB (see model_registry.py).
+Without "model" the default model below serves the request.
+
+Multi-node mode (SERVER_ROLE, SHARD_CONFIG, see shard_aggregator.py):
+- shard:      scores the row range of shard SHARD_ID and serves
+              POST /internal/shard/topk
+- aggregator: loads only the vectorizer and fans /api/recommend out to
+              the shard servers
 
 Author: DSAA2044 Student
 Date: December 2025
 """
 
+from contextlib import nullcontext
 from flask import Flask, request, jsonify
 from base_recommender import RecommenderFactory
+from model_loader import ModelLoader, ModelNotReadyError
+from admission_control import PRIORITIES, AdmissionController, AdmissionRejectedError
+from profile_store import ProfileStore, ProfileExistsError, ProfileNotFoundError
+from ranking_cache import CursorExpiredError
+from request_budget import RequestBudget
+from score_blending import validate_blend
+from field_vectors import validate_field_weights
+from shadow_scoring import ShadowScorer
+from model_registry import ModelRegistry, UnknownModelError, load_registry_config
+from cold_start import candidate_priors
 import os
+import time
 
 # Initialize Flask app
 app = Flask(__name__)
@@ -22,12 +70,348 @@ app = Flask(__name__)
 # Create recommender using factory pattern
 # Easy to switch: change 'tfidf' to 'bert' when ready
 ALGORITHM = os.getenv('RECOMMENDER_ALGORITHM', 'tfidf')
-model = RecommenderFactory.create_recommender(algorithm=ALGORITHM, models_dir='models')
 
-# Load model at startup
-print(f"Loading {ALGORITHM.upper()} recommendation model...")
-model.load_model()
-print("✓ Model loaded successfully!")
+# 'background' (default) or 'eager'
+MODEL_LOAD_MODE = os.getenv('MODEL_LOAD_MODE', 'background')
+
+# When to load tfidf_matrix / processed_posts: 'lazy' (first /api/recommend),
+# 'background' (right after the vectorizer) or 'eager'
+LEGACY_ARTIFACTS = os.getenv('LEGACY_ARTIFACTS', 'background')
+
+# Scan int8-quantized instead of float32 embeddings (RECOMMENDER_ALGORITHM=lsa)
+LSA_QUANTIZED = os.getenv('LSA_QUANTIZED', '0') == '1'
+
+# Hybrid recommender (RECOMMENDER_ALGORITHM=hybrid): components, optional
+# weights, 'weighted' or 'rrf' fusion, and the per-request latency budget
+HYBRID_COMPONENTS = os.getenv('HYBRID_COMPONENTS', 'tfidf,lsa').split(',')
+HYBRID_WEIGHTS = [float(w) for w in os.getenv('HYBRID_WEIGHTS', '').split(',') if w] or None
+HYBRID_FUSION = os.getenv('HYBRID_FUSION', 'weighted')
+HYBRID_LATENCY_BUDGET_MS = float(os.getenv('HYBRID_LATENCY_BUDGET_MS', '250'))
+
+# Worker processes for scatter-gather scoring in /api/recommend (0 = off)
+NUM_SHARDS = int(os.getenv('NUM_SHARDS', '0'))
+
+# 'standalone' (default), 'shard' or 'aggregator'; the last two read the
+# shard assignment from SHARD_CONFIG (shard servers also need SHARD_ID)
+SERVER_ROLE = os.getenv('SERVER_ROLE', 'standalone')
+SHARD_CONFIG = os.getenv('SHARD_CONFIG')
+SHARD_ID = int(os.getenv('SHARD_ID', '0'))
+
+# Request budgets: characters kept per candidate title/body, tokens kept
+# per history, and the scoring deadline of /api/score and /api/recommend
+# (0 = none). Clients may ask for a shorter deadline with "deadline_ms";
+# past it, partial or fallback results are returned with "degraded": true.
+MAX_BODY_CHARS = int(os.getenv('MAX_BODY_CHARS', '20000'))
+MAX_HISTORY_TOKENS = int(os.getenv('MAX_HISTORY_TOKENS', '20000'))
+SCORE_DEADLINE_MS = float(os.getenv('SCORE_DEADLINE_MS', '1000'))
+
+# Live index of recent Lemmy posts for /api/recommend with "source": "live":
+# size cap (0 = off), maximum age, and whether /api/score candidates are
+# added to it too (off by default: it vectorizes every candidate, even on
+# the otherwise free empty-history path; /api/candidates/ingest always adds)
+LIVE_INDEX_MAX_ITEMS = int(os.getenv('LIVE_INDEX_MAX_ITEMS', '50000'))
+LIVE_INDEX_MAX_AGE_SECONDS = float(os.getenv('LIVE_INDEX_MAX_AGE_SECONDS', '86400'))
+LIVE_INDEX_INGEST_SCORED = LIVE_INDEX_MAX_ITEMS > 0 and os.getenv('LIVE_INDEX_INGEST_SCORED', '0') == '1'
+
+# Multi-interest profiles: cluster history items into up to MAX_INTERESTS
+# centroids (1 = one combined history vector), pooled by 'max' or 'softmax'
+MAX_INTERESTS = int(os.getenv('MAX_INTERESTS', '1'))
+INTEREST_POOLING = os.getenv('INTEREST_POOLING', 'max')
+
+# Candidate field weights. Unset: candidates are vectorized as
+# "title title body" like the training corpus. Set (or "field_weights" in
+# an /api/score request): title and body are vectorized separately and
+# combined with the weights, which ranks differently (see field_vectors.py)
+TITLE_WEIGHT = os.getenv('TITLE_WEIGHT')
+BODY_WEIGHT = os.getenv('BODY_WEIGHT')
+FIELD_WEIGHTS = None
+if TITLE_WEIGHT is not None or BODY_WEIGHT is not None:
+    FIELD_WEIGHTS = {'title': float(TITLE_WEIGHT or 0), 'body': float(BODY_WEIGHT or 0)}
+FIELD_CACHE_SIZE = int(os.getenv('FIELD_CACHE_SIZE', '10000'))
+
+# Near-duplicate collapsing in /api/score (SimHash Hamming distance);
+# requests can turn it on or off with "dedup"
+SCORE_DEDUP = os.getenv('SCORE_DEDUP', '0') == '1'
+DEDUP_MAX_DISTANCE = int(os.getenv('DEDUP_MAX_DISTANCE', '3'))
+
+# Worker processes that clean and vectorize /api/score batches of at least
+# PARALLEL_MIN_TEXTS uncached candidate texts (0 = off; e.g. cores - 1)
+VECTORIZE_WORKERS = int(os.getenv('VECTORIZE_WORKERS', '0'))
+PARALLEL_MIN_TEXTS = int(os.getenv('PARALLEL_MIN_TEXTS', '2000'))
+
+# Streaming corpus scan for /api/recommend: rows per block (0 = score the
+# whole corpus at once), and whether to memory-map the TF-IDF matrix saved
+# by `python streaming_scan.py` instead of loading tfidf_matrix.pkl
+SCAN_BLOCK_ROWS = int(os.getenv('SCAN_BLOCK_ROWS', '0'))
+CORPUS_MMAP = os.getenv('CORPUS_MMAP', '0') == '1'
+
+# Cold start: order of the precomputed ranking served to empty or unknown
+# histories ('hot', 'popular' or 'recent'), and the popularity half-life
+# used to order /api/score candidates when there is no history
+COLD_START_ORDER = os.getenv('COLD_START_ORDER', 'hot')
+COLD_START_HALF_LIFE_DAYS = float(os.getenv('COLD_START_HALF_LIFE_DAYS', '7'))
+
+# Admission control for the scoring endpoints (per worker process):
+# concurrent scoring requests (default: CPU count), waiting requests, and
+# the longest queueing wait for interactive / prefetch requests
+ADMISSION_CONTROL = os.getenv('ADMISSION_CONTROL', '1') == '1'
+ADMISSION_MAX_IN_FLIGHT = int(os.getenv('ADMISSION_MAX_IN_FLIGHT', '0')) or None
+ADMISSION_MAX_QUEUE = int(os.getenv('ADMISSION_MAX_QUEUE', '16'))
+ADMISSION_QUEUE_TIMEOUT_MS = float(os.getenv('ADMISSION_QUEUE_TIMEOUT_MS', '500'))
+ADMISSION_PREFETCH_QUEUE_TIMEOUT_MS = float(os.getenv('ADMISSION_PREFETCH_QUEUE_TIMEOUT_MS', '0'))
+
+# Shadow scoring: a second recommender ('' = off) re-scores a sampled
+# fraction of /api/score and /api/recommend requests in the background;
+# comparisons are appended to SHADOW_LOG_PATH (JSON lines). At most
+# SHADOW_MAX_QUEUE jobs are pending, further samples are dropped.
+SHADOW_ALGORITHM = os.getenv('SHADOW_ALGORITHM', '').lower()
+SHADOW_SAMPLE_RATE = float(os.getenv('SHADOW_SAMPLE_RATE', '0.05'))
+SHADOW_MAX_QUEUE = int(os.getenv('SHADOW_MAX_QUEUE', '32'))
+SHADOW_LOG_PATH = os.getenv('SHADOW_LOG_PATH', 'shadow_scores.jsonl')
+SHADOW_TOP_K = int(os.getenv('SHADOW_TOP_K', '10'))
+
+# Named models served next to the default one: JSON config of models
+# directories (see model_registry.py), the memory budget of the loaded
+# named models (overrides the config's memory_budget_mb; 0 = none; with a
+# budget every model needs memory_mb), how
+# long a request waits for a named model to load before getting 503, and
+# the first retry delay after a failed load (doubles per failure)
+MODEL_REGISTRY_CONFIG = os.getenv('MODEL_REGISTRY_CONFIG')
+MODEL_MEMORY_BUDGET_MB = os.getenv('MODEL_MEMORY_BUDGET_MB')
+MODEL_REGISTRY_LOAD_TIMEOUT_SECONDS = float(os.getenv('MODEL_REGISTRY_LOAD_TIMEOUT_SECONDS', '2'))
+MODEL_REGISTRY_RETRY_SECONDS = float(os.getenv('MODEL_REGISTRY_RETRY_SECONDS', '10'))
+
+# Seconds clients should wait before retrying while the model loads
+RETRY_AFTER_SECONDS = 5
+
+
+def create_model(algorithm=ALGORITHM, role=SERVER_ROLE, models_dir='models'):
+    """
+    Create the recommender; heavy imports happen here, off the main thread.
+    
+    Shadow and registry models (``role`` 'shadow' / 'registry') score
+    in-process only: no shard or vectorization workers and no live index.
+    Registry models load all artifacts up front, memory-mapped where
+    saved, so their configured memory_mb covers the whole model and
+    re-loads are cheap.
+    """
+    print(f"Loading {algorithm.upper()} recommendation model ({role}) from {models_dir}...")
+    in_process = role in ('shadow', 'registry')
+    kwargs = {}
+    if in_process:
+        kwargs['num_shards'] = 0
+    elif SERVER_ROLE == 'aggregator':
+        kwargs['shard_config'] = SHARD_CONFIG
+    elif SERVER_ROLE == 'shard':
+        from shard_aggregator import load_shard_config
+        kwargs['shard_rows'] = load_shard_config(SHARD_CONFIG)['shards'][SHARD_ID]['rows']
+    else:
+        kwargs['num_shards'] = NUM_SHARDS
+    if algorithm == 'lsa':
+        kwargs['quantized'] = LSA_QUANTIZED
+    elif algorithm == 'hybrid':
+        kwargs.update(
+            components=HYBRID_COMPONENTS,
+            weights=HYBRID_WEIGHTS,
+            fusion=HYBRID_FUSION,
+            latency_budget_ms=HYBRID_LATENCY_BUDGET_MS,
+            component_kwargs={'lsa': {'quantized': LSA_QUANTIZED}}
+        )
+    
+    return RecommenderFactory.create_recommender(
+        algorithm=algorithm,
+        models_dir=models_dir,
+        legacy_artifacts='eager' if role == 'registry' else LEGACY_ARTIFACTS,
+        max_body_chars=MAX_BODY_CHARS,
+        max_history_tokens=MAX_HISTORY_TOKENS,
+        live_index_size=0 if in_process else LIVE_INDEX_MAX_ITEMS,
+        live_index_max_age=LIVE_INDEX_MAX_AGE_SECONDS,
+        max_interests=MAX_INTERESTS,
+        interest_pooling=INTEREST_POOLING,
+        field_weights=FIELD_WEIGHTS,
+        field_cache_size=FIELD_CACHE_SIZE,
+        vectorize_workers=0 if in_process else VECTORIZE_WORKERS,
+        parallel_min_texts=PARALLEL_MIN_TEXTS,
+        scan_block_rows=SCAN_BLOCK_ROWS,
+        corpus_mmap=CORPUS_MMAP or role == 'registry',
+        cold_start_order=COLD_START_ORDER,
+        **kwargs
+    )
+
+
+# Worker processes fork while the model loads; that must happen on the main
+# thread before the shadow loader and the server's threads exist
+FORKS_WORKERS = VECTORIZE_WORKERS > 1 or (SERVER_ROLE == 'standalone' and NUM_SHARDS > 1)
+
+loader = ModelLoader(create_model)
+loader.start(background=MODEL_LOAD_MODE != 'eager' and not FORKS_WORKERS)
+
+# The shadow model always loads in the background; until it is ready no
+# requests are sampled
+shadow = None
+if SHADOW_ALGORITHM:
+    shadow_loader = ModelLoader(lambda: create_model(SHADOW_ALGORITHM, role='shadow'))
+    shadow_loader.start(background=True)
+    shadow = ShadowScorer(
+        shadow_loader,
+        sample_rate=SHADOW_SAMPLE_RATE,
+        max_queue=SHADOW_MAX_QUEUE,
+        log_path=SHADOW_LOG_PATH or None,
+        k=SHADOW_TOP_K,
+        deadline_ms=SCORE_DEADLINE_MS if SCORE_DEADLINE_MS > 0 else None
+    )
+
+# Named models, loaded on the first request that asks for them
+registry = None
+if MODEL_REGISTRY_CONFIG:
+    registry_config = load_registry_config(MODEL_REGISTRY_CONFIG)
+    registry = ModelRegistry(
+        lambda name, spec: create_model(spec.get('algorithm', ALGORITHM), 'registry', spec['models_dir']),
+        registry_config['models'],
+        memory_budget_mb=float(MODEL_MEMORY_BUDGET_MB) if MODEL_MEMORY_BUDGET_MB is not None
+        else registry_config.get('memory_budget_mb'),
+        load_timeout=MODEL_REGISTRY_LOAD_TIMEOUT_SECONDS,
+        retry_backoff=MODEL_REGISTRY_RETRY_SECONDS
+    )
+
+# Server-side user profiles, so clients send history deltas + a profile_id.
+# Set PROFILE_DB_PATH to persist profiles in SQLite across restarts.
+profile_store = ProfileStore(
+    max_profiles=int(os.getenv('PROFILE_MAX_ENTRIES', '10000')),
+    max_seen_ids=int(os.getenv('PROFILE_MAX_SEEN_IDS', '500')),
+    db_path=os.getenv('PROFILE_DB_PATH') or None
+)
+
+
+admission = None
+if ADMISSION_CONTROL:
+    admission = AdmissionController(
+        max_in_flight=ADMISSION_MAX_IN_FLIGHT,
+        max_queue=ADMISSION_MAX_QUEUE,
+        queue_timeout_ms=ADMISSION_QUEUE_TIMEOUT_MS,
+        prefetch_queue_timeout_ms=ADMISSION_PREFETCH_QUEUE_TIMEOUT_MS
+    )
+
+
+def requested_model():
+    """Model named by the "model" query parameter or JSON field (None: default)."""
+    name = request.args.get('model')
+    if name is None and request.is_json:
+        data = request.get_json(silent=True)
+        if isinstance(data, dict):
+            name = data.get('model')
+    return name
+
+
+def get_model(name=None):
+    """
+    The default model, or the named registry model.
+    
+    Raises:
+        ModelNotReadyError: while the model loads
+        UnknownModelError: if no such model is configured
+    """
+    if name is None:
+        return loader.get()
+    if registry is None:
+        raise UnknownModelError(name)
+    return registry.get(name)
+
+
+def model_algorithm(name=None):
+    if name is None:
+        return ALGORITHM
+    return registry.spec(name).get('algorithm', ALGORITHM)
+
+
+def admitted(priority, num_candidates=0, text_chars=0, scan_rows=0):
+    """Context holding a scoring slot (raises AdmissionRejectedError if shed)."""
+    if admission is None:
+        return nullcontext()
+    units = AdmissionController.estimate_units(num_candidates, text_chars, scan_rows)
+    return admission.admit(units, priority)
+
+
+def request_priority(data=None, default='interactive'):
+    """Priority class from the X-Request-Priority header or the "priority" field."""
+    priority = request.headers.get('X-Request-Priority')
+    if priority is None and isinstance(data, dict):
+        priority = data.get('priority')
+    return priority or default
+
+
+def text_chars(texts, max_chars=None):
+    """Total length of the string texts, each counted up to max_chars."""
+    return sum(
+        min(len(text), max_chars) if max_chars else len(text)
+        for text in texts
+        if isinstance(text, str)
+    )
+
+
+def candidate_chars(candidates):
+    return text_chars(
+        (c.get(field) for c in candidates if isinstance(c, dict) for field in ('title', 'body')),
+        MAX_BODY_CHARS
+    )
+
+
+def shadowed(response, endpoint, method, kwargs, results, primary_ms, units=None, postprocess=None):
+    """
+    Queue a sampled request for shadow scoring once ``response`` has been
+    sent. The shadow job holds a 'prefetch' admission slot of ``units``
+    (kwargs of admitted()), so it is shed first under load. Only requests
+    to the default model are shadowed.
+    """
+    if shadow is not None and requested_model() is None and shadow.sample():
+        primary_ids = [str(result['id']) for result in results]
+        slot = admitted('prefetch', **(units or {}))
+        response.call_on_close(lambda: shadow.submit(
+            endpoint, method, kwargs, primary_ids, primary_ms, slot, postprocess
+        ))
+    return response
+
+
+def rank_by_prior(scored_candidates, candidates):
+    """Order scored entries by their candidate's popularity prior ('prior_score')."""
+    priors = candidate_priors(candidates, COLD_START_HALF_LIFE_DAYS)
+    prior_by_id = {}
+    for candidate, prior in zip(candidates, priors):
+        prior_by_id.setdefault(candidate.get('id', ''), float(prior))
+    ranked = [dict(item, prior_score=prior_by_id.get(item['id'], 0.0)) for item in scored_candidates]
+    ranked.sort(key=lambda item: item['prior_score'], reverse=True)
+    return ranked
+
+
+def order_scored(scored_candidates, diversity, top_k):
+    """Best first (MMR results are already ordered), cut to top_k."""
+    if not diversity:
+        scored_candidates = sorted(scored_candidates, key=lambda x: x['similarity_score'], reverse=True)
+    if top_k and top_k > 0:
+        scored_candidates = scored_candidates[:top_k]
+    return scored_candidates
+
+
+def request_budget(deadline_ms=None):
+    """Budget with the server deadline, or the client's if that is shorter."""
+    if SCORE_DEADLINE_MS > 0 and (deadline_ms is None or deadline_ms > SCORE_DEADLINE_MS):
+        deadline_ms = SCORE_DEADLINE_MS
+    return RequestBudget(deadline_ms)
+
+
+def valid_deadline(deadline_ms):
+    return deadline_ms is None or (
+        isinstance(deadline_ms, (int, float)) and not isinstance(deadline_ms, bool) and deadline_ms > 0
+    )
+
+
+def profile_history_counts(profile):
+    """Accumulated term counts of a profile, or None if it has no history."""
+    # One read of the tuple: a concurrent append replaces it whole
+    term_indices, term_counts = profile.terms
+    if len(term_indices) == 0:
+        return None
+    return term_indices, term_counts
 
 
 # ============================================================================
@@ -37,16 +421,44 @@ print("✓ Model loaded successfully!")
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """Health check endpoint."""
+    state = loader.describe()
+    status = {'ready': 'healthy', 'failed': 'unhealthy'}.get(state['status'], 'starting')
+    
     return jsonify({
-        'status': 'healthy',
+        'status': status,
         'service': 'Content-Based Recommendation API',
-        'version': '1.0.0'
+        'version': '1.0.0',
+        'model': state,
+        'admission': admission.describe() if admission is not None else None,
+        'shadow': shadow.describe() if shadow is not None else None,
+        'registry': registry.describe() if registry is not None else None
     })
 
 
+@app.route('/api/health/live', methods=['GET'])
+def liveness_check():
+    """Liveness probe: the process is up and serving HTTP."""
+    return jsonify({'status': 'alive'})
+
+
+@app.route('/api/health/ready', methods=['GET'])
+def readiness_check():
+    """Readiness probe: 200 once the model is loaded and warmed up, else 503."""
+    state = loader.describe()
+    
+    if not state['ready']:
+        response = jsonify({'status': 'not_ready', 'model': state})
+        if state['status'] != 'failed':
+            response.headers['Retry-After'] = str(RETRY_AFTER_SECONDS)
+        return response, 503
+    
+    return jsonify({'status': 'ready', 'model': state})
+
+
 @app.route('/api/model/info', methods=['GET'])
 def get_model_info():
-    """Get information about the loaded model."""
+    """Get information about the loaded model (or the one named by ?model=)."""
+    model = get_model(requested_model())
     try:
         info = model.get_model_info()
         return jsonify({
@@ -69,11 +481,19 @@ def score_candidates():
     Request Body:
     {
         "history_contents": ["user history 1", "user history 2", ...],
+        "profile_id": "...",  // optional, server-side profile instead of history_contents
         "candidates": [
             {"id": "123", "title": "...", "body": "..."},
             {"id": "456", "title": "...", "body": "..."}
         ],
-        "top_k": 10  // optional, default: return all scored
+        "top_k": 10,  // optional, default: return all scored
+        "diversity": 0.3,  // optional, MMR lambda in [0, 1], default: 0
+        "deadline_ms": 200,  // optional, shorter than SCORE_DEADLINE_MS
+        "field_weights": {"title": 2.0, "body": 1.0},  // optional
+        "dedup": true,  // optional, collapse near-duplicate candidates
+        "dedup_distance": 3,  // optional, SimHash bits, default DEDUP_MAX_DISTANCE
+        "priority": "interactive",  // optional, or "prefetch" (also X-Request-Priority)
+        "model": "gaming"  // optional, named model (MODEL_REGISTRY_CONFIG), also ?model=
     }
     
     Response:
@@ -83,9 +503,28 @@ def score_candidates():
         "scored_candidates": [
             {"id": "456", "similarity_score": 0.85},
             {"id": "123", "similarity_score": 0.62}
-        ]
+        ],
+        "degraded": false
     }
+    
+    If the deadline passes, candidates not scored yet get 0.0 and the
+    response has "degraded": true plus "degraded_reasons".
+    
+    With LIVE_INDEX_INGEST_SCORED=1, scored candidates are also added to
+    the live index; named models have no live index.
+    
+    With dedup, near-duplicate candidates (e.g. one post mirrored across
+    communities) are collapsed into the best-scoring copy, which lists the
+    others in "duplicate_ids".
+    
+    Without any history, candidates are ordered by a popularity prior
+    ("prior_score") from their optional "score" and "created_utc" fields,
+    decayed with COLD_START_HALF_LIFE_DAYS; similarity_score stays 0.0.
+    The same applies when every candidate scores 0.0, e.g. for a history
+    with no term the model knows.
     """
+    model_name = requested_model()
+    model = get_model(model_name)
     try:
         data = request.get_json()
         
@@ -98,6 +537,22 @@ def score_candidates():
         history_contents = data.get('history_contents', [])
         candidates = data.get('candidates', [])
         top_k = data.get('top_k', None)
+        diversity = data.get('diversity', 0.0)
+        deadline_ms = data.get('deadline_ms')
+        field_weights = data.get('field_weights')
+        dedup = data.get('dedup', SCORE_DEDUP)
+        dedup_distance = data.get('dedup_distance', DEDUP_MAX_DISTANCE)
+        priority = request_priority(data)
+        
+        history_counts = None
+        if data.get('profile_id') is not None:
+            # Profiles hold term counts in the default model's vocabulary
+            if model_name is not None:
+                return jsonify({
+                    'success': False,
+                    'error': 'profile_id is only supported by the default model'
+                }), 400
+            history_counts = profile_history_counts(profile_store.get(data['profile_id']))
         
         if not candidates:
             return jsonify({
@@ -105,39 +560,108 @@ def score_candidates():
                 'error': 'No candidates provided'
             }), 400
         
-        # If no history, return candidates with equal scores
-        if not history_contents:
-            scored = [
-                {'id': c.get('id', ''), 'similarity_score': 0.0}
-                for c in candidates
-            ]
+        if priority not in PRIORITIES:
+            return jsonify({
+                'success': False,
+                'error': f'priority must be one of: {", ".join(PRIORITIES)}'
+            }), 400
+        
+        # If no history, order candidates by their own popularity and age
+        if not history_contents and history_counts is None:
+            if LIVE_INDEX_INGEST_SCORED and model_name is None and model.supports_live_index:
+                with admitted(priority, len(candidates), candidate_chars(candidates)):
+                    model.ingest_candidates(candidates)
+            scored = rank_by_prior([{'id': c.get('id', ''), 'similarity_score': 0.0} for c in candidates], candidates)
             return jsonify({
                 'success': True,
-                'algorithm': ALGORITHM,
+                'algorithm': model_algorithm(model_name),
                 'scored_candidates': scored,
-                'note': 'No history available, returning unscored candidates'
+                'note': 'No history available, ranked by popularity and recency'
             })
         
-        # Score candidates using the model
-        scored_candidates = model.score_candidates(
-            history_contents=history_contents,
-            candidates=candidates
-        )
+        if not isinstance(diversity, (int, float)) or diversity < 0 or diversity > 1:
+            return jsonify({
+                'success': False,
+                'error': 'diversity must be a number between 0 and 1'
+            }), 400
         
-        # Sort by similarity score descending
-        scored_candidates.sort(key=lambda x: x['similarity_score'], reverse=True)
+        if not valid_deadline(deadline_ms):
+            return jsonify({
+                'success': False,
+                'error': 'deadline_ms must be a positive number'
+            }), 400
         
-        # Apply top_k if specified
-        if top_k and top_k > 0:
-            scored_candidates = scored_candidates[:top_k]
+        if field_weights is not None:
+            field_weights_error = validate_field_weights(field_weights)
+            if field_weights_error:
+                return jsonify({
+                    'success': False,
+                    'error': field_weights_error
+                }), 400
         
-        return jsonify({
+        if dedup and (
+            not isinstance(dedup_distance, int) or isinstance(dedup_distance, bool)
+            or dedup_distance < 0 or dedup_distance > 15
+        ):
+            return jsonify({
+                'success': False,
+                'error': 'dedup_distance must be an integer between 0 and 15'
+            }), 400
+        
+        # Score candidates using the model; queueing counts against the deadline
+        budget = request_budget(deadline_ms)
+        units = {
+            'num_candidates': len(candidates),
+            'text_chars': candidate_chars(candidates) + text_chars(history_contents)
+        }
+        score_kwargs = {
+            'history_contents': history_contents,
+            'candidates': candidates,
+            'diversity': diversity,
+            'top_k': top_k if top_k and top_k > 0 else None,
+            'history_counts': history_counts,
+            'field_weights': field_weights,
+            'dedup_distance': dedup_distance if dedup else None
+        }
+        with admitted(priority, **units):
+            started = time.perf_counter()
+            scored_candidates = model.score_candidates(
+                **score_kwargs,
+                budget=budget,
+                ingest=LIVE_INDEX_INGEST_SCORED and model_name is None and model.supports_live_index
+            )
+            primary_ms = (time.perf_counter() - started) * 1000.0
+        
+        # Nothing matched (e.g. no history term is in the vocabulary):
+        # fall back to the popularity prior, as without history
+        extra = {}
+        if not any(item['similarity_score'] for item in scored_candidates):
+            scored_candidates = rank_by_prior(scored_candidates, candidates)
+            extra['note'] = 'No known history terms matched, ranked by popularity and recency'
+        
+        # Sort by similarity score descending and apply top_k
+        scored_candidates = order_scored(scored_candidates, diversity, top_k)
+        
+        response = jsonify({
             'success': True,
-            'algorithm': ALGORITHM,
+            'algorithm': model_algorithm(model_name),
             'scored_candidates': scored_candidates,
-            'count': len(scored_candidates)
+            'count': len(scored_candidates),
+            **extra,
+            **budget.describe()
         })
+        return shadowed(
+            response, 'score', 'score_candidates', score_kwargs, scored_candidates, primary_ms,
+            units, lambda results: order_scored(results, diversity, top_k)
+        )
         
+    except ProfileNotFoundError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 404
+    except AdmissionRejectedError:
+        raise
     except Exception as e:
         import traceback
         print(f"ERROR in /api/score: {e}")
@@ -148,6 +672,71 @@ def score_candidates():
         }), 500
 
 
+@app.route('/api/candidates/ingest', methods=['POST'])
+def ingest_candidates():
+    """
+    Add live posts to the live index, so /api/recommend with
+    "source": "live" can return them.
+    
+    Request Body:
+    {
+        "candidates": [
+            {"id": "123", "title": "...", "body": "...", "url": "..."}
+        ]
+    }
+    
+    All fields except "body" are stored and returned with recommendations.
+    Posts expire after LIVE_INDEX_MAX_AGE_SECONDS or when the index holds
+    more than LIVE_INDEX_MAX_ITEMS. Ingestion is background work, so its
+    default priority is "prefetch".
+    
+    Response:
+    {
+        "success": true,
+        "ingested": 1
+    }
+    """
+    model = get_model(requested_model())
+    try:
+        data = request.get_json()
+        candidates = data.get('candidates') if isinstance(data, dict) else None
+        
+        if not isinstance(candidates, list) or not all(isinstance(c, dict) for c in candidates):
+            return jsonify({
+                'success': False,
+                'error': 'candidates must be a list of objects'
+            }), 400
+        
+        priority = request_priority(data, default='prefetch')
+        if priority not in PRIORITIES:
+            return jsonify({
+                'success': False,
+                'error': f'priority must be one of: {", ".join(PRIORITIES)}'
+            }), 400
+        
+        if not model.supports_live_index:
+            return jsonify({
+                'success': False,
+                'error': 'The live index is not enabled for this model'
+            }), 400
+        
+        with admitted(priority, len(candidates), candidate_chars(candidates)):
+            ingested = model.ingest_candidates(candidates)
+        
+        return jsonify({
+            'success': True,
+            'ingested': ingested
+        })
+        
+    except AdmissionRejectedError:
+        raise
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
 @app.route('/api/recommend', methods=['GET', 'POST'])
 def recommend():
     """
@@ -156,11 +745,33 @@ def recommend():
     Request Body (NEW FORMAT):
     {
         "history_contents": ["post title 1", "post text 2", ...],
+        "profile_id": "...",      // optional, instead of history_contents;
+                                  // the profile's seen ids are excluded
         "top_k": 10,              // optional, default: 10
         "min_score": 0.0,         // optional, default: 0.0
-        "exclude_ids": []         // optional, IDs to exclude
+        "exclude_ids": [],        // optional, IDs to exclude
+        "diversity": 0.0,         // optional, MMR lambda in [0, 1]
+        "blend": {                // optional, freshness/popularity blending
+            "alpha": 1.0,         //   cos^alpha
+            "beta": 0.5,          //   * decay(created_utc)^beta
+            "gamma": 0.2,         //   * (1 + log1p(score))^gamma
+            "half_life_days": 30
+        },
+        "subreddits": [],         // optional, only these subreddits
+        "exclude_subreddits": [], // optional, never these subreddits
+        "paginate": false,        // optional, return a next_cursor
+        "cursor": "...",          // optional, next_cursor of the previous page
+        "deadline_ms": 200,       // optional, shorter than SCORE_DEADLINE_MS
+        "source": "corpus",       // optional, "live" for recent Lemmy posts
+        "priority": "interactive", // optional, or "prefetch" (also X-Request-Priority)
+        "model": "gaming"         // optional, named model (MODEL_REGISTRY_CONFIG), also ?model=
     }
     
+    Pagination: the first page ("paginate": true) scores the corpus once and
+    caches the ranked candidates; pass the returned "next_cursor" (instead of
+    history_contents) to fetch the following page. An expired cursor returns
+    410 and the client should start over with a new first page.
+    
     Legacy support (DEPRECATED):
     {
         "query": "single keyword search",
@@ -172,9 +783,24 @@ def recommend():
         "success": true,
         "count": 10,
         "algorithm": "TF-IDF",
-        "recommendations": [...]
+        "recommendations": [...],
+        "degraded": false
     }
+    
+    If the deadline passes during the corpus scan, the posts scored so far
+    are ranked (or, if none were, the most popular posts are returned) and
+    the response has "degraded": true. Pagination does not use a deadline.
+    
+    An empty history ("history_contents": []), or one without any known
+    word, gets the precomputed cold-start ranking (COLD_START_ORDER) with
+    similarity_score 0 instead of a corpus scan.
+    
+    "source": "live" recommends from the live index of recently scored and
+    ingested posts instead of the training corpus; blend, subreddit filters
+    and pagination do not apply to it.
     """
+    model_name = requested_model()
+    model = get_model(model_name)
     try:
         # Support both GET (legacy) and POST (new) requests
         if request.method == 'GET':
@@ -190,6 +816,16 @@ def recommend():
             top_k = int(request.args.get('top_k', 10))
             min_score = float(request.args.get('min_score', 0.0))
             exclude_ids = []
+            history_counts = None
+            diversity = float(request.args.get('diversity', 0.0))
+            blend = None
+            subreddits = request.args.getlist('subreddit') or None
+            exclude_subreddits = request.args.getlist('exclude_subreddit') or None
+            deadline_ms = request.args.get('deadline_ms', type=float)
+            source = request.args.get('source', 'corpus')
+            priority = request_priority({'priority': request.args.get('priority')})
+            paginate = False
+            cursor = None
             
         else:
             # POST request with JSON body
@@ -203,21 +839,48 @@ def recommend():
             
             # Support both new and legacy POST formats
             history_contents = data.get('history_contents')
+            cursor = data.get('cursor')
+            paginate = bool(data.get('paginate', False)) or cursor is not None
             
             # Legacy support: convert query to history_contents
             if not history_contents and 'query' in data:
                 history_contents = [data['query']]
             
-            if not history_contents:
+            # Server-side profile: accumulated history plus seen ids
+            profile = None
+            if data.get('profile_id') is not None:
+                if model_name is not None:
+                    return jsonify({
+                        'success': False,
+                        'error': 'profile_id is only supported by the default model'
+                    }), 400
+                profile = profile_store.get(data['profile_id'])
+            
+            # Later pages are served from the cursor, history is not needed.
+            # An explicit empty history gets the cold-start ranking.
+            if history_contents is None and cursor is None and profile is None:
                 return jsonify({
                     'success': False,
                     'error': 'Missing required field: history_contents'
                 }), 400
+            history_contents = history_contents or []
             
             # Get parameters
             top_k = data.get('top_k', 10)
             min_score = data.get('min_score', 0.0)
             exclude_ids = data.get('exclude_ids', [])
+            history_counts = None
+            if profile is not None:
+                history_counts = profile_history_counts(profile)
+                if isinstance(exclude_ids, list):
+                    exclude_ids = exclude_ids + list(profile.seen_ids)
+            diversity = data.get('diversity', 0.0)
+            blend = data.get('blend')
+            subreddits = data.get('subreddits')
+            exclude_subreddits = data.get('exclude_subreddits')
+            deadline_ms = data.get('deadline_ms')
+            source = data.get('source', 'corpus')
+            priority = request_priority(data)
         
         # Validate parameters
         if not isinstance(history_contents, list):
@@ -238,25 +901,161 @@ def recommend():
                 'error': 'min_score must be a number between 0 and 1'
             }), 400
         
-        # Get recommendations using history-based algorithm
-        recommendations = model.recommend_from_history(
-            history_contents=history_contents,
-            top_k=top_k,
-            min_score=min_score,
-            exclude_ids=exclude_ids
-        )
+        if not isinstance(diversity, (int, float)) or diversity < 0 or diversity > 1:
+            return jsonify({
+                'success': False,
+                'error': 'diversity must be a number between 0 and 1'
+            }), 400
+        
+        for name, value in (('subreddits', subreddits), ('exclude_subreddits', exclude_subreddits)):
+            if value is not None and (
+                not isinstance(value, list) or not all(isinstance(v, str) for v in value)
+            ):
+                return jsonify({
+                    'success': False,
+                    'error': f'{name} must be a list of strings'
+                }), 400
+        
+        if blend is not None:
+            blend_error = validate_blend(blend)
+            if blend_error:
+                return jsonify({
+                    'success': False,
+                    'error': blend_error
+                }), 400
+        
+        if not valid_deadline(deadline_ms):
+            return jsonify({
+                'success': False,
+                'error': 'deadline_ms must be a positive number'
+            }), 400
+        
+        if source not in ('corpus', 'live'):
+            return jsonify({
+                'success': False,
+                'error': 'source must be "corpus" or "live"'
+            }), 400
+        
+        if source == 'live' and (paginate or blend or subreddits or exclude_subreddits):
+            return jsonify({
+                'success': False,
+                'error': 'blend, subreddit filters and pagination are not supported for source "live"'
+            }), 400
+        
+        if paginate and not model.supports_pagination:
+            return jsonify({
+                'success': False,
+                'error': 'Pagination is not supported by this model'
+            }), 400
+        
+        if source == 'live' and not model.supports_live_index:
+            return jsonify({
+                'success': False,
+                'error': 'The live index is not enabled for this model'
+            }), 400
+        
+        if priority not in PRIORITIES:
+            return jsonify({
+                'success': False,
+                'error': f'priority must be one of: {", ".join(PRIORITIES)}'
+            }), 400
         
         # Get model info
         model_info = model.get_model_info()
         
+        # Admission cost: a corpus scan, except for cursor pages, live search
+        # and cold start
+        scan_rows = 0
+        if source == 'corpus' and cursor is None and (history_contents or history_counts is not None):
+            scan_rows = model_info.get('num_posts', 0)
+        slot = admitted(priority, text_chars=text_chars(history_contents), scan_rows=scan_rows)
+        
+        if paginate:
+            with slot:
+                page = model.recommend_page(
+                    history_contents=history_contents,
+                    top_k=top_k,
+                    min_score=min_score,
+                    exclude_ids=exclude_ids,
+                    cursor=cursor,
+                    blend=blend,
+                    subreddits=subreddits,
+                    exclude_subreddits=exclude_subreddits,
+                    history_counts=history_counts
+                )
+            
+            return jsonify({
+                'success': True,
+                'algorithm': model_info.get('algorithm', 'Unknown'),
+                'count': len(page['recommendations']),
+                'recommendations': page['recommendations'],
+                'next_cursor': page['next_cursor']
+            })
+        
+        budget = request_budget(deadline_ms)
+        if source == 'live':
+            with slot:
+                recommendations = model.recommend_live(
+                    history_contents=history_contents,
+                    top_k=top_k,
+                    min_score=min_score,
+                    exclude_ids=exclude_ids,
+                    diversity=diversity,
+                    history_counts=history_counts,
+                    budget=budget
+                )
+            
+            return jsonify({
+                'success': True,
+                'algorithm': model_info.get('algorithm', 'Unknown'),
+                'source': source,
+                'count': len(recommendations),
+                'recommendations': recommendations,
+                **budget.describe()
+            })
+        
+        # Get recommendations using history-based algorithm
+        recommend_kwargs = {
+            'history_contents': history_contents,
+            'top_k': top_k,
+            'min_score': min_score,
+            'exclude_ids': exclude_ids,
+            'diversity': diversity,
+            'blend': blend,
+            'subreddits': subreddits,
+            'exclude_subreddits': exclude_subreddits,
+            'history_counts': history_counts
+        }
+        with slot:
+            started = time.perf_counter()
+            recommendations = model.recommend_from_history(**recommend_kwargs, budget=budget)
+            primary_ms = (time.perf_counter() - started) * 1000.0
+        
         # Return response
-        return jsonify({
+        response = jsonify({
             'success': True,
             'algorithm': model_info.get('algorithm', 'Unknown'),
             'count': len(recommendations),
-            'recommendations': recommendations
+            'recommendations': recommendations,
+            **budget.describe()
         })
+        return shadowed(
+            response, 'recommend', 'recommend_from_history', recommend_kwargs, recommendations, primary_ms,
+            {'text_chars': text_chars(history_contents), 'scan_rows': scan_rows}
+        )
         
+    except CursorExpiredError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 410
+    except ProfileNotFoundError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 404
+    except AdmissionRejectedError:
+        raise
     except Exception as e:
         return jsonify({
             'success': False,
@@ -264,6 +1063,154 @@ def recommend():
         }), 500
 
 
+@app.route('/api/profile', methods=['POST'])
+def create_profile():
+    """
+    Create a server-side user profile.
+    
+    Request Body (all optional):
+    {
+        "profile_id": "...",            // default: a new random id
+        "history_contents": ["..."],    // initial history
+        "seen_ids": ["123", ...]        // initial seen post ids
+    }
+    
+    An existing profile_id is not overwritten (409); use
+    POST /api/profile/<profile_id>/reset to clear a profile.
+    """
+    data = request.get_json(silent=True) or {}
+    
+    history_contents = data.get('history_contents', [])
+    seen_ids = data.get('seen_ids', [])
+    if not isinstance(history_contents, list) or not isinstance(seen_ids, list):
+        return jsonify({
+            'success': False,
+            'error': 'history_contents and seen_ids must be lists'
+        }), 400
+    
+    profile_id = data.get('profile_id')
+    if profile_id is not None and not isinstance(profile_id, str):
+        return jsonify({
+            'success': False,
+            'error': 'profile_id must be a string'
+        }), 400
+    
+    if history_contents:
+        model = loader.get()
+        if not model.supports_profiles:
+            return jsonify({
+                'success': False,
+                'error': 'Server-side profiles are not supported by this model'
+            }), 400
+    
+    try:
+        profile = profile_store.create(profile_id)
+    except ProfileExistsError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 409
+    
+    if history_contents or seen_ids:
+        term_counts = (model.history_term_counts(history_contents) if history_contents
+                       else ([], []))
+        profile = profile_store.append(
+            profile.profile_id,
+            term_counts,
+            num_items=len(history_contents),
+            seen_ids=seen_ids
+        )
+    
+    return jsonify({
+        'success': True,
+        'profile': profile.summary()
+    }), 201
+
+
+@app.route('/api/profile/<profile_id>', methods=['GET'])
+def get_profile(profile_id):
+    """Get a profile summary."""
+    try:
+        profile = profile_store.get(profile_id)
+    except ProfileNotFoundError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 404
+    
+    return jsonify({
+        'success': True,
+        'profile': profile.summary()
+    })
+
+
+@app.route('/api/profile/<profile_id>/append', methods=['POST'])
+def append_profile(profile_id):
+    """
+    Add newly read items to a profile (only the delta since the last call).
+    
+    Request Body:
+    {
+        "history_contents": ["newly read post 1", ...],
+        "seen_ids": ["123", ...]
+    }
+    """
+    data = request.get_json(silent=True) or {}
+    
+    history_contents = data.get('history_contents', [])
+    seen_ids = data.get('seen_ids', [])
+    if not isinstance(history_contents, list) or not isinstance(seen_ids, list):
+        return jsonify({
+            'success': False,
+            'error': 'history_contents and seen_ids must be lists'
+        }), 400
+    
+    term_counts = ([], [])
+    if history_contents:
+        model = loader.get()
+        if not model.supports_profiles:
+            return jsonify({
+                'success': False,
+                'error': 'Server-side profiles are not supported by this model'
+            }), 400
+        term_counts = model.history_term_counts(history_contents)
+    
+    try:
+        profile = profile_store.append(
+            profile_id,
+            term_counts,
+            num_items=len(history_contents),
+            seen_ids=seen_ids
+        )
+    except ProfileNotFoundError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 404
+    
+    return jsonify({
+        'success': True,
+        'profile': profile.summary()
+    })
+
+
+@app.route('/api/profile/<profile_id>/reset', methods=['POST'])
+def reset_profile(profile_id):
+    """Clear a profile's history and seen ids."""
+    try:
+        profile = profile_store.reset(profile_id)
+    except ProfileNotFoundError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 404
+    
+    return jsonify({
+        'success': True,
+        'profile': profile.summary()
+    })
+
+
 @app.route('/api/recommend', methods=['GET'])
 def recommend_get():
     """
@@ -276,6 +1223,7 @@ def recommend_get():
     
     Example: /api/recommend?q=machine+learning&top_k=10
     """
+    model = get_model(requested_model())
     try:
         # Get query parameters
         query = request.args.get('q') or request.args.get('query')
@@ -329,10 +1277,130 @@ def recommend_get():
         }), 500
 
 
+@app.route('/api/similar/<post_id>', methods=['GET'])
+def similar_posts(post_id):
+    """
+    "More like this": posts most similar to a training post.
+    
+    Served from the precomputed neighbor graph, no corpus scan.
+    
+    Query Parameters:
+    - top_k: Number of results (optional, default: 10)
+    
+    Example: /api/similar/abc123?top_k=5
+    """
+    model = get_model(requested_model())
+    try:
+        top_k = int(request.args.get('top_k', 10))
+        
+        if top_k < 1 or top_k > 100:
+            return jsonify({
+                'success': False,
+                'error': 'top_k must be between 1 and 100'
+            }), 400
+        
+        if not model.supports_similar_posts:
+            return jsonify({
+                'success': False,
+                'error': 'Similar posts are not supported by this model'
+            }), 400
+        
+        similar = model.similar_posts(post_id, top_k=top_k)
+        
+        return jsonify({
+            'success': True,
+            'post_id': post_id,
+            'count': len(similar),
+            'similar': similar
+        })
+        
+    except KeyError:
+        return jsonify({
+            'success': False,
+            'error': f'Unknown post_id: {post_id}'
+        }), 404
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': f'Invalid parameter value: {str(e)}'
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@app.route('/internal/shard/topk', methods=['POST'])
+def shard_topk():
+    """
+    Internal: local top-k of this shard for an aggregator request.
+    
+    Only served when SERVER_ROLE=shard. Request/response format: see
+    TFIDFRecommender.score_shard.
+    """
+    if SERVER_ROLE != 'shard':
+        return jsonify({
+            'success': False,
+            'error': 'Endpoint not found'
+        }), 404
+    
+    model = loader.get()
+    try:
+        data = request.get_json()
+        if not data or 'history_vector' not in data:
+            return jsonify({
+                'success': False,
+                'error': 'Missing required field: history_vector'
+            }), 400
+        
+        return jsonify({
+            'success': True,
+            **model.score_shard(data)
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
 # ============================================================================
 # ERROR HANDLERS
 # ============================================================================
 
+@app.errorhandler(ModelNotReadyError)
+def model_not_ready(e):
+    """Handle requests that arrive before the model is ready."""
+    response = jsonify({
+        'success': False,
+        'error': str(e)
+    })
+    response.headers['Retry-After'] = str(RETRY_AFTER_SECONDS)
+    return response, 503
+
+
+@app.errorhandler(UnknownModelError)
+def unknown_model(e):
+    """Handle requests for a model that is not configured."""
+    return jsonify({
+        'success': False,
+        'error': str(e),
+        'models': registry.names if registry is not None else []
+    }), 404
+
+
+@app.errorhandler(AdmissionRejectedError)
+def overloaded(e):
+    """Handle requests shed by admission control."""
+    response = jsonify({
+        'success': False,
+        'error': str(e)
+    })
+    response.headers['Retry-After'] = str(e.retry_after)
+    return response, 503
+
+
 @app.errorhandler(404)
 def not_found(e):
     """Handle 404 errors."""
@@ -370,14 +1438,24 @@ if __name__ == '__main__':
     print("=" * 80)
     print("\nEndpoints:")
     print("  GET  /api/health")
+    print("  GET  /api/health/live")
+    print("  GET  /api/health/ready")
     print("  GET  /api/model/info")
     print("  POST /api/recommend")
     print("  GET  /api/recommend?q=<query>&top_k=<n>")
+    print("  POST /api/candidates/ingest")
+    print("  GET  /api/similar/<post_id>")
+    print("  POST /api/profile")
+    print("  GET  /api/profile/<id>")
+    print("  POST /api/profile/<id>/append")
+    print("  POST /api/profile/<id>/reset")
+    if SERVER_ROLE == 'shard':
+        print("  POST /internal/shard/topk")
     print("\n" + "=" * 80)
     
     # Run the Flask app
     app.run(
         host='0.0.0.0',
-        port=5000,
+        port=int(os.getenv('PORT', '5000')),
         debug=True
     )
@@ -3,17 +3,28 @@ Base Recommender Architecture
 ==============================
 Extensible recommendation system supporting multiple algorithms:
 - TF-IDF (current baseline)
+- LSA (dense embeddings)
 - BERT (future upgrade)
-- Hybrid models
+- Hybrid models (fusion of the above)
 
 Author: DSAA2044 Team
 Date: December 2025
 """
 
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
 import numpy as np
 
+from request_budget import RequestBudget
+
+# Synthetic queries for warm_up(); content only needs to hit the vocabulary
+WARMUP_QUERIES = [
+    'machine learning research tutorials',
+    'job interview advice career',
+    'college application study tips',
+    'python programming project help'
+]
+
 
 class BaseRecommender(ABC):
     """
@@ -21,6 +32,22 @@ class BaseRecommender(ABC):
     Ensures consistent interface for easy model swapping.
     """
     
+    # Optional capabilities. A recommender that reports one implements the
+    # matching methods (same parameters as recommend_from_history where
+    # they overlap); callers check the flag before calling them.
+    # - supports_pagination: recommend_page(..., cursor=None) ->
+    #   {'recommendations': [...], 'next_cursor': str or None}
+    # - supports_similar_posts: similar_posts(post_id, top_k) -> posts,
+    #   KeyError for an unknown post_id
+    # - supports_live_index: ingest_candidates(candidates) -> int and
+    #   recommend_live(...) over recently scored or ingested posts
+    # - supports_profiles: history_term_counts(history_contents) ->
+    #   additive (term indices, counts) for server-side profiles
+    supports_pagination = False
+    supports_similar_posts = False
+    supports_live_index = False
+    supports_profiles = False
+    
     def __init__(self, models_dir: str = 'models'):
         self.models_dir = models_dir
         self.is_loaded = False
@@ -36,7 +63,13 @@ class BaseRecommender(ABC):
         history_contents: List[str], 
         top_k: int = 10,
         min_score: float = 0.0,
-        exclude_ids: List[str] = None
+        exclude_ids: List[str] = None,
+        diversity: float = 0.0,
+        blend: Dict[str, float] = None,
+        subreddits: List[str] = None,
+        exclude_subreddits: List[str] = None,
+        history_counts: Tuple[np.ndarray, np.ndarray] = None,
+        budget: RequestBudget = None
     ) -> List[Dict[str, Any]]:
         """
         Generate recommendations based on user's reading history.
@@ -51,7 +84,22 @@ class BaseRecommender(ABC):
             Minimum similarity threshold
         exclude_ids : List[str]
             IDs of posts to exclude (already seen)
-            
+        diversity : float
+            MMR lambda in [0, 1]; 0 ranks by similarity only
+        blend : Dict[str, float]
+            Optional freshness/popularity blend ('alpha', 'beta', 'gamma',
+            'half_life_days') applied before top-K selection
+        subreddits : List[str]
+            Only recommend posts from these subreddits
+        exclude_subreddits : List[str]
+            Never recommend posts from these subreddits
+        history_counts : Tuple[np.ndarray, np.ndarray]
+            Server-side profile term counts (see history_term_counts),
+            used instead of history_contents
+        budget : RequestBudget
+            Optional deadline; past it, partial or fallback results are
+            returned and the budget is marked degraded
+        
         Returns:
         --------
         List[Dict[str, Any]]
@@ -63,7 +111,14 @@ class BaseRecommender(ABC):
     def score_candidates(
         self,
         history_contents: List[str],
-        candidates: List[Dict[str, Any]]
+        candidates: List[Dict[str, Any]],
+        diversity: float = 0.0,
+        top_k: int = None,
+        history_counts: Tuple[np.ndarray, np.ndarray] = None,
+        budget: RequestBudget = None,
+        ingest: bool = False,
+        field_weights: Dict[str, float] = None,
+        dedup_distance: int = None
     ) -> List[Dict[str, Any]]:
         """
         Score candidate posts based on user's reading history.
@@ -75,7 +130,23 @@ class BaseRecommender(ABC):
             List of post titles/texts user has recently read
         candidates : List[Dict[str, Any]]
             List of candidate posts, each with 'id', 'title', 'body'
-            
+        diversity : float
+            MMR lambda in [0, 1]; when > 0 the top_k candidates are
+            returned in diversity-aware (MMR) order
+        top_k : int
+            Number of candidates to select when re-ranking (default: all)
+        history_counts : Tuple[np.ndarray, np.ndarray]
+            Server-side profile term counts, used instead of history_contents
+        budget : RequestBudget
+            Optional deadline, checked between chunks of candidates
+        ingest : bool
+            Also add the candidates to the live index (see recommend_live)
+        field_weights : Dict[str, float]
+            Optional 'title' / 'body' weights overriding the model's
+        dedup_distance : int
+            Collapse SimHash near-duplicates within this Hamming distance;
+            kept candidates list the others in 'duplicate_ids'
+        
         Returns:
         --------
         List[Dict[str, Any]]
@@ -87,6 +158,17 @@ class BaseRecommender(ABC):
     def get_model_info(self) -> Dict[str, Any]:
         """Return metadata about the loaded model."""
         pass
+    
+    def warm_up(self):
+        """
+        Run synthetic queries through the scoring path once after loading,
+        so the first real request does not pay one-time initialization costs.
+        """
+        candidates = [
+            {'id': f'warmup_{i}', 'title': query, 'body': query}
+            for i, query in enumerate(WARMUP_QUERIES)
+        ]
+        self.score_candidates(WARMUP_QUERIES, candidates)
 
 
 class RecommenderFactory:
@@ -103,7 +185,7 @@ class RecommenderFactory:
         Parameters:
         -----------
         algorithm : str
-            'tfidf' or 'bert' or 'hybrid'
+            'tfidf', 'lsa', 'bert' or 'hybrid'
         **kwargs : dict
             Additional parameters for specific algorithms
             
@@ -115,12 +197,15 @@ class RecommenderFactory:
         if algorithm.lower() == 'tfidf':
             from tfidf_recommender import TFIDFRecommender
             return TFIDFRecommender(**kwargs)
+        elif algorithm.lower() == 'lsa':
+            from lsa_recommender import LSARecommender
+            return LSARecommender(**kwargs)
         elif algorithm.lower() == 'bert':
             # Future: from bert_recommender import BERTRecommender
             # return BERTRecommender(**kwargs)
             raise NotImplementedError("BERT recommender coming soon!")
         elif algorithm.lower() == 'hybrid':
-            # Future: hybrid model combining TF-IDF and BERT
-            raise NotImplementedError("Hybrid recommender coming soon!")
+            from hybrid_recommender import HybridRecommender
+            return HybridRecommender(**kwargs)
         else:
             raise ValueError(f"Unknown algorithm: {algorithm}")
@@ -0,0 +1,454 @@
+"""
+Bulk Scoring
+============
+Offline candidate scoring for backfills, without the HTTP server.
+
+Backfilling recommendations for every user through ``/api/score`` is slow
+and takes capacity away from live traffic. This tool reads records of
+
+    {"user_id": ..., "history_contents": [...], "candidates": [{"id", "title", "body", ...}]}
+
+from a JSONL or Parquet file and ranks each user's candidates with any
+RecommenderFactory model:
+
+- the input is streamed in batches of ``--batch-size`` records; at most a
+  few batches per worker are in flight, so memory does not grow with the
+  input size
+- every worker process loads its own copy of the model and scores records
+  with the batched ``score_candidates`` path (chunked vectorization, field
+  weights, MMR); records without history are ordered by the cold-start
+  popularity prior, as in ``/api/score``, aged relative to the start of
+  the run (kept across resumes)
+- results keep the input order and are written as JSONL, or as Parquet
+  part files in an output directory
+- every ``--checkpoint-every`` records the output is flushed and a
+  checkpoint (``<output>.checkpoint.json``) records how far it got;
+  ``--resume`` drops output written after the last checkpoint and skips
+  the input records already scored
+- throughput (records and candidates per second) is printed at every
+  checkpoint
+
+A record that fails to score is written with an "error" field instead of
+stopping the run.
+
+Usage:
+    python bulk_scoring.py --input users.jsonl --output ranked.jsonl \\
+        [--algorithm tfidf] [--workers 4] [--top-k 50] [--resume]
+
+Author: DSAA2044 Team
+Date: December 2025
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import time
+from collections import deque
+from typing import Any, Dict, Iterator, List, Optional
+
+from base_recommender import RecommenderFactory
+from cold_start import candidate_priors
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - optional dependency
+    pa = None
+    pq = None
+
+PARQUET_EXTENSIONS = ('.parquet', '.pq')
+INPUT_COLUMNS = ['user_id', 'history_contents', 'candidates']
+
+# Set in every worker by the pool initializer
+_MODEL = None
+_OPTIONS = None
+
+
+def is_parquet(path: str) -> bool:
+    return path.lower().rstrip('/').endswith(PARQUET_EXTENSIONS)
+
+
+def read_records(path: str, skip: int = 0, batch_size: int = 1024) -> Iterator[Dict[str, Any]]:
+    """Stream the records of a JSONL or Parquet file, after the first ``skip``."""
+    if is_parquet(path):
+        if pq is None:
+            raise RuntimeError("pyarrow is required to read Parquet input")
+        parquet_file = pq.ParquetFile(path)
+        columns = [name for name in INPUT_COLUMNS if name in parquet_file.schema_arrow.names]
+        for batch in parquet_file.iter_batches(batch_size=batch_size, columns=columns):
+            if skip >= batch.num_rows:
+                skip -= batch.num_rows
+                continue
+            yield from batch.slice(skip).to_pylist()
+            skip = 0
+        return
+    
+    with open(path, 'r', encoding='utf-8') as f:
+        line_number = 0
+        for line in f:
+            line_number += 1
+            if not line.strip():
+                continue
+            if skip > 0:
+                skip -= 1
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{path}:{line_number}: invalid JSON ({e})") from None
+
+
+def batched(records: Iterator[Dict[str, Any]], batch_size: int) -> Iterator[List[Dict[str, Any]]]:
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def input_candidates(record: Dict[str, Any]) -> int:
+    """Number of candidates in an input record (before any --top-k cut)."""
+    candidates = record.get('candidates') if isinstance(record, dict) else None
+    return len(candidates) if isinstance(candidates, list) else 0
+
+
+def load_model(algorithm: str, models_dir: str, model_kwargs: Optional[Dict[str, Any]] = None):
+    """
+    Candidate-scoring model: legacy artifacts load lazily (scoring never
+    needs them), and there are no shard, vectorization or live-index workers.
+    """
+    kwargs = {
+        'legacy_artifacts': 'lazy',
+        'num_shards': 0,
+        'live_index_size': 0,
+        'vectorize_workers': 0
+    }
+    kwargs.update(model_kwargs or {})
+    model = RecommenderFactory.create_recommender(algorithm=algorithm, models_dir=models_dir, **kwargs)
+    model.load_model()
+    return model
+
+
+def score_record(model, record: Dict[str, Any], options: Dict[str, Any]) -> Dict[str, Any]:
+    """Ranked candidates of one record, best first (as /api/score returns them)."""
+    user_id = record.get('user_id')
+    history_contents = record.get('history_contents') or []
+    candidates = record.get('candidates') or []
+    if not isinstance(history_contents, list) or not isinstance(candidates, list):
+        raise ValueError("history_contents and candidates must be lists")
+    
+    top_k = options.get('top_k')
+    diversity = options.get('diversity', 0.0)
+    
+    if not history_contents:
+        priors = candidate_priors(candidates, options.get('half_life_days', 7.0), options.get('now'))
+        order = sorted(range(len(candidates)), key=lambda i: -priors[i])
+        scored = [
+            {'id': candidates[i].get('id', ''), 'similarity_score': 0.0, 'prior_score': float(priors[i])}
+            for i in order
+        ]
+    else:
+        scored = model.score_candidates(
+            history_contents,
+            candidates,
+            diversity=diversity,
+            top_k=top_k,
+            dedup_distance=options.get('dedup_distance')
+        )
+        # MMR results are already ordered
+        if not diversity:
+            scored = sorted(scored, key=lambda x: x['similarity_score'], reverse=True)
+    
+    if top_k:
+        scored = scored[:top_k]
+    return {'user_id': user_id, 'scored_candidates': scored}
+
+
+def _init_worker(algorithm: str, models_dir: str, model_kwargs: Dict[str, Any], options: Dict[str, Any]):
+    global _MODEL, _OPTIONS
+    _MODEL = load_model(algorithm, models_dir, model_kwargs)
+    _OPTIONS = options
+
+
+def _score_batch(records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Worker: score a batch of records; failures become error records."""
+    return score_batch(_MODEL, records, _OPTIONS)
+
+
+def score_batch(model, records: List[Dict[str, Any]], options: Dict[str, Any]) -> List[Dict[str, Any]]:
+    results = []
+    for record in records:
+        try:
+            results.append(score_record(model, record, options))
+        except Exception as e:
+            user_id = record.get('user_id') if isinstance(record, dict) else None
+            results.append({'user_id': user_id, 'scored_candidates': [], 'error': f"{type(e).__name__}: {e}"})
+    return results
+
+
+class JsonlWriter:
+    """Appends result lines; a checkpoint is the byte size after a flush."""
+    
+    def __init__(self, path: str, state: Optional[Dict[str, Any]] = None):
+        self.path = path
+        if state is not None:
+            # Drop lines written after the last checkpoint
+            with open(path, 'a', encoding='utf-8') as f:
+                f.truncate(state['output_bytes'])
+            self._file = open(path, 'a', encoding='utf-8')
+        else:
+            self._file = open(path, 'w', encoding='utf-8')
+    
+    def write(self, results: List[Dict[str, Any]]):
+        for result in results:
+            self._file.write(json.dumps(result) + '\n')
+    
+    def commit(self) -> Dict[str, Any]:
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        return {'output_bytes': self._file.tell()}
+    
+    def close(self):
+        self._file.close()
+
+
+class ParquetWriter:
+    """Buffers results and writes one part file per checkpoint."""
+    
+    def __init__(self, path: str, state: Optional[Dict[str, Any]] = None):
+        if pa is None:
+            raise RuntimeError("pyarrow is required to write Parquet output")
+        self.path = path
+        self.parts = state['output_parts'] if state is not None else 0
+        os.makedirs(path, exist_ok=True)
+        # Drop parts written after the last checkpoint (all of them on a fresh run)
+        for name in os.listdir(path):
+            if name.startswith('part-') and int(name[5:10]) >= self.parts:
+                os.remove(os.path.join(path, name))
+        self._rows = []
+    
+    def write(self, results: List[Dict[str, Any]]):
+        for result in results:
+            self._rows.append({
+                'user_id': None if result['user_id'] is None else str(result['user_id']),
+                'scored_candidates': [
+                    {
+                        'id': str(scored['id']),
+                        'similarity_score': float(scored['similarity_score']),
+                        'prior_score': scored.get('prior_score')
+                    }
+                    for scored in result['scored_candidates']
+                ],
+                'error': result.get('error')
+            })
+    
+    def commit(self) -> Dict[str, Any]:
+        if self._rows:
+            part_path = os.path.join(self.path, f'part-{self.parts:05d}.parquet')
+            pq.write_table(pa.Table.from_pylist(self._rows, schema=self.schema()), part_path)
+            self.parts += 1
+            self._rows = []
+        return {'output_parts': self.parts}
+    
+    @staticmethod
+    def schema():
+        return pa.schema([
+            ('user_id', pa.string()),
+            ('scored_candidates', pa.list_(pa.struct([
+                ('id', pa.string()),
+                ('similarity_score', pa.float64()),
+                ('prior_score', pa.float64())
+            ]))),
+            ('error', pa.string())
+        ])
+    
+    def close(self):
+        pass
+
+
+def checkpoint_path(output: str) -> str:
+    return output.rstrip('/') + '.checkpoint.json'
+
+
+def load_checkpoint(output: str) -> Optional[Dict[str, Any]]:
+    path = checkpoint_path(output)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_checkpoint(output: str, state: Dict[str, Any]):
+    """Write the checkpoint atomically (a crash leaves the previous one)."""
+    path = checkpoint_path(output)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def run(
+    input_path: str,
+    output_path: str,
+    algorithm: str = 'tfidf',
+    models_dir: str = 'models',
+    workers: int = 1,
+    batch_size: int = 64,
+    checkpoint_every: int = 10000,
+    resume: bool = False,
+    options: Optional[Dict[str, Any]] = None,
+    model_kwargs: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Score every record of ``input_path`` into ``output_path``.
+    
+    Returns the final checkpoint state (records, failed, candidates, ...).
+    """
+    options = options or {}
+    state = load_checkpoint(output_path)
+    if state is not None and not resume:
+        raise RuntimeError(f"{checkpoint_path(output_path)} exists; pass --resume or remove it")
+    if state is not None and state.get('input') != os.path.abspath(input_path):
+        raise RuntimeError(f"Checkpoint was written for {state.get('input')}")
+    
+    writer_class = ParquetWriter if is_parquet(output_path) else JsonlWriter
+    writer = writer_class(output_path, state)
+    if state is None:
+        state = {
+            'input': os.path.abspath(input_path),
+            'algorithm': algorithm,
+            'now': time.time(),
+            'records': 0,
+            'failed': 0,
+            'candidates': 0
+        }
+        state.update(writer.commit())
+        save_checkpoint(output_path, state)
+    else:
+        print(f"Resuming after {state['records']:,} records")
+    options = {**options, 'now': state['now']}
+    
+    # Candidates/s counts what was read, not what --top-k kept; batch
+    # results come back in input order, so the counts are a FIFO
+    batch_candidates = deque()
+    
+    def counted(batches):
+        for batch in batches:
+            batch_candidates.append(sum(input_candidates(record) for record in batch))
+            yield batch
+    
+    batches = counted(batched(read_records(input_path, skip=state['records']), batch_size))
+    pool = None
+    if workers > 1:
+        context = multiprocessing.get_context('fork' if 'fork' in multiprocessing.get_all_start_methods() else 'spawn')
+        pool = context.Pool(
+            processes=workers,
+            initializer=_init_worker,
+            initargs=(algorithm, models_dir, model_kwargs or {}, options)
+        )
+        results = _ordered_results(pool, batches, max_pending=2 * workers)
+    else:
+        model = load_model(algorithm, models_dir, model_kwargs)
+        results = (score_batch(model, batch, options) for batch in batches)
+    
+    start_time = time.time()
+    interval_start = start_time
+    interval_records = 0
+    run_records = 0
+    run_candidates = 0
+    since_checkpoint = 0
+    
+    def checkpoint():
+        nonlocal interval_start, interval_records, since_checkpoint
+        state.update(writer.commit())
+        save_checkpoint(output_path, state)
+        now = time.time()
+        print(
+            f"✓ {state['records']:,} records ({state['failed']:,} failed) | "
+            f"{interval_records / max(now - interval_start, 1e-9):,.0f} records/s, "
+            f"{run_candidates / max(now - start_time, 1e-9):,.0f} candidates/s"
+        )
+        interval_start = now
+        interval_records = 0
+        since_checkpoint = 0
+    
+    try:
+        for batch_results in results:
+            writer.write(batch_results)
+            num_candidates = batch_candidates.popleft()
+            state['records'] += len(batch_results)
+            state['failed'] += sum(1 for result in batch_results if 'error' in result)
+            state['candidates'] += num_candidates
+            run_records += len(batch_results)
+            run_candidates += num_candidates
+            interval_records += len(batch_results)
+            since_checkpoint += len(batch_results)
+            if since_checkpoint >= checkpoint_every:
+                checkpoint()
+        checkpoint()
+    finally:
+        writer.close()
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+    
+    elapsed = time.time() - start_time
+    print(f"✓ Scored {run_records:,} records in {elapsed:.1f}s "
+          f"({run_records / max(elapsed, 1e-9):,.0f} records/s)")
+    return state
+
+
+def _ordered_results(pool, batches, max_pending: int) -> Iterator[List[Dict[str, Any]]]:
+    """Batch results in input order, with at most ``max_pending`` batches queued."""
+    pending = deque()
+    for batch in batches:
+        pending.append(pool.apply_async(_score_batch, (batch,)))
+        if len(pending) >= max_pending:
+            yield pending.popleft().get()
+    while pending:
+        yield pending.popleft().get()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score (user, history, candidates) records offline")
+    parser.add_argument('--input', required=True, help='JSONL or Parquet file')
+    parser.add_argument('--output', required=True, help='JSONL file or Parquet directory (.parquet)')
+    parser.add_argument('--algorithm', default='tfidf')
+    parser.add_argument('--models-dir', default='models')
+    parser.add_argument('--workers', type=int, default=max(1, (os.cpu_count() or 2) - 1))
+    parser.add_argument('--batch-size', type=int, default=64, help='records per worker task')
+    parser.add_argument('--checkpoint-every', type=int, default=10000, help='records between checkpoints')
+    parser.add_argument('--resume', action='store_true', help='continue from the last checkpoint')
+    parser.add_argument('--top-k', type=int, default=None)
+    parser.add_argument('--diversity', type=float, default=0.0)
+    parser.add_argument('--dedup-distance', type=int, default=None)
+    parser.add_argument('--half-life-days', type=float, default=7.0, help='cold-start prior half-life')
+    parser.add_argument('--lsa-quantized', action='store_true')
+    args = parser.parse_args()
+    
+    try:
+        run(
+            args.input,
+            args.output,
+            algorithm=args.algorithm.lower(),
+            models_dir=args.models_dir,
+            workers=args.workers,
+            batch_size=args.batch_size,
+            checkpoint_every=args.checkpoint_every,
+            resume=args.resume,
+            options={
+                'top_k': args.top_k,
+                'diversity': args.diversity,
+                'dedup_distance': args.dedup_distance,
+                'half_life_days': args.half_life_days
+            },
+            model_kwargs={'quantized': True} if args.lsa_quantized and args.algorithm.lower() == 'lsa' else None
+        )
+    except (RuntimeError, ValueError) as e:
+        raise SystemExit(f"⚠ {e}")
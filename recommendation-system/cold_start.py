@@ -0,0 +1,248 @@
+"""
+Cold-Start Rankings
+===================
+Precomputed popularity / recency post lists for users without a usable history.
+
+A new user has no history, and a history of only unknown words vectorizes
+to nothing; a similarity scan is useless for both. Instead, ranked lists
+of corpus rows are built once at training time, globally and per
+subreddit, for three orders:
+
+- 'popular': f(score) = 1 + log(1 + max(score, 0))
+- 'recent':  created_utc
+- 'hot':     f(score) * 0.5 ^ (age_days / half_life_days)
+
+The 'hot' order is the blend prior with alpha = 0 (see score_blending). It
+can be precomputed because, in log space, the age term is
+``ln2 * created_utc / half_life`` minus a constant that depends only on
+"now", so the order does not change over time.
+
+Serving takes the first k accepted rows of a list (heap-merged across the
+requested subreddits), i.e. O(k) instead of a corpus scan.
+The API fields of every listed post are saved next to the lists
+(``cold_start_posts.pkl``), so a shard aggregator, which holds no posts,
+can serve cold-start requests too.
+candidate_priors() scores /api/score candidates with the same 'hot'
+formula from their own 'score' and 'created_utc' fields.
+
+Usage (add cold-start rankings to an existing models directory):
+    python cold_start.py --models-dir models [--half-life-days 7]
+
+Author: DSAA2044 Team
+Date: December 2025
+"""
+
+import argparse
+import heapq
+import os
+import pickle
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from score_blending import SECONDS_PER_DAY, PostPriors
+
+COLD_START_FILENAME = 'cold_start.npz'
+COLD_START_ORDERS = ('hot', 'popular', 'recent')
+COLD_START_POSTS_FILENAME = 'cold_start_posts.pkl'
+COLD_START_POST_FIELDS = ('id', 'title', 'combined_text', 'url', 'subreddit.name', 'score', 'created_utc')
+
+
+def _log_popularity(score: np.ndarray) -> np.ndarray:
+    return np.log1p(np.log1p(np.maximum(score, 0.0)))
+
+
+def order_keys(priors: PostPriors, half_life_days: float) -> Dict[str, np.ndarray]:
+    """Sort key (higher is better) of every post for each order."""
+    log_popularity = priors.log_popularity
+    created_utc = priors.created_utc
+    return {
+        'popular': log_popularity,
+        'recent': created_utc,
+        'hot': log_popularity + np.log(2.0) * created_utc / (half_life_days * SECONDS_PER_DAY)
+    }
+
+
+class ColdStartRankings:
+    """Per-order ranked row lists: one global and one per subreddit."""
+    
+    def __init__(self, arrays: Dict[str, np.ndarray]):
+        self.half_life_days = float(arrays['half_life_days'])
+        self.groups = {str(name): i for i, name in enumerate(arrays['groups'])}
+        self._arrays = arrays
+    
+    @classmethod
+    def build(
+        cls,
+        priors: PostPriors,
+        subreddits: Optional[np.ndarray] = None,
+        half_life_days: float = 7.0,
+        limit: int = 1000
+    ) -> 'ColdStartRankings':
+        """
+        Rank all posts by each order, keeping the best ``limit`` rows
+        globally and per subreddit (``subreddits``: name of every row).
+        """
+        num_rows = len(priors.created_utc)
+        rows = np.arange(num_rows, dtype=np.int64)
+        if subreddits is None:
+            subreddits = np.full(num_rows, 'unknown')
+        groups, codes = np.unique(np.asarray(subreddits, dtype=str), return_inverse=True)
+        
+        arrays = {'half_life_days': np.float64(half_life_days), 'groups': groups}
+        for order, keys in order_keys(priors, half_life_days).items():
+            # Best first, ties by row
+            ranked = np.lexsort((rows, -keys))
+            arrays[f'{order}_rows'] = ranked[:limit]
+            arrays[f'{order}_keys'] = keys[ranked[:limit]]
+            
+            # Same order within each subreddit: stable sort of the ranking by group
+            by_group = ranked[np.argsort(codes[ranked], kind='stable')]
+            starts = np.searchsorted(codes[by_group], np.arange(len(groups)))
+            stops = np.append(starts[1:], num_rows)
+            keep = np.concatenate([
+                by_group[start:min(stop, start + limit)] for start, stop in zip(starts, stops)
+            ]) if len(groups) else rows[:0]
+            lengths = np.minimum(stops - starts, limit)
+            arrays[f'{order}_group_rows'] = keep
+            arrays[f'{order}_group_keys'] = keys[keep]
+            arrays[f'{order}_group_offsets'] = np.concatenate(([0], np.cumsum(lengths)))
+        
+        return cls(arrays)
+    
+    def save(self, models_dir: str) -> str:
+        path = os.path.join(models_dir, COLD_START_FILENAME)
+        np.savez(path, **self._arrays)
+        return path
+    
+    @classmethod
+    def load(cls, models_dir: str) -> Optional['ColdStartRankings']:
+        """Load the rankings, or None if they have not been built."""
+        path = os.path.join(models_dir, COLD_START_FILENAME)
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as data:
+            return cls({name: data[name] for name in data.files})
+    
+    def top(
+        self,
+        order: str,
+        k: int,
+        subreddits: Optional[List[str]] = None,
+        accept: Optional[Callable[[int], bool]] = None
+    ) -> np.ndarray:
+        """
+        First ``k`` rows of the ``order`` ranking that pass ``accept``,
+        from the given subreddits (merged) or from all posts.
+        """
+        if subreddits:
+            offsets = self._arrays[f'{order}_group_offsets']
+            group_rows = self._arrays[f'{order}_group_rows']
+            group_keys = self._arrays[f'{order}_group_keys']
+            streams = []
+            for name in subreddits:
+                group = self.groups.get(name)
+                if group is not None:
+                    start, stop = offsets[group], offsets[group + 1]
+                    streams.append(zip((-group_keys[start:stop]).tolist(), group_rows[start:stop].tolist()))
+            candidates = (row for _, row in heapq.merge(*streams))
+        else:
+            candidates = self._arrays[f'{order}_rows'].tolist()
+        
+        selected = []
+        for row in candidates:
+            if len(selected) >= k:
+                break
+            if accept is None or accept(row):
+                selected.append(row)
+        return np.array(selected, dtype=np.int64)
+    
+    def rows(self) -> np.ndarray:
+        """Every row that appears in some list (sorted)."""
+        return np.unique(np.concatenate([
+            self._arrays[f'{order}_{kind}'] for order in COLD_START_ORDERS for kind in ('rows', 'group_rows')
+        ]))
+    
+    def save_posts(self, posts, models_dir: str) -> str:
+        """
+        Save the API fields of the listed rows of ``posts`` (a PostStore),
+        as {row: record} with the text cut to what the API returns.
+        """
+        rows = self.rows().tolist()
+        records = {}
+        for row, post in zip(rows, posts.rows(rows)):
+            record = {field: post[field] for field in COLD_START_POST_FIELDS if field in post}
+            if 'combined_text' in record:
+                record['combined_text'] = str(record['combined_text'])[:500]
+            records[row] = record
+        
+        path = os.path.join(models_dir, COLD_START_POSTS_FILENAME)
+        with open(path, 'wb') as f:
+            pickle.dump(records, f)
+        return path
+    
+    def describe(self) -> Dict[str, Any]:
+        return {
+            'orders': list(COLD_START_ORDERS),
+            'half_life_days': self.half_life_days,
+            'subreddits': len(self.groups),
+            'list_size': len(self._arrays['hot_rows'])
+        }
+
+
+def candidate_priors(
+    candidates: List[Dict[str, Any]],
+    half_life_days: float = 7.0,
+    now: Optional[float] = None
+) -> np.ndarray:
+    """
+    'hot' prior f(score) * decay(created_utc) of each candidate, from its
+    optional numeric 'score' and 'created_utc' fields (missing: f = 1,
+    decay = 1).
+    """
+    now = time.time() if now is None else now
+    
+    def number(candidate, field):
+        value = candidate.get(field) if isinstance(candidate, dict) else None
+        if isinstance(value, (int, float)) and not isinstance(value, bool) and np.isfinite(value):
+            return float(value)
+        return np.nan
+    
+    score = np.array([number(c, 'score') for c in candidates])
+    created = np.array([number(c, 'created_utc') for c in candidates])
+    log_prior = np.where(np.isnan(score), 0.0, _log_popularity(np.nan_to_num(score)))
+    age_days = np.maximum(now - created, 0.0) / SECONDS_PER_DAY
+    log_prior -= np.where(np.isnan(created), 0.0, np.log(2.0) * np.nan_to_num(age_days) / half_life_days)
+    return np.exp(log_prior)
+
+
+def load_cold_start_posts(models_dir: str) -> Optional[Dict[int, Dict[str, Any]]]:
+    """Records saved by ColdStartRankings.save_posts, or None."""
+    path = os.path.join(models_dir, COLD_START_POSTS_FILENAME)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build cold-start rankings for an existing model")
+    parser.add_argument('--models-dir', default='models')
+    parser.add_argument('--half-life-days', type=float, default=7.0)
+    parser.add_argument('--limit', type=int, default=1000)
+    args = parser.parse_args()
+    
+    from post_store import PostStore
+    
+    posts = PostStore.load(args.models_dir)
+    if posts is None:
+        raise SystemExit("processed_posts not found")
+    rankings = ColdStartRankings.build(
+        PostPriors.from_dataframe(posts.frame(['created_utc', 'score'])),
+        posts.column('subreddit.name').astype(str).to_numpy() if 'subreddit.name' in posts.columns else None,
+        half_life_days=args.half_life_days,
+        limit=args.limit
+    )
+    print(f"✓ Saved {rankings.save(args.models_dir)} ({rankings.describe()['subreddits']} subreddits)")
+    print(f"✓ Saved {rankings.save_posts(posts, args.models_dir)}")
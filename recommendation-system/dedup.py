@@ -0,0 +1,163 @@
+"""
+Near-Duplicate Detection
+========================
+MinHash signatures with LSH banding for collapsing reposts/crossposts.
+
+1. Each text is split into word shingles (k consecutive words)
+2. A MinHash signature of ``num_perm`` values estimates Jaccard similarity
+3. Signatures are cut into ``bands`` bands; texts sharing any band bucket
+   become candidate pairs
+4. Candidate pairs with estimated Jaccard >= threshold are merged into
+   clusters (union-find)
+
+Signatures are computed in parallel worker processes, which dominates the
+runtime; banding and clustering are linear in the number of posts.
+
+Author: DSAA2044 Team
+Date: December 2025
+"""
+
+import multiprocessing
+import os
+import zlib
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+
+import numpy as np
+
+# Mersenne prime 2^61 - 1 for the universal hash family
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+
+def _permutations(num_perm: int, seed: int):
+    """Coefficients (a, b) of the num_perm hash functions (a*x + b) mod p."""
+    rng = np.random.RandomState(seed)
+    a = rng.randint(1, 1 << 31, size=num_perm, dtype=np.int64).astype(np.uint64)
+    b = rng.randint(0, 1 << 31, size=num_perm, dtype=np.int64).astype(np.uint64)
+    return a, b
+
+
+def _shingle_hashes(text: str, shingle_size: int) -> np.ndarray:
+    """32-bit hashes of the word shingles of ``text``."""
+    words = text.split()
+    if len(words) <= shingle_size:
+        shingles = {' '.join(words)}
+    else:
+        shingles = {
+            ' '.join(words[i:i + shingle_size])
+            for i in range(len(words) - shingle_size + 1)
+        }
+    return np.fromiter(
+        (zlib.crc32(s.encode('utf-8')) for s in shingles),
+        dtype=np.uint64,
+        count=len(shingles)
+    )
+
+
+def _minhash_chunk(args) -> np.ndarray:
+    """Worker: MinHash signatures for a chunk of texts."""
+    texts, num_perm, shingle_size, seed = args
+    a, b = _permutations(num_perm, seed)
+    signatures = np.empty((len(texts), num_perm), dtype=np.uint64)
+    
+    for row, text in enumerate(texts):
+        hashes = _shingle_hashes(text, shingle_size)
+        # (shingles x permutations), then min over shingles
+        permuted = (np.outer(hashes, a) + b) % _MERSENNE_PRIME
+        signatures[row] = (permuted & _MAX_HASH).min(axis=0)
+    
+    return signatures
+
+
+def minhash_signatures(
+    texts: List[str],
+    num_perm: int = 128,
+    shingle_size: int = 3,
+    seed: int = 42,
+    n_jobs: Optional[int] = None,
+    chunk_size: int = 2000
+) -> np.ndarray:
+    """
+    Compute MinHash signatures for ``texts``, one row per text.
+    
+    Work is spread over ``n_jobs`` processes (default: all cores). Process
+    pools need the 'fork' start method here because the training script has
+    no ``__main__`` guard; without it signatures are computed serially.
+    """
+    n_jobs = n_jobs or os.cpu_count() or 1
+    chunks = [
+        (texts[i:i + chunk_size], num_perm, shingle_size, seed)
+        for i in range(0, len(texts), chunk_size)
+    ]
+    
+    if not chunks:
+        return np.empty((0, num_perm), dtype=np.uint64)
+    
+    if n_jobs > 1 and len(chunks) > 1 and 'fork' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('fork')
+        with ProcessPoolExecutor(max_workers=n_jobs, mp_context=context) as executor:
+            parts = list(executor.map(_minhash_chunk, chunks))
+    else:
+        parts = [_minhash_chunk(chunk) for chunk in chunks]
+    
+    return np.vstack(parts)
+
+
+def find_duplicate_clusters(
+    signatures: np.ndarray,
+    bands: int = 16,
+    threshold: float = 0.8
+) -> np.ndarray:
+    """
+    Cluster near-duplicate rows with LSH banding.
+    
+    Parameters:
+    -----------
+    signatures : np.ndarray
+        MinHash signatures, shape (n, num_perm); num_perm must be divisible
+        by ``bands``
+    bands : int
+        Number of LSH bands (rows per band = num_perm / bands)
+    threshold : float
+        Minimum estimated Jaccard similarity for two rows to be merged
+    
+    Returns:
+    --------
+    np.ndarray
+        Cluster label per row (the smallest row index in its cluster)
+    """
+    n, num_perm = signatures.shape
+    if num_perm % bands:
+        raise ValueError(f"num_perm ({num_perm}) must be divisible by bands ({bands})")
+    rows_per_band = num_perm // bands
+    
+    parent = np.arange(n)
+    
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+    
+    for band in range(bands):
+        band_slice = signatures[:, band * rows_per_band:(band + 1) * rows_per_band]
+        buckets = defaultdict(list)
+        for row in range(n):
+            buckets[band_slice[row].tobytes()].append(row)
+        
+        for members in buckets.values():
+            if len(members) < 2:
+                continue
+            first = members[0]
+            for other in members[1:]:
+                root_a, root_b = find(first), find(other)
+                if root_a == root_b:
+                    continue
+                # Verify the candidate pair on the full signature
+                similarity = np.mean(signatures[first] == signatures[other])
+                if similarity >= threshold:
+                    parent[max(root_a, root_b)] = min(root_a, root_b)
+    
+    return np.array([find(row) for row in range(n)])
@@ -0,0 +1,83 @@
+"""
+Diversity Re-ranking
+====================
+Maximal Marginal Relevance (MMR) over sparse TF-IDF (or dense LSA) vectors.
+
+MMR picks items one at a time, trading relevance against similarity to the
+items already picked:
+
+    mmr(i) = (1 - diversity) * relevance(i) - diversity * max_sim(i, selected)
+
+max_sim is kept as a running array and updated with one sparse
+matrix-vector product per pick, so selecting k of n candidates costs
+O(k * n) sparse dot products instead of O(k^2 * n).
+
+Author: DSAA2044 Team
+Date: December 2025
+"""
+
+from typing import Optional
+
+import numpy as np
+from scipy.sparse import issparse
+from sklearn.preprocessing import normalize
+
+
+def mmr_rerank(
+    relevance: np.ndarray,
+    vectors,
+    k: Optional[int] = None,
+    diversity: float = 0.5
+) -> np.ndarray:
+    """
+    Select and order up to k candidates by maximal marginal relevance.
+    
+    Parameters:
+    -----------
+    relevance : np.ndarray
+        Relevance score of each candidate (e.g. cosine to the user profile)
+    vectors : scipy.sparse matrix or np.ndarray
+        One row per candidate, aligned with ``relevance``
+    k : int, optional
+        Number of candidates to select (default: all)
+    diversity : float
+        Lambda in [0, 1]; 0 is pure relevance, 1 is pure novelty
+    
+    Returns:
+    --------
+    np.ndarray
+        Positions into ``relevance`` in selection order
+    """
+    relevance = np.asarray(relevance, dtype=np.float64)
+    n = len(relevance)
+    k = n if k is None else min(k, n)
+    
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    
+    if diversity <= 0.0:
+        return np.argsort(-relevance, kind='stable')[:k]
+    
+    # Unit rows make the dot product a cosine similarity
+    vectors = normalize(vectors, norm='l2', copy=True)
+    if issparse(vectors):
+        vectors = vectors.tocsr()
+    
+    max_sim = np.zeros(n, dtype=np.float64)
+    available = np.ones(n, dtype=bool)
+    selected = np.empty(k, dtype=np.int64)
+    
+    for step in range(k):
+        mmr = (1.0 - diversity) * relevance - diversity * max_sim
+        mmr[~available] = -np.inf
+        pick = int(np.argmax(mmr))
+        
+        selected[step] = pick
+        available[pick] = False
+        
+        if step + 1 < k:
+            sims = vectors @ vectors[pick].T
+            sims = (sims.toarray() if issparse(sims) else np.asarray(sims)).ravel()
+            np.maximum(max_sim, sims, out=max_sim)
+    
+    return selected
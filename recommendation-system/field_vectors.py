@@ -0,0 +1,140 @@
+"""
+Field Vectors
+=============
+Per-field (title, body) candidate vectors with an LRU cache.
+
+By default a candidate is vectorized as one text, ``"{title} {title} {body}"``,
+the same text the corpus vectors and training used, and that vector is
+cached by a digest of the text.
+
+With field weights (per model or per request), title and body are instead
+vectorized separately, each vector is cached by a digest of its field
+text, and the fields are combined at scoring time:
+
+    vector = normalize(sum(weight[field] * field_vector))
+
+Changing the weights therefore costs no re-vectorization, and a post seen
+again, or one whose body is unchanged, reuses the cached vectors. This is
+not the combined text with other repetition counts: each field vector is
+already L2-normalized (and n-grams do not span the two fields), so a field
+contributes its weight's share of the direction whatever its length. A
+short title weighted 2 outweighs a long body far more than it does in the
+combined text, so rankings differ from the default; weights are an
+explicit opt-in for clients that want that field balance.
+
+scipy and scikit-learn are imported where they are used, so importing
+validate_field_weights (the API does at startup) stays cheap.
+
+Author: DSAA2044 Team
+Date: December 2025
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+FIELDS = ('title', 'body')
+# Cache key of combined-text vectors (no field weights)
+COMBINED_FIELD = 'combined'
+
+
+def combined_text(title: str, body: str) -> str:
+    """The single text a candidate is vectorized as without field weights."""
+    return f"{title} {title} {body}"
+
+
+def validate_field_weights(field_weights: Any) -> Optional[str]:
+    """Return an error message for invalid field weights, or None."""
+    if not isinstance(field_weights, dict):
+        return 'field_weights must be an object'
+    for field, weight in field_weights.items():
+        if field not in FIELDS:
+            return f'Unknown field in field_weights: {field}'
+        if not isinstance(weight, (int, float)) or isinstance(weight, bool) or weight < 0:
+            return f'field_weights.{field} must be a non-negative number'
+    if not any(field_weights.get(field, 0) > 0 for field in FIELDS):
+        return 'At least one field weight must be positive'
+    return None
+
+
+class FieldVectorCache:
+    """LRU cache of single-field vectors keyed by field name and text digest."""
+    
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def key(field: str, text: str) -> bytes:
+        return field.encode() + b':' + hashlib.blake2b(text.encode('utf-8', 'replace'), digest_size=16).digest()
+    
+    def vectors(
+        self,
+        field: str,
+        texts: List[str],
+        vectorize: Callable[[List[str]], Any]
+    ):
+        """
+        Vectors of ``texts`` (one row each), computing only the uncached
+        ones with ``vectorize`` in one batch.
+        """
+        from scipy.sparse import issparse, vstack
+        
+        keys = [self.key(field, text) for text in texts]
+        rows = [None] * len(texts)
+        with self._lock:
+            for i, key in enumerate(keys):
+                row = self._entries.get(key)
+                if row is not None:
+                    self._entries.move_to_end(key)
+                    rows[i] = row
+        
+        missing = [i for i, row in enumerate(rows) if row is None]
+        if missing:
+            # Duplicate texts within the request are vectorized once
+            unique = list(dict.fromkeys(texts[i] for i in missing))
+            computed = vectorize(unique)
+            # Copies, so cached rows do not pin the whole batch in memory
+            by_text = {text: computed[j:j + 1].copy() for j, text in enumerate(unique)}
+            for i in missing:
+                rows[i] = by_text[texts[i]]
+            
+            with self._lock:
+                for i in missing:
+                    self._entries[keys[i]] = rows[i]
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        
+        with self._lock:
+            self.hits += len(texts) - len(missing)
+            self.misses += len(missing)
+        
+        return vstack(rows).tocsr() if issparse(rows[0]) else np.vstack(rows)
+    
+    def describe(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+
+def combine_fields(field_vectors: Dict[str, Any], field_weights: Dict[str, float]):
+    """L2-normalized weighted sum of per-field vector matrices."""
+    from sklearn.preprocessing import normalize
+    
+    combined = None
+    for field, vectors in field_vectors.items():
+        weight = field_weights.get(field, 0.0)
+        if weight <= 0:
+            continue
+        combined = vectors * weight if combined is None else combined + vectors * weight
+    return normalize(combined)
@@ -0,0 +1,474 @@
+"""
+Hybrid Recommender
+==================
+Runs several recommenders concurrently and fuses their scores.
+
+Each request is submitted to every component (e.g. TF-IDF and LSA) on a
+shared thread pool; the scoring work is numpy/scipy code that releases the
+GIL, so components overlap. The hybrid waits at most ``latency_budget_ms``:
+components that miss the budget (or fail) are dropped from this request's
+fusion instead of delaying the response. Only if no component finished in
+time does it wait for the first one. A request's RequestBudget shortens the
+wait to its remaining time.
+
+Components get a budget that expires with the wait, so a component that
+misses it stops at the next deadline check instead of scoring on for a
+response that will not use it. Calls not yet started when the wait ends
+are cancelled, and a component with ``max_in_flight`` calls still running
+is skipped for new requests rather than queueing them behind its
+stragglers.
+
+Components share the primary (first) component's posts, priors and
+cold-start rankings, and only the primary keeps a live index and the
+neighbor graph: recommend_live, ingest_candidates and similar_posts are
+served by it alone.
+
+Fusion:
+- 'weighted': sum of weight * score over the components that answered,
+  divided by the sum of their weights (a post missing from a component's
+  list counts as 0 for it)
+- 'rrf': reciprocal-rank fusion, sum of weight / (rrf_k + rank)
+
+Author: DSAA2044 Team
+Date: December 2025
+"""
+
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from base_recommender import BaseRecommender, RecommenderFactory
+from diversity import mmr_rerank
+from request_budget import RequestBudget
+from simhash import dedup_candidates
+
+FUSION_METHODS = ('weighted', 'rrf')
+
+
+class HybridRecommender(BaseRecommender):
+    """
+    Latency-budgeted fusion of several sub-recommenders.
+    """
+    
+    def __init__(
+        self,
+        models_dir: str = 'models',
+        components: Sequence[str] = ('tfidf', 'lsa'),
+        weights: Optional[Sequence[float]] = None,
+        fusion: str = 'weighted',
+        rrf_k: int = 60,
+        latency_budget_ms: float = 250.0,
+        fusion_pool_factor: int = 3,
+        max_workers: Optional[int] = None,
+        max_in_flight: int = 4,
+        component_kwargs: Optional[Dict[str, Dict[str, Any]]] = None,
+        **kwargs
+    ):
+        """
+        ``components`` are RecommenderFactory algorithm names, fused with
+        ``weights`` (default: equal). ``kwargs`` are passed to every
+        component, ``component_kwargs[name]`` only to that one. Each
+        component returns ``fusion_pool_factor`` times top_k posts so the
+        fused ranking has overlap to work with.
+        """
+        super().__init__(models_dir)
+        if fusion not in FUSION_METHODS:
+            raise ValueError(f"Unknown fusion method: {fusion}")
+        if 'hybrid' in components or not components:
+            raise ValueError("Hybrid components must be non-hybrid algorithms")
+        # Components are keyed by name, and the others share the primary's posts
+        if len(set(components)) != len(components):
+            raise ValueError("Hybrid components must be distinct")
+        
+        weights = list(weights) if weights is not None else [1.0] * len(components)
+        if len(weights) != len(components):
+            raise ValueError("Need one weight per hybrid component")
+        
+        self.component_names = list(components)
+        self.weights = dict(zip(self.component_names, weights))
+        self.fusion = fusion
+        self.rrf_k = rrf_k
+        self.latency_budget_ms = latency_budget_ms
+        self.fusion_pool_factor = fusion_pool_factor
+        
+        component_kwargs = component_kwargs or {}
+        self.components = {
+            name: RecommenderFactory.create_recommender(
+                algorithm=name,
+                models_dir=models_dir,
+                **{**kwargs, **component_kwargs.get(name, {})}
+            )
+            for name in self.component_names
+        }
+        
+        for name in self.component_names[1:]:
+            component = self.components[name]
+            if hasattr(component, 'post_artifacts_from'):
+                component.post_artifacts_from = self.primary
+            if getattr(component, 'live_index', None) is not None:
+                component.live_index = None
+        
+        # Shared by all requests; at most max_in_flight calls per component
+        self.max_in_flight = max_in_flight
+        self._in_flight = {name: 0 for name in self.component_names}
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or max_in_flight * len(self.components),
+            thread_name_prefix='hybrid'
+        )
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            name: {'completed': 0, 'timed_out': 0, 'failed': 0, 'busy': 0, 'last_ms': None}
+            for name in self.component_names
+        }
+    
+    @property
+    def primary(self) -> BaseRecommender:
+        """First component; serves the calls that are not fused."""
+        return self.components[self.component_names[0]]
+    
+    @property
+    def legacy_state(self) -> Optional[str]:
+        return getattr(self.primary, 'legacy_state', None)
+    
+    # Served by the primary alone; pagination would need fused cursors
+    @property
+    def supports_similar_posts(self) -> bool:
+        return self.primary.supports_similar_posts
+    
+    @property
+    def supports_live_index(self) -> bool:
+        return self.primary.supports_live_index
+    
+    @property
+    def supports_profiles(self) -> bool:
+        return self.primary.supports_profiles
+    
+    def load_model(self):
+        """Load all components concurrently."""
+        print(f"Loading hybrid recommender: {', '.join(self.component_names)}...")
+        futures = [
+            self._executor.submit(component.load_model)
+            for component in self.components.values()
+        ]
+        for future in futures:
+            future.result()
+        self.is_loaded = True
+        print(f"✓ Hybrid recommender loaded ({self.fusion} fusion, "
+              f"{self.latency_budget_ms:.0f} ms budget)")
+    
+    def warm_up(self):
+        for component in self.components.values():
+            component.warm_up()
+    
+    def _run_components(
+        self,
+        method: str,
+        *args,
+        budget: Optional[RequestBudget] = None,
+        **kwargs
+    ) -> Dict[str, Any]:
+        """
+        Call ``method`` on every component concurrently and return the
+        results of those that finished within the latency budget (or the
+        request deadline, if sooner). Components still busy with
+        max_in_flight earlier calls are skipped, unless all of them are.
+        """
+        started = time.perf_counter()
+        timeout = self.latency_budget_ms / 1000.0
+        if budget is not None and budget.remaining_seconds() is not None:
+            timeout = min(timeout, budget.remaining_seconds())
+        component_budget = RequestBudget(timeout * 1000.0)
+        kwargs['budget'] = component_budget
+        
+        def timed_call(name):
+            result = getattr(self.components[name], method)(*args, **kwargs)
+            return result, (time.perf_counter() - started) * 1000.0
+        
+        def finished(name):
+            with self._stats_lock:
+                self._in_flight[name] -= 1
+        
+        with self._stats_lock:
+            names = [name for name in self.component_names if self._in_flight[name] < self.max_in_flight]
+            names = names or self.component_names
+            for name in names:
+                self._in_flight[name] += 1
+        for name in self.component_names:
+            if name not in names:
+                self._record(name, 'busy')
+                if budget is not None:
+                    budget.mark_degraded('component_busy')
+        
+        futures = {}
+        for name in names:
+            future = self._executor.submit(timed_call, name)
+            future.add_done_callback(lambda _, name=name: finished(name))
+            futures[future] = name
+        done, pending = wait(futures, timeout=timeout)
+        if not done:
+            # Nobody made the budget: take whichever finishes first (the
+            # components stop at their own deadline checks by now)
+            done, pending = wait(futures, return_when=FIRST_COMPLETED)
+        
+        results = {}
+        for future, name in futures.items():
+            if future in pending:
+                future.cancel()
+                self._record(name, 'timed_out')
+                if budget is not None:
+                    budget.mark_degraded('component_timeout')
+                continue
+            
+            error = future.exception()
+            if error is not None:
+                print(f"⚠ Hybrid component {name} failed: {error}")
+                self._record(name, 'failed')
+                continue
+            
+            result, elapsed_ms = future.result()
+            self._record(name, 'completed', elapsed_ms)
+            results[name] = result
+        
+        if not results:
+            raise RuntimeError("All hybrid components failed")
+        if budget is not None:
+            for reason in component_budget.reasons:
+                budget.mark_degraded(reason)
+        return results
+    
+    def _record(self, name: str, outcome: str, elapsed_ms: Optional[float] = None):
+        with self._stats_lock:
+            self._stats[name][outcome] += 1
+            if elapsed_ms is not None:
+                self._stats[name]['last_ms'] = round(elapsed_ms, 2)
+    
+    def _fuse(self, ranked_lists: Dict[str, List[Tuple[str, float]]]) -> Dict[str, float]:
+        """Fused score per id from each component's (id, score) list, best first."""
+        fused = {}
+        if self.fusion == 'rrf':
+            for name, ranked in ranked_lists.items():
+                weight = self.weights[name]
+                for rank, (item_id, _) in enumerate(ranked, 1):
+                    fused[item_id] = fused.get(item_id, 0.0) + weight / (self.rrf_k + rank)
+            return fused
+        
+        total_weight = sum(self.weights[name] for name in ranked_lists) or 1.0
+        for name, ranked in ranked_lists.items():
+            weight = self.weights[name] / total_weight
+            for item_id, score in ranked:
+                fused[item_id] = fused.get(item_id, 0.0) + weight * score
+        return fused
+    
+    def recommend_from_history(
+        self,
+        history_contents: List[str],
+        top_k: int = 10,
+        min_score: float = 0.0,
+        exclude_ids: List[str] = None,
+        diversity: float = 0.0,
+        blend: Optional[Dict[str, float]] = None,
+        subreddits: Optional[List[str]] = None,
+        exclude_subreddits: Optional[List[str]] = None,
+        history_counts: Optional[Tuple[np.ndarray, np.ndarray]] = None,
+        budget: Optional[RequestBudget] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Fused recommendations from the components that met the budget.
+        
+        Each post's 'similarity_score' is the fused score; the scores of the
+        individual components are in 'component_scores'. With diversity > 0
+        the fused pool is re-ranked with MMR over the primary component's
+        vectors of the posts, as in score_candidates.
+        """
+        if not self.is_loaded:
+            raise RuntimeError("Model not loaded. Call load_model() first.")
+        
+        results = self._run_components(
+            'recommend_from_history',
+            history_contents,
+            top_k=top_k * self.fusion_pool_factor,
+            min_score=min_score,
+            exclude_ids=exclude_ids,
+            diversity=0.0,
+            blend=blend,
+            subreddits=subreddits,
+            exclude_subreddits=exclude_subreddits,
+            history_counts=history_counts,
+            budget=budget
+        )
+        return self._fuse_posts(results, top_k, diversity)
+    
+    def recommend_live(
+        self,
+        history_contents: List[str],
+        top_k: int = 10,
+        min_score: float = 0.0,
+        exclude_ids: List[str] = None,
+        diversity: float = 0.0,
+        history_counts: Optional[Tuple[np.ndarray, np.ndarray]] = None,
+        budget: Optional[RequestBudget] = None
+    ) -> List[Dict[str, Any]]:
+        """Recommendations from the primary component's live index (the only one)."""
+        if not self.is_loaded:
+            raise RuntimeError("Model not loaded. Call load_model() first.")
+        
+        return self.primary.recommend_live(
+            history_contents,
+            top_k=top_k,
+            min_score=min_score,
+            exclude_ids=exclude_ids,
+            diversity=diversity,
+            history_counts=history_counts,
+            budget=budget
+        )
+    
+    def _fuse_posts(
+        self,
+        results: Dict[str, List[Dict[str, Any]]],
+        top_k: int,
+        diversity: float = 0.0
+    ) -> List[Dict[str, Any]]:
+        """
+        Fuse the components' ranked post lists into the top_k posts, picked
+        from the whole fused pool by MMR when diversity > 0.
+        """
+        posts = {}
+        component_scores = {}
+        ranked_lists = {}
+        for name, recommendations in results.items():
+            ranked = []
+            for post in recommendations:
+                score = post.get('blended_score', post['similarity_score'])
+                ranked.append((post['id'], score))
+                posts.setdefault(post['id'], post)
+                component_scores.setdefault(post['id'], {})[name] = post['similarity_score']
+            ranked_lists[name] = ranked
+        
+        fused = self._fuse(ranked_lists)
+        top_ids = sorted(fused, key=fused.get, reverse=True)
+        if diversity > 0.0 and top_ids:
+            vectors = self.primary.candidate_vectors([
+                {'title': posts[post_id].get('title', ''), 'body': posts[post_id].get('text', '')}
+                for post_id in top_ids
+            ])
+            scores = np.array([fused[post_id] for post_id in top_ids])
+            order = mmr_rerank(scores, vectors, k=min(top_k, len(top_ids)), diversity=diversity)
+            top_ids = [top_ids[i] for i in order]
+        else:
+            top_ids = top_ids[:top_k]
+        
+        return [
+            {
+                **posts[post_id],
+                'similarity_score': float(fused[post_id]),
+                'component_scores': component_scores[post_id]
+            }
+            for post_id in top_ids
+        ]
+    
+    def score_candidates(
+        self,
+        history_contents: List[str],
+        candidates: List[Dict[str, Any]],
+        diversity: float = 0.0,
+        top_k: Optional[int] = None,
+        history_counts: Optional[Tuple[np.ndarray, np.ndarray]] = None,
+        budget: Optional[RequestBudget] = None,
+        ingest: bool = False,
+        field_weights: Optional[Dict[str, float]] = None,
+        dedup_distance: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Fused candidate scores from the components that met the budget.
+        
+        With diversity > 0 the fused scores are re-ranked with MMR over the
+        primary component's candidate vectors. With ``ingest`` the
+        primary component adds the candidates to its live index.
+        ``dedup_distance`` collapses near-duplicates by the fused scores,
+        with fingerprints from the primary component's vectors.
+        """
+        if not self.is_loaded:
+            raise RuntimeError("Model not loaded. Call load_model() first.")
+        
+        if not candidates:
+            return []
+        
+        results = self._run_components(
+            'score_candidates',
+            history_contents,
+            candidates,
+            history_counts=history_counts,
+            budget=budget,
+            ingest=ingest,
+            field_weights=field_weights
+        )
+        
+        ranked_lists = {}
+        for name, scored in results.items():
+            # Components return candidates in input order; rank by score
+            ranked = [(position, item['similarity_score']) for position, item in enumerate(scored)]
+            ranked.sort(key=lambda item: item[1], reverse=True)
+            ranked_lists[name] = ranked
+        
+        fused = self._fuse(ranked_lists)
+        scores = np.array([fused.get(position, 0.0) for position in range(len(candidates))])
+        
+        keep = np.arange(len(candidates))
+        duplicates = {}
+        vectors = None
+        if diversity > 0.0 or dedup_distance is not None:
+            vectors = self.primary.candidate_vectors(candidates, field_weights)
+        if dedup_distance is not None:
+            keep, duplicates = dedup_candidates(vectors, scores, dedup_distance)
+        
+        if diversity > 0.0:
+            order = keep[mmr_rerank(scores[keep], vectors[keep], k=top_k, diversity=diversity)]
+        else:
+            order = keep
+        
+        results = []
+        for i in order:
+            result = {
+                'id': candidates[i].get('id', ''),
+                'similarity_score': float(scores[i])
+            }
+            if i in duplicates:
+                result['duplicate_ids'] = [candidates[j].get('id', '') for j in duplicates[i]]
+            results.append(result)
+        return results
+    
+    def ingest_candidates(self, candidates: List[Dict[str, Any]]) -> int:
+        """Add candidates to the primary component's live index."""
+        return self.primary.ingest_candidates(candidates)
+    
+    def history_term_counts(self, history_contents: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Profiles are kept in the primary component's vocabulary."""
+        return self.primary.history_term_counts(history_contents)
+    
+    def similar_posts(self, post_id: str, top_k: int = 10) -> List[Dict[str, Any]]:
+        return self.primary.similar_posts(post_id, top_k=top_k)
+    
+    def get_model_info(self) -> Dict[str, Any]:
+        """Return model metadata."""
+        if not self.is_loaded:
+            raise RuntimeError("Model not loaded.")
+        
+        with self._stats_lock:
+            stats = {name: dict(values) for name, values in self._stats.items()}
+        
+        return {
+            'algorithm': 'Hybrid',
+            'fusion': self.fusion,
+            'weights': self.weights,
+            'latency_budget_ms': self.latency_budget_ms,
+            'components': {
+                name: {
+                    **component.get_model_info(),
+                    'stats': stats[name]
+                }
+                for name, component in self.components.items()
+            }
+        }
@@ -0,0 +1,139 @@
+"""
+Multi-Interest Profiles
+=======================
+Cluster a user's per-item history vectors into a few interest centroids.
+
+Collapsing the whole history into one vector averages distinct interests
+away: a user who reads both cooking and Rust posts ends up with a profile
+that matches neither well. Instead, history items are clustered online in
+one pass (leader clustering, bounded by ``max_interests``):
+
+- an item joins the most similar centroid if the cosine similarity is at
+  least ``threshold``, or if all ``max_interests`` centroids exist
+- otherwise it starts a new centroid
+
+Centroid sums are kept dense, so each step is a gather over the item's
+non-zero terms; the result is returned as L2-normalized rows in the same
+format (sparse or dense) as the input.
+
+Candidates are then scored against all M centroids in one M x candidates
+product and the per-centroid similarities pooled with
+pool_interest_scores: the max, or a softmax-weighted mean that favours the
+best-matching interest.
+
+Author: DSAA2044 Team
+Date: December 2025
+"""
+
+from typing import Optional, Tuple
+
+import numpy as np
+from scipy.sparse import csr_matrix, issparse
+
+POOLING_METHODS = ('max', 'softmax')
+
+
+def cluster_interests(
+    item_vectors,
+    max_interests: int = 4,
+    threshold: float = 0.3
+) -> Optional[Tuple[object, np.ndarray]]:
+    """
+    Online clustering of L2-normalized item vectors.
+    
+    Parameters:
+    -----------
+    item_vectors : scipy.sparse matrix or np.ndarray
+        One row per history item (all-zero rows are ignored)
+    max_interests : int
+        Maximum number of centroids
+    threshold : float
+        Minimum cosine similarity to join an existing centroid while new
+        centroids can still be started
+    
+    Returns:
+    --------
+    (centroids, counts) or None
+        L2-normalized centroid rows (csr_matrix for sparse input, float32
+        array otherwise) and the number of items in each; None if every
+        item vector is empty
+    """
+    sparse = issparse(item_vectors)
+    if sparse:
+        item_vectors = csr_matrix(item_vectors)
+    
+    sums = np.zeros((max_interests, item_vectors.shape[1]))
+    squared_norms = np.zeros(max_interests)
+    norms = np.zeros(max_interests)
+    counts = np.zeros(max_interests, dtype=np.int64)
+    num_centroids = 0
+    
+    for row in range(item_vectors.shape[0]):
+        if sparse:
+            start, stop = item_vectors.indptr[row], item_vectors.indptr[row + 1]
+            columns = item_vectors.indices[start:stop]
+            values = item_vectors.data[start:stop]
+            if not values.any():
+                continue
+        else:
+            values = np.asarray(item_vectors[row], dtype=np.float64)
+            if not values.any():
+                continue
+        
+        best = 0
+        best_similarity = -np.inf
+        dot = 0.0
+        if num_centroids:
+            if sparse:
+                dots = sums[:num_centroids, columns] @ values
+            else:
+                dots = sums[:num_centroids] @ values
+            similarities = dots / norms[:num_centroids]
+            best = int(np.argmax(similarities))
+            best_similarity = similarities[best]
+            dot = dots[best]
+        
+        if best_similarity < threshold and num_centroids < max_interests:
+            best = num_centroids
+            num_centroids += 1
+            dot = 0.0
+        
+        if sparse:
+            sums[best, columns] += values
+        else:
+            sums[best] += values
+        # |s + v|^2 = |s|^2 + 2 s.v + |v|^2: no pass over the whole centroid
+        squared_norms[best] += 2.0 * dot + values @ values
+        norms[best] = np.sqrt(max(squared_norms[best], 0.0))
+        counts[best] += 1
+    
+    if num_centroids == 0:
+        return None
+    
+    centroids = sums[:num_centroids] / norms[:num_centroids, None]
+    if sparse:
+        return csr_matrix(centroids), counts[:num_centroids]
+    return centroids.astype(np.float32), counts[:num_centroids]
+
+
+def pool_interest_scores(
+    similarities: np.ndarray,
+    method: str = 'max',
+    temperature: float = 0.1
+) -> np.ndarray:
+    """
+    Combine per-centroid similarities (M x n) into one score per column.
+    
+    'max' takes the best centroid; 'softmax' weights each centroid's
+    similarity by softmax(similarity / temperature) over the centroids.
+    """
+    similarities = np.asarray(similarities)
+    if similarities.shape[0] == 1:
+        return similarities[0]
+    if method == 'max':
+        return similarities.max(axis=0)
+    
+    logits = similarities / temperature
+    weights = np.exp(logits - logits.max(axis=0))
+    weights /= weights.sum(axis=0)
+    return (weights * similarities).sum(axis=0)
@@ -0,0 +1,234 @@
+"""
+Live Index
+==========
+Sliding-window in-memory index of recently seen Lemmy posts.
+
+The training corpus is a static Reddit dump, while the posts users actually
+see are live Lemmy posts passing through ``/api/score`` (or pushed to
+``/api/candidates/ingest``). Their vectors are already computed for
+scoring, so they are kept here and ``/api/recommend`` can retrieve from
+this fresh pool without retraining.
+
+Posts are stored in ingest batches, oldest first: each batch holds its
+ids, post metadata (everything but the body) and one vector matrix. This
+makes expiry cheap:
+- by age: whole batches older than ``max_age_seconds`` are dropped
+- by size: the oldest rows are retired until at most ``max_items`` live
+  rows remain
+Re-ingesting a known id retires its old row and refreshes its age. Batches
+whose rows are all dead are dropped wherever they are, and a batch that is
+more than COMPACT_DEAD_FRACTION dead is rewritten with its live rows only,
+so steady re-ingestion of the same posts does not pile up dead vectors.
+
+Search scans the batches newest first, checking an optional RequestBudget
+between batches, and selects the top-k with the same local_top_k used by
+the corpus shards.
+
+Author: DSAA2044 Team
+Date: December 2025
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from scipy.sparse import issparse, vstack
+from sklearn.metrics.pairwise import cosine_similarity
+
+from request_budget import RequestBudget
+from sharded_scoring import local_top_k
+
+# Dead fraction above which a batch is rewritten with its live rows only
+COMPACT_DEAD_FRACTION = 0.5
+
+
+class _Batch:
+    """Posts ingested together: ids, metadata, vectors and a liveness mask."""
+    
+    __slots__ = ('ingested_at', 'ids', 'posts', 'vectors', 'alive', 'live')
+    
+    def __init__(self, ingested_at: float, ids: List[str], posts: List[Dict[str, Any]], vectors):
+        self.ingested_at = ingested_at
+        self.ids = ids
+        self.posts = posts
+        self.vectors = vectors
+        self.alive = np.ones(len(ids), dtype=bool)
+        self.live = len(ids)
+
+
+class LiveIndex:
+    """
+    Age- and size-bounded pool of candidate vectors, searchable by a
+    history vector.
+    """
+    
+    def __init__(self, max_items: int = 50000, max_age_seconds: float = 86400.0):
+        self.max_items = max_items
+        self.max_age_seconds = max_age_seconds
+        self._batches = []
+        self._rows = {}  # id -> (batch, row) of its live row
+        self._count = 0
+        self._lock = threading.Lock()
+        self._ingested = 0
+        self._expired = 0
+    
+    def __len__(self) -> int:
+        return self._count
+    
+    def add(self, posts: List[Dict[str, Any]], vectors, now: Optional[float] = None) -> int:
+        """
+        Add posts (dicts with at least 'id') with their vectors, one row
+        each. Posts without an id are skipped. Returns the number added.
+        """
+        now = time.time() if now is None else now
+        keep = [i for i, post in enumerate(posts) if post.get('id') not in (None, '')]
+        if not keep:
+            return 0
+        
+        # Later duplicates within one batch win
+        last_row = {str(posts[i]['id']): i for i in keep}
+        keep = sorted(last_row.values())
+        ids = [str(posts[i]['id']) for i in keep]
+        metadata = [{k: v for k, v in posts[i].items() if k != 'body'} for i in keep]
+        batch = _Batch(now, ids, metadata, vectors[keep])
+        
+        with self._lock:
+            for row, post_id in enumerate(ids):
+                self._retire(post_id)
+                self._rows[post_id] = (batch, row)
+            self._batches.append(batch)
+            self._count += len(ids)
+            self._ingested += len(ids)
+            self._expire(now)
+        return len(ids)
+    
+    def _retire(self, post_id: str):
+        """Mark the live row of ``post_id`` (if any) as dead; caller holds the lock."""
+        entry = self._rows.pop(post_id, None)
+        if entry is not None:
+            batch, row = entry
+            batch.alive[row] = False
+            batch.live -= 1
+            self._count -= 1
+    
+    def _expire(self, now: float):
+        """
+        Retire rows past max_age_seconds, then the oldest live rows beyond
+        max_items, and compact the batches.
+        """
+        cutoff = now - self.max_age_seconds
+        for batch in self._batches:
+            if batch.ingested_at >= cutoff and self._count <= self.max_items:
+                break
+            for row in np.flatnonzero(batch.alive):
+                if batch.ingested_at >= cutoff and self._count <= self.max_items:
+                    break
+                self._retire(batch.ids[row])
+                self._expired += 1
+        self._compact()
+    
+    def _compact(self):
+        """
+        Drop fully dead batches and rewrite mostly dead ones with their live
+        rows. Batches are replaced, never changed, so running searches keep
+        a consistent snapshot.
+        """
+        batches = []
+        for batch in self._batches:
+            if batch.live == 0:
+                continue
+            if batch.live < len(batch.ids) * (1.0 - COMPACT_DEAD_FRACTION):
+                rows = np.flatnonzero(batch.alive)
+                compacted = _Batch(
+                    batch.ingested_at,
+                    [batch.ids[row] for row in rows],
+                    [batch.posts[row] for row in rows],
+                    batch.vectors[rows]
+                )
+                for new_row, post_id in enumerate(compacted.ids):
+                    self._rows[post_id] = (compacted, new_row)
+                batch = compacted
+            batches.append(batch)
+        self._batches = batches
+    
+    def search(
+        self,
+        history_vector,
+        k: int,
+        min_score: float = 0.0,
+        exclude_ids: Optional[List[str]] = None,
+        budget: Optional[RequestBudget] = None,
+        include_vectors: bool = False,
+        pool: Optional[Callable[[np.ndarray], np.ndarray]] = None,
+        now: Optional[float] = None
+    ) -> Tuple[List[Dict[str, Any]], np.ndarray, Any]:
+        """
+        Top-``k`` live posts by cosine similarity to ``history_vector``.
+        
+        A multi-row ``history_vector`` (one row per interest) is reduced
+        to one score per post by ``pool`` (default: max over rows).
+        
+        Returns:
+            (posts, similarity scores, vectors or None), best first. Each
+            post dict also has 'ingested_at'.
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            self._expire(now)
+            # Batches are never modified in place except for ``alive``,
+            # so the scan can run on a snapshot without the lock
+            batches = list(reversed(self._batches))
+            excluded = {}
+            for post_id in map(str, exclude_ids or []):
+                if post_id in self._rows:
+                    batch, row = self._rows[post_id]
+                    excluded.setdefault(id(batch), []).append(row)
+        
+        scored_batches = []
+        for batch in batches:
+            if budget is not None and budget.expired():
+                budget.mark_degraded('deadline')
+                break
+            similarities = cosine_similarity(history_vector, batch.vectors)
+            scores = pool(similarities) if pool is not None else similarities.max(axis=0)
+            valid = batch.alive & (scores >= min_score)
+            valid[excluded.get(id(batch), [])] = False
+            scored_batches.append((batch, scores, valid))
+        
+        if not scored_batches:
+            return [], np.empty(0), None
+        
+        scores = np.concatenate([scores for _, scores, _ in scored_batches])
+        valid = np.flatnonzero(np.concatenate([valid for _, _, valid in scored_batches]))
+        top = local_top_k(scores, valid, k)
+        
+        # Map global positions back to (batch, row)
+        offsets = np.cumsum([0] + [len(batch.ids) for batch, _, _ in scored_batches])
+        which = np.searchsorted(offsets, top, side='right') - 1
+        posts = []
+        rows = []
+        for position, batch_number in zip(top, which):
+            batch = scored_batches[batch_number][0]
+            row = position - offsets[batch_number]
+            posts.append({**batch.posts[row], 'ingested_at': batch.ingested_at})
+            rows.append(batch.vectors[row:row + 1])
+        
+        vectors = None
+        if include_vectors and rows:
+            vectors = vstack(rows).tocsr() if issparse(rows[0]) else np.vstack(rows)
+        return posts, scores[top], vectors
+    
+    def describe(self) -> Dict[str, Any]:
+        with self._lock:
+            oldest = self._batches[0].ingested_at if self._batches else None
+            return {
+                'size': self._count,
+                'stored_rows': sum(len(batch.ids) for batch in self._batches),
+                'max_items': self.max_items,
+                'max_age_seconds': self.max_age_seconds,
+                'batches': len(self._batches),
+                'oldest_ingested_at': oldest,
+                'ingested': self._ingested,
+                'expired': self._expired
+            }
@@ -0,0 +1,212 @@
+"""
+LSA Based Recommender
+=====================
+Content-based recommendation over dense Latent Semantic Analysis embeddings.
+
+Training fits a truncated SVD on the TF-IDF matrix and stores every post as
+an L2-normalized float32 vector of ``n_components`` (128-256) dimensions,
+optionally int8-quantized with one scale per row. Queries and candidates go
+through the same TF-IDF vectorizer and are projected onto the SVD
+components in one batch.
+
+Scanning the corpus is then a single BLAS matrix-vector product over a
+contiguous (num_posts x n_components) array instead of a sparse product
+over ~10k TF-IDF features. Quantized embeddings are dequantized block by
+block during the scan, so memory stays bounded.
+
+Everything else (filters, blending, pagination, profiles, formatting) is
+shared with the TF-IDF recommender.
+
+Usage (add LSA embeddings to an existing models directory):
+    python lsa_recommender.py --models-dir models --components 256 [--int8]
+
+Author: DSAA2044 Team
+Date: December 2025
+"""
+
+import argparse
+import os
+import pickle
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from sklearn.decomposition import TruncatedSVD
+from sklearn.preprocessing import normalize
+
+from tfidf_recommender import TFIDFRecommender
+
+SVD_FILENAME = 'lsa_svd.pkl'
+EMBEDDINGS_FILENAME = 'lsa_embeddings.npy'
+QUANTIZED_FILENAME = 'lsa_embeddings_int8.npy'
+SCALES_FILENAME = 'lsa_scales.npy'
+
+# Rows dequantized per step when scanning int8 embeddings
+SCAN_BLOCK_ROWS = 65536
+
+
+def fit_lsa(tfidf_matrix, n_components: int = 256, seed: int = 42) -> Tuple[TruncatedSVD, np.ndarray]:
+    """
+    Fit a truncated SVD and embed every row of ``tfidf_matrix``.
+    
+    Returns:
+        (fitted TruncatedSVD, L2-normalized float32 embeddings)
+    """
+    n_components = min(n_components, tfidf_matrix.shape[1] - 1, tfidf_matrix.shape[0] - 1)
+    svd = TruncatedSVD(n_components=n_components, algorithm='randomized', random_state=seed)
+    embeddings = svd.fit_transform(tfidf_matrix)
+    embeddings = normalize(embeddings).astype(np.float32)
+    return svd, np.ascontiguousarray(embeddings)
+
+
+def quantize_int8(embeddings: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Symmetric per-row int8 quantization: embeddings ~= int8 * scale."""
+    scales = np.abs(embeddings).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    quantized = np.round(embeddings / scales[:, None]).astype(np.int8)
+    return quantized, scales.astype(np.float32)
+
+
+def save_lsa(models_dir: str, svd: TruncatedSVD, embeddings: np.ndarray, quantize: bool = False) -> List[str]:
+    """Save the SVD and the embeddings (float32, plus int8 if ``quantize``)."""
+    paths = [os.path.join(models_dir, SVD_FILENAME), os.path.join(models_dir, EMBEDDINGS_FILENAME)]
+    with open(paths[0], 'wb') as f:
+        pickle.dump(svd, f)
+    np.save(paths[1], embeddings)
+    
+    if quantize:
+        quantized, scales = quantize_int8(embeddings)
+        paths.append(os.path.join(models_dir, QUANTIZED_FILENAME))
+        paths.append(os.path.join(models_dir, SCALES_FILENAME))
+        np.save(paths[2], quantized)
+        np.save(paths[3], scales)
+    
+    return paths
+
+
+class LSARecommender(TFIDFRecommender):
+    """
+    Dense LSA embedding recommender.
+    Supports history-based recommendations and candidate scoring.
+    """
+    
+    def __init__(self, models_dir: str = 'models', quantized: bool = False, **kwargs):
+        """
+        quantized=True scans the int8 embeddings (4x less memory) instead of
+        float32. Other keyword arguments are as for TFIDFRecommender;
+        sharded and multi-node modes are not supported.
+        """
+        if kwargs.get('shard_config') or kwargs.get('shard_rows') is not None:
+            raise ValueError("LSA recommender does not support multi-node mode")
+        super().__init__(models_dir, **kwargs)
+        self.quantized = quantized
+        self.components = None
+        self.embeddings = None
+        self.scales = None
+    
+    def load_model(self):
+        """Load the vectorizer, SVD components and (per mode) the embeddings."""
+        with open(os.path.join(self.models_dir, SVD_FILENAME), 'rb') as f:
+            svd = pickle.load(f)
+        # (num_features x n_components), contiguous for the projection
+        self.components = np.ascontiguousarray(svd.components_.T, dtype=np.float32)
+        
+        super().load_model()
+        print(f"✓ LSA components loaded: {self.components.shape[1]} dimensions")
+    
+    def _load_corpus_vectors(self):
+        """Load the post embeddings (memory-mapped, no copy)."""
+        try:
+            if self.quantized:
+                self.embeddings = np.load(os.path.join(self.models_dir, QUANTIZED_FILENAME), mmap_mode='r')
+                self.scales = np.load(os.path.join(self.models_dir, SCALES_FILENAME))
+            else:
+                self.embeddings = np.load(os.path.join(self.models_dir, EMBEDDINGS_FILENAME), mmap_mode='r')
+        except FileNotFoundError as e:
+            print(f"  Warning: LSA embeddings not found ({e.filename})")
+            self.embeddings = None
+    
+    def _corpus_vectors_loaded(self) -> bool:
+        return self.embeddings is not None
+    
+    def _start_shards(self):
+        if self.num_shards > 1:
+            print("  Warning: sharded scoring is not supported by the LSA recommender")
+    
+    def _project(self, tfidf_vectors) -> np.ndarray:
+        """Project TF-IDF rows onto the SVD components and L2-normalize."""
+        dense = np.asarray(tfidf_vectors @ self.components, dtype=np.float32)
+        return normalize(dense)
+    
+    def _vectorize(self, cleaned_texts: List[str]) -> np.ndarray:
+        return self._project(super()._vectorize(cleaned_texts))
+    
+    def _history_vector(
+        self,
+        history_contents: List[str],
+        history_counts: Optional[Tuple[np.ndarray, np.ndarray]] = None
+    ) -> Optional[np.ndarray]:
+        """LSA user profile vector, shape (1, n_components), or None."""
+        tfidf_vector = super()._history_vector(history_contents, history_counts)
+        if tfidf_vector is None:
+            return None
+        return self._project(tfidf_vector)
+    
+    def _post_vectors(self, indices) -> np.ndarray:
+        vectors = np.asarray(self.embeddings[np.asarray(indices)], dtype=np.float32)
+        if self.scales is not None:
+            vectors *= self.scales[np.asarray(indices)][:, None]
+        return vectors
+    
+    def _scan(self, start: int, stop: int, history_vectors: np.ndarray) -> np.ndarray:
+        """
+        Cosine similarity of rows [start, stop) with normalized profile
+        vectors given as columns (n_components x M); returns (rows x M).
+        """
+        if self.scales is None:
+            return self.embeddings[start:stop] @ history_vectors
+        
+        scores = np.empty((stop - start, history_vectors.shape[1]), dtype=np.float32)
+        for block_start in range(start, stop, SCAN_BLOCK_ROWS):
+            block_stop = min(block_start + SCAN_BLOCK_ROWS, stop)
+            block = self.embeddings[block_start:block_stop].astype(np.float32)
+            scores[block_start - start:block_stop - start] = (
+                (block @ history_vectors) * self.scales[block_start:block_stop, None]
+            )
+        return scores
+    
+    def _num_corpus_rows(self) -> int:
+        return self.embeddings.shape[0]
+    
+    def _scan_rows(self, history_vector: np.ndarray, start: int, stop: int) -> np.ndarray:
+        """Dense dot products of rows [start, stop) with the (pooled) profile vectors."""
+        return self._pool_interests(self._scan(start, stop, np.ascontiguousarray(history_vector.T)).T)
+    
+    def get_model_info(self) -> Dict[str, Any]:
+        """Return model metadata."""
+        info = super().get_model_info()
+        info.update({
+            'algorithm': 'LSA',
+            'embedding_dim': int(self.components.shape[1]),
+            'quantized': self.quantized
+        })
+        return info
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fit LSA embeddings for an existing TF-IDF model")
+    parser.add_argument('--models-dir', default='models')
+    parser.add_argument('--components', type=int, default=256)
+    parser.add_argument('--int8', action='store_true', help='also save int8-quantized embeddings')
+    args = parser.parse_args()
+    
+    with open(os.path.join(args.models_dir, 'tfidf_matrix.pkl'), 'rb') as f:
+        tfidf_matrix = pickle.load(f)
+    
+    print(f"Fitting {args.components}-dimensional LSA on {tfidf_matrix.shape[0]:,} posts...")
+    start_time = time.time()
+    svd, embeddings = fit_lsa(tfidf_matrix, n_components=args.components)
+    for path in save_lsa(args.models_dir, svd, embeddings, quantize=args.int8):
+        print(f"✓ Saved {path}")
+    print(f"✓ Explained variance: {svd.explained_variance_ratio_.sum():.1%} "
+          f"({time.time() - start_time:.1f}s)")
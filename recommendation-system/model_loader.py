@@ -0,0 +1,129 @@
+"""
+Model Loader
+============
+Background model loading with an observable load state.
+
+Creating and loading a recommender imports pandas/sklearn and unpickles the
+model artifacts, which can take seconds. ModelLoader does that work (plus a
+warm-up pass) in a background thread so the HTTP server can bind its port
+immediately and report progress through liveness/readiness probes.
+
+States: not_started -> loading -> warming_up -> ready (or failed)
+
+Author: DSAA2044 Team
+Date: December 2025
+"""
+
+import threading
+import time
+import traceback
+from typing import Any, Callable, Dict, Optional
+
+
+class ModelNotReadyError(RuntimeError):
+    """Raised when a request needs the model before it has finished loading."""
+    pass
+
+
+class ModelLoader:
+    """
+    Loads a recommender once, in the background or inline, and hands it out
+    to request handlers only after it is ready.
+    """
+    
+    def __init__(self, create_model: Callable[[], Any], warm_up: bool = True):
+        self._create_model = create_model
+        self._warm_up = warm_up
+        self._model = None
+        self._status = 'not_started'
+        self._error = None
+        self._started_at = None
+        self._ready_at = None
+        self._lock = threading.Lock()
+        self._thread = None
+    
+    def start(self, background: bool = True):
+        """Start loading; returns immediately when ``background`` is True."""
+        with self._lock:
+            if self._status != 'not_started':
+                return
+            self._status = 'loading'
+            self._started_at = time.time()
+        
+        if background:
+            self._thread = threading.Thread(target=self._load, name='model-loader', daemon=True)
+            self._thread.start()
+        else:
+            self._load()
+    
+    def _load(self):
+        try:
+            model = self._create_model()
+            model.load_model()
+            
+            if self._warm_up:
+                self._status = 'warming_up'
+                warm_up_start = time.time()
+                model.warm_up()
+                print(f"✓ Warm-up finished in {time.time() - warm_up_start:.2f}s")
+            
+            with self._lock:
+                self._model = model
+                self._status = 'ready'
+                self._ready_at = time.time()
+            print(f"✓ Model ready after {self._ready_at - self._started_at:.2f}s")
+        except Exception as e:
+            print(f"ERROR loading model: {e}")
+            print(traceback.format_exc())
+            with self._lock:
+                self._status = 'failed'
+                self._error = str(e)
+    
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until loading finishes; returns True if the model is ready."""
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return self.is_ready
+    
+    @property
+    def is_ready(self) -> bool:
+        return self._status == 'ready'
+    
+    @property
+    def status(self) -> str:
+        return self._status
+    
+    def get(self):
+        """
+        Return the loaded model.
+        
+        Raises:
+            ModelNotReadyError: while loading, or if loading failed
+        """
+        model = self._model
+        if model is None:
+            if self._status == 'failed':
+                raise ModelNotReadyError(f"Model failed to load: {self._error}")
+            raise ModelNotReadyError(f"Model is not ready (status: {self._status})")
+        return model
+    
+    def describe(self) -> Dict[str, Any]:
+        """Load state for health endpoints."""
+        info = {
+            'status': self._status,
+            'ready': self.is_ready
+        }
+        
+        if self._started_at is not None:
+            finished_at = self._ready_at or time.time()
+            info['load_seconds'] = round(finished_at - self._started_at, 3)
+        
+        if self._error:
+            info['error'] = self._error
+        
+        model = self._model
+        legacy_state = getattr(model, 'legacy_state', None)
+        if legacy_state is not None:
+            info['legacy_artifacts'] = legacy_state
+        
+        return info
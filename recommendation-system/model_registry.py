@@ -0,0 +1,289 @@
+"""
+Model Registry
+==============
+Many named recommenders in one process, loaded on demand and evicted
+least-recently-used under a memory budget.
+
+Separate models per community group or language each have their own
+models directory. They are listed in a JSON config:
+
+    {
+        "memory_budget_mb": 2048,
+        "models": {
+            "gaming": {"models_dir": "models/gaming", "memory_mb": 500},
+            "de":     {"models_dir": "models/de", "algorithm": "lsa", "memory_mb": 800},
+            "news":   {"models_dir": "models/news", "memory_mb": 300}
+        }
+    }
+
+A named model is loaded (through a ModelLoader, with warm-up) the first
+time a request asks for it. A request waits up to ``load_timeout`` seconds
+for the load and otherwise gets ModelNotReadyError (503 + Retry-After);
+the load carries on in the background. A failed load is forgotten: the
+model is loaded again by the first request after a back-off of
+``retry_backoff`` seconds, doubled after each consecutive failure (up to
+MAX_RETRY_BACKOFF_SECONDS); requests in between get ModelNotReadyError.
+
+Memory accounting: with a budget, every model must declare its
+``memory_mb`` (the config is rejected otherwise), and is charged exactly
+that. Measuring a load instead, e.g. by the growth of the process's
+resident memory, is not reliable in a server: request threads allocate
+and free at the same time. Size ``memory_mb`` by the model's anonymous
+memory once loaded (pickled vectorizer, models and matrices);
+memory-mapped artifacts (TF-IDF matrix .npy arrays, LSA embeddings, the
+Arrow post store) are file-backed and need not be counted. Their pages
+stay in the page cache after eviction, which makes re-loading an evicted
+model cheap. After each load, least-recently-used models are evicted until
+the loaded models fit ``memory_budget_mb`` again (the model just loaded is
+never evicted). Evicting only drops the registry's reference: requests
+still using the model finish normally.
+
+Author: DSAA2044 Team
+Date: December 2025
+"""
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+from model_loader import ModelLoader, ModelNotReadyError
+
+BYTES_PER_MB = 1024 * 1024
+MAX_RETRY_BACKOFF_SECONDS = 600.0
+
+
+class UnknownModelError(KeyError):
+    """Raised when a request names a model that is not in the registry."""
+    
+    def __str__(self):
+        return f"Unknown model: {self.args[0]}"
+
+
+def load_registry_config(path: str) -> Dict[str, Any]:
+    """Read and validate a registry config file."""
+    with open(path) as f:
+        config = json.load(f)
+    
+    models = config.get('models')
+    if not models:
+        raise ValueError(f"No models defined in {path}")
+    for name, spec in models.items():
+        if 'models_dir' not in spec:
+            raise ValueError(f"Model {name} needs a models_dir: {spec}")
+        memory_mb = spec.get('memory_mb')
+        if memory_mb is not None and (
+            not isinstance(memory_mb, (int, float)) or isinstance(memory_mb, bool) or memory_mb <= 0
+        ):
+            raise ValueError(f"Model {name}: memory_mb must be a positive number: {spec}")
+    
+    return config
+
+
+class _Entry:
+    """Registry slot of one named model."""
+    
+    def __init__(self, spec: Dict[str, Any]):
+        self.spec = spec
+        self.loader = None
+        self.loaded = None
+        self.memory_bytes = None
+        self.last_used = None
+        self.loads = 0
+        self.evictions = 0
+        # Consecutive failed loads, and when the next load may start
+        self.failures = 0
+        self.last_error = None
+        self.retry_at = None
+
+
+class ModelRegistry:
+    """
+    Named recommenders, loaded on first use and evicted LRU-first when the
+    loaded ones exceed the memory budget.
+    """
+    
+    def __init__(
+        self,
+        create_model: Callable[[str, Dict[str, Any]], Any],
+        models: Dict[str, Dict[str, Any]],
+        memory_budget_mb: Optional[float] = None,
+        load_timeout: float = 2.0,
+        warm_up: bool = True,
+        retry_backoff: float = 10.0
+    ):
+        """
+        ``create_model(name, spec)`` builds the (unloaded) recommender of a
+        config entry. ``memory_budget_mb`` None or 0 means no budget;
+        with a budget every spec needs a ``memory_mb``.
+        
+        Raises:
+            ValueError: if there is a budget and some model has no memory_mb
+        """
+        self._create_model = create_model
+        self.memory_budget_bytes = memory_budget_mb * BYTES_PER_MB if memory_budget_mb else None
+        if self.memory_budget_bytes:
+            unsized = [name for name, spec in models.items() if spec.get('memory_mb') is None]
+            if unsized:
+                raise ValueError(f"A memory budget needs memory_mb for every model: {', '.join(unsized)}")
+        self.load_timeout = load_timeout
+        self._warm_up = warm_up
+        self.retry_backoff = retry_backoff
+        
+        self._entries = {name: _Entry(spec) for name, spec in models.items()}
+        # Loaded (or loading) models, least recently used first
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        # One load at a time, so concurrent loads do not stack their peaks
+        self._load_lock = threading.Lock()
+    
+    @property
+    def names(self):
+        return list(self._entries)
+    
+    def __contains__(self, name: str) -> bool:
+        return name in self._entries
+    
+    def spec(self, name: str) -> Dict[str, Any]:
+        """Config entry of ``name`` (UnknownModelError if not configured)."""
+        if name not in self._entries:
+            raise UnknownModelError(name)
+        return self._entries[name].spec
+    
+    def get(self, name: str):
+        """
+        Return the loaded model ``name``, starting its load if needed.
+        
+        Raises:
+            UnknownModelError: if ``name`` is not configured
+            ModelNotReadyError: if the model is still loading after
+                load_timeout seconds, or failed to load (until the retry
+                back-off has passed)
+        """
+        entry = self._entries.get(name)
+        if entry is None:
+            raise UnknownModelError(name)
+        
+        with self._lock:
+            if entry.loader is None:
+                if entry.retry_at is not None and time.time() < entry.retry_at:
+                    raise ModelNotReadyError(
+                        f"{name}: model failed to load ({entry.last_error}), "
+                        f"retrying in {entry.retry_at - time.time():.0f} s"
+                    )
+                entry.loader = ModelLoader(
+                    lambda: self._create_model(name, entry.spec), warm_up=self._warm_up
+                )
+                entry.loaded = threading.Event()
+                thread = threading.Thread(
+                    target=self._load, args=(name, entry, entry.loader, entry.loaded),
+                    name=f'model-registry-{name}', daemon=True
+                )
+                thread.start()
+            self._lru[name] = entry
+            self._lru.move_to_end(name)
+            entry.last_used = time.time()
+            loader, loaded = entry.loader, entry.loaded
+        
+        loaded.wait(self.load_timeout)
+        try:
+            return loader.get()
+        except ModelNotReadyError as e:
+            raise ModelNotReadyError(f"{name}: {e}") from None
+    
+    def _load(self, name: str, entry: _Entry, loader: ModelLoader, loaded: threading.Event):
+        """Load one model, charge its memory and evict others to fit the budget."""
+        try:
+            with self._load_lock:
+                loader.start(background=False)
+            
+            with self._lock:
+                if loader.is_ready and entry.loader is loader:
+                    entry.loads += 1
+                    if entry.spec.get('memory_mb') is not None:
+                        entry.memory_bytes = int(entry.spec['memory_mb'] * BYTES_PER_MB)
+                    entry.failures = 0
+                    entry.last_error = None
+                    entry.retry_at = None
+                    self._evict_over_budget(keep=name)
+                elif loader.status == 'failed' and entry.loader is loader:
+                    self._forget_failed(name, entry, loader.describe().get('error'))
+        finally:
+            loaded.set()
+    
+    def _forget_failed(self, name: str, entry: _Entry, error: Optional[str]):
+        """Drop a failed load so a later request retries it after a back-off."""
+        entry.failures += 1
+        entry.last_error = error
+        backoff = min(self.retry_backoff * 2 ** (entry.failures - 1), MAX_RETRY_BACKOFF_SECONDS)
+        entry.retry_at = time.time() + backoff
+        entry.loader = None
+        entry.loaded = None
+        self._lru.pop(name, None)
+        print(f"⚠ Warning: model {name} failed to load ({error}), retrying in {backoff:.0f} s")
+    
+    def _evict_over_budget(self, keep: str):
+        """Drop least-recently-used loaded models until the rest fit the budget."""
+        if not self.memory_budget_bytes:
+            return
+        
+        for name in list(self._lru):
+            if self.loaded_bytes() <= self.memory_budget_bytes:
+                break
+            entry = self._lru[name]
+            if name == keep or not entry.loader.is_ready:
+                continue
+            self._evict(name)
+        
+        if self.loaded_bytes() > self.memory_budget_bytes:
+            print(f"⚠ Warning: loaded models use {self.loaded_bytes() / BYTES_PER_MB:.0f} MB, "
+                  f"over the {self.memory_budget_bytes / BYTES_PER_MB:.0f} MB budget")
+    
+    def _evict(self, name: str):
+        entry = self._lru.pop(name)
+        print(f"✓ Evicted model {name} ({(entry.memory_bytes or 0) / BYTES_PER_MB:.0f} MB)")
+        entry.loader = None
+        entry.loaded = None
+        entry.memory_bytes = None
+        entry.evictions += 1
+    
+    def evict(self, name: str) -> bool:
+        """Unload ``name`` if it is loaded; returns False if it was not."""
+        with self._lock:
+            entry = self._lru.get(name)
+            if entry is None or not entry.loader.is_ready:
+                return False
+            self._evict(name)
+            return True
+    
+    def loaded_bytes(self) -> int:
+        return sum(entry.memory_bytes or 0 for entry in self._lru.values())
+    
+    def describe(self) -> Dict[str, Any]:
+        """Registry state for health endpoints."""
+        with self._lock:
+            models = {}
+            for name, entry in self._entries.items():
+                if entry.loader is not None:
+                    state = entry.loader.describe()
+                elif entry.failures:
+                    state = {'status': 'failed', 'error': entry.last_error, 'retry_at': entry.retry_at}
+                else:
+                    state = {'status': 'unloaded'}
+                models[name] = {
+                    'models_dir': entry.spec['models_dir'],
+                    'algorithm': entry.spec.get('algorithm'),
+                    'state': state,
+                    'memory_mb': round(entry.memory_bytes / BYTES_PER_MB, 1) if entry.memory_bytes is not None else None,
+                    'last_used': entry.last_used,
+                    'loads': entry.loads,
+                    'evictions': entry.evictions,
+                    'failures': entry.failures
+                }
+            return {
+                'memory_budget_mb': self.memory_budget_bytes / BYTES_PER_MB if self.memory_budget_bytes else None,
+                'loaded_mb': round(self.loaded_bytes() / BYTES_PER_MB, 1),
+                'lru': list(self._lru),
+                'models': models
+            }
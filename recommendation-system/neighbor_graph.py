@@ -0,0 +1,183 @@
+"""
+Item-to-Item Neighbor Graph
+===========================
+Offline top-N "more like this" neighbors for every post.
+
+Rows of tfidf_matrix are L2-normalized, so X·Xᵀ holds all pairwise cosine
+similarities. It is computed in row blocks (block_size x num_posts sparse
+products, so memory per block stays bounded) spread over worker processes,
+and only the top ``top_n`` neighbors of each row are kept.
+
+The result is an n x n CSR matrix with ``top_n`` entries per row (int32
+column indices, float32 scores, best first), saved as
+``models/neighbor_graph.npz``. Serving a post's neighbors is a slice of
+``indices``/``data`` between two ``indptr`` entries.
+
+Usage (for an existing models directory):
+    python neighbor_graph.py --models-dir models --top-n 20
+
+Author: DSAA2044 Team
+Date: December 2025
+"""
+
+import argparse
+import multiprocessing
+import os
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Tuple
+
+import numpy as np
+from scipy.sparse import csr_matrix, load_npz, save_npz
+
+NEIGHBORS_FILENAME = 'neighbor_graph.npz'
+
+# Set before the worker processes are forked, so they share it copy-on-write
+_MATRIX = None
+
+
+def _neighbor_block(args) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Worker: top-N neighbors of rows [start, stop) as (lengths, indices, scores)."""
+    start, stop, top_n = args
+    matrix = _MATRIX
+    products = (matrix[start:stop] @ matrix.T).tocsr()
+    
+    lengths = np.zeros(stop - start, dtype=np.int32)
+    indices = []
+    scores = []
+    for local_row in range(stop - start):
+        row_start, row_stop = products.indptr[local_row], products.indptr[local_row + 1]
+        columns = products.indices[row_start:row_stop]
+        values = products.data[row_start:row_stop]
+        
+        # A post is not its own neighbor
+        keep = (columns != start + local_row) & (values > 0)
+        columns, values = columns[keep], values[keep]
+        
+        if len(values) > top_n:
+            top = np.argpartition(-values, top_n - 1)[:top_n]
+            columns, values = columns[top], values[top]
+        order = np.argsort(-values, kind='stable')
+        
+        lengths[local_row] = len(order)
+        indices.append(columns[order])
+        scores.append(values[order])
+    
+    if not indices:
+        return lengths, np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32)
+    return (
+        lengths,
+        np.concatenate(indices).astype(np.int32),
+        np.concatenate(scores).astype(np.float32)
+    )
+
+
+def build_neighbor_graph(
+    matrix,
+    top_n: int = 20,
+    block_size: int = 1000,
+    n_jobs: Optional[int] = None
+) -> csr_matrix:
+    """
+    Compute the top-``top_n`` cosine neighbors of every row of ``matrix``.
+    
+    Parameters:
+    -----------
+    matrix : scipy.sparse matrix
+        L2-normalized TF-IDF matrix (one row per post)
+    top_n : int
+        Neighbors kept per post
+    block_size : int
+        Rows per block product; bounds peak memory per worker
+    n_jobs : int, optional
+        Worker processes (default: all cores; 'fork' start method only)
+    
+    Returns:
+    --------
+    csr_matrix
+        Neighbor graph, shape (n, n), best neighbor first within each row
+    """
+    global _MATRIX
+    
+    matrix = csr_matrix(matrix, dtype=np.float32)
+    num_rows = matrix.shape[0]
+    n_jobs = n_jobs or os.cpu_count() or 1
+    blocks = [
+        (start, min(start + block_size, num_rows), top_n)
+        for start in range(0, num_rows, block_size)
+    ]
+    
+    _MATRIX = matrix
+    try:
+        if n_jobs > 1 and len(blocks) > 1 and 'fork' in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context('fork')
+            with ProcessPoolExecutor(max_workers=n_jobs, mp_context=context) as executor:
+                parts = list(executor.map(_neighbor_block, blocks))
+        else:
+            parts = [_neighbor_block(block) for block in blocks]
+    finally:
+        _MATRIX = None
+    
+    if not parts:
+        return csr_matrix((num_rows, num_rows), dtype=np.float32)
+    
+    lengths = np.concatenate([part[0] for part in parts])
+    indptr = np.zeros(num_rows + 1, dtype=np.int64)
+    np.cumsum(lengths, out=indptr[1:])
+    if indptr[-1] < np.iinfo(np.int32).max:
+        indptr = indptr.astype(np.int32)
+    
+    return csr_matrix(
+        (
+            np.concatenate([part[2] for part in parts]),
+            np.concatenate([part[1] for part in parts]),
+            indptr
+        ),
+        shape=(num_rows, num_rows)
+    )
+
+
+def save_neighbor_graph(graph: csr_matrix, models_dir: str) -> str:
+    """Save the graph uncompressed (loading it is then just a read)."""
+    path = os.path.join(models_dir, NEIGHBORS_FILENAME)
+    save_npz(path, graph, compressed=False)
+    return path
+
+
+def load_neighbor_graph(models_dir: str) -> Optional[csr_matrix]:
+    """Load the neighbor graph, or None if it has not been built."""
+    path = os.path.join(models_dir, NEIGHBORS_FILENAME)
+    if not os.path.exists(path):
+        return None
+    return load_npz(path).tocsr()
+
+
+def neighbors_of(graph: csr_matrix, row: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Neighbor rows and cosine scores of ``row``, best first."""
+    start, stop = graph.indptr[row], graph.indptr[row + 1]
+    return graph.indices[start:stop], graph.data[start:stop]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the item-to-item neighbor graph")
+    parser.add_argument('--models-dir', default='models')
+    parser.add_argument('--top-n', type=int, default=20)
+    parser.add_argument('--block-size', type=int, default=1000)
+    parser.add_argument('--jobs', type=int, default=None)
+    args = parser.parse_args()
+    
+    with open(os.path.join(args.models_dir, 'tfidf_matrix.pkl'), 'rb') as f:
+        tfidf_matrix = pickle.load(f)
+    
+    print(f"Computing top-{args.top_n} neighbors for {tfidf_matrix.shape[0]:,} posts...")
+    start_time = time.time()
+    graph = build_neighbor_graph(
+        tfidf_matrix,
+        top_n=args.top_n,
+        block_size=args.block_size,
+        n_jobs=args.jobs
+    )
+    path = save_neighbor_graph(graph, args.models_dir)
+    print(f"✓ Saved neighbor graph ({graph.nnz:,} edges) to: {path} "
+          f"in {time.time() - start_time:.1f}s")
@@ -0,0 +1,107 @@
+"""
+Parallel Vectorization
+======================
+Chunked cleaning and vectorization of large candidate batches on a process pool.
+
+A ``/api/score`` call with thousands of candidates used to clean and
+vectorize them all on one core. Both steps are pure Python (regex cleaning,
+the vectorizer's tokenizer and vocabulary lookups) and hold the GIL, so a
+thread pool would not help; a small pool of worker processes is used
+instead:
+
+- the workers are forked once, right after the model is loaded, and share
+  the vectorizer (and SVD components) copy-on-write
+- a batch of at least ``min_texts`` texts is split into one contiguous
+  chunk per worker; each worker cleans and vectorizes its chunk and the
+  row blocks are stacked back in input order
+- smaller batches never touch the pool: for them pickling costs more than
+  it saves, and interactive requests do not queue behind large ones
+
+The pool is shared by all requests of the server process; chunks of
+concurrent large batches are interleaved on the same workers.
+
+Author: DSAA2044 Team
+Date: December 2025
+"""
+
+import atexit
+import multiprocessing
+import threading
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+from scipy.sparse import issparse, vstack
+
+# Set in every worker by the pool initializer (inherited through fork)
+_VECTORIZE = None
+
+
+def _init_worker(vectorize: Callable[[List[str]], Any]):
+    global _VECTORIZE
+    _VECTORIZE = vectorize
+
+
+def _vectorize_chunk(texts: List[str]):
+    """Worker: clean and vectorize one chunk of raw texts."""
+    return _VECTORIZE(texts)
+
+
+class VectorizePool:
+    """
+    Fixed pool of forked worker processes running ``vectorize`` (raw texts
+    -> one row each) over chunks of large batches.
+    """
+    
+    def __init__(self, vectorize: Callable[[List[str]], Any], num_workers: int, min_texts: int = 2000):
+        if 'fork' not in multiprocessing.get_all_start_methods():
+            raise RuntimeError("Parallel vectorization needs the 'fork' start method")
+        
+        self.num_workers = num_workers
+        self.min_texts = max(min_texts, num_workers)
+        self._lock = threading.Lock()
+        self._batches = 0
+        self._texts = 0
+        
+        # With fork, initargs are inherited rather than pickled
+        context = multiprocessing.get_context('fork')
+        self._pool = context.Pool(
+            processes=num_workers, initializer=_init_worker, initargs=(vectorize,)
+        )
+        self.alive = True
+        atexit.register(self.close)
+    
+    def accepts(self, num_texts: int) -> bool:
+        """Whether a batch of ``num_texts`` texts should go to the pool."""
+        return self.alive and num_texts >= self.min_texts
+    
+    def vectorize(self, texts: List[str]):
+        """Vectors of ``texts`` (one row each), computed chunk-wise by the workers."""
+        chunk_size = -(-len(texts) // self.num_workers)
+        chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+        parts = self._pool.map(_vectorize_chunk, chunks)
+        
+        with self._lock:
+            self._batches += 1
+            self._texts += len(texts)
+        
+        if issparse(parts[0]):
+            return vstack(parts).tocsr()
+        return np.vstack(parts)
+    
+    def describe(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'num_workers': self.num_workers,
+                'min_texts': self.min_texts,
+                'alive': self.alive,
+                'batches': self._batches,
+                'texts': self._texts
+            }
+    
+    def close(self):
+        """Stop all workers."""
+        if not self.alive:
+            return
+        self.alive = False
+        self._pool.terminate()
+        self._pool.join()
@@ -0,0 +1,147 @@
+"""
+Post Store
+==========
+Column-oriented access to the processed training posts.
+
+Training writes ``processed_posts.arrow`` (Arrow IPC, uncompressed, with
+dictionary-encoded subreddit names) next to the legacy
+``processed_posts.pkl``. The Arrow file is memory-mapped, so opening it
+costs almost nothing. Columns are converted to pandas only when a code path
+asks for them, and ``rows()`` fetches full records (including the large
+``combined_text``) for just the requested top-k rows.
+
+pyarrow is optional: without it the pickled DataFrame is used through the
+same interface.
+
+Author: DSAA2044 Team
+Date: December 2025
+"""
+
+import os
+import pickle
+import threading
+from typing import Any, Dict, List, Optional, Sequence
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as pa_ipc
+except ImportError:  # pragma: no cover - optional dependency
+    pa = None
+    pa_ipc = None
+
+ARROW_FILENAME = 'processed_posts.arrow'
+PICKLE_FILENAME = 'processed_posts.pkl'
+
+
+class PostStore:
+    """
+    Read-only store of post metadata, backed by an Arrow table or a DataFrame.
+    """
+    
+    def __init__(self, table=None, df: Optional[pd.DataFrame] = None):
+        if (table is None) == (df is None):
+            raise ValueError("PostStore needs exactly one of table or df")
+        
+        self._table = table
+        self._df = df
+        self._columns = {}
+        self._lock = threading.Lock()
+    
+    @classmethod
+    def load(cls, models_dir: str) -> Optional['PostStore']:
+        """
+        Open the post store in ``models_dir``.
+        
+        Prefers the memory-mapped Arrow file, falls back to the pickle.
+        Returns None when neither exists.
+        """
+        arrow_path = os.path.join(models_dir, ARROW_FILENAME)
+        if pa is not None and os.path.exists(arrow_path):
+            return cls.from_arrow(arrow_path)
+        
+        pickle_path = os.path.join(models_dir, PICKLE_FILENAME)
+        if os.path.exists(pickle_path):
+            with open(pickle_path, 'rb') as f:
+                return cls(df=pickle.load(f))
+        
+        return None
+    
+    @classmethod
+    def from_arrow(cls, path: str) -> 'PostStore':
+        """Memory-map an Arrow IPC file; no column data is read yet."""
+        if pa is None:
+            raise RuntimeError("pyarrow is required to read Arrow post stores")
+        
+        source = pa.memory_map(path, 'r')
+        table = pa_ipc.open_file(source).read_all()
+        return cls(table=table)
+    
+    @staticmethod
+    def write_arrow(df: pd.DataFrame, path: str):
+        """Write ``df`` as an uncompressed Arrow IPC file (memory-mappable)."""
+        if pa is None:
+            raise RuntimeError("pyarrow is required to write Arrow post stores")
+        
+        df = df.copy()
+        if 'subreddit.name' in df.columns:
+            # Categorical columns become dictionary-encoded Arrow arrays
+            df['subreddit.name'] = df['subreddit.name'].astype(str).astype('category')
+        
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        with pa.OSFile(path, 'wb') as sink:
+            with pa_ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+    
+    @property
+    def backend(self) -> str:
+        return 'arrow' if self._table is not None else 'pickle'
+    
+    @property
+    def columns(self) -> List[str]:
+        if self._table is not None:
+            return list(self._table.column_names)
+        return list(self._df.columns)
+    
+    def __len__(self) -> int:
+        if self._table is not None:
+            return self._table.num_rows
+        return len(self._df)
+    
+    def column(self, name: str) -> pd.Series:
+        """Return one column as a pandas Series, converting it on first use."""
+        if self._df is not None:
+            return self._df[name]
+        
+        with self._lock:
+            series = self._columns.get(name)
+            if series is None:
+                series = self._table.column(name).to_pandas()
+                self._columns[name] = series
+        return series
+    
+    def frame(self, names: Sequence[str]) -> pd.DataFrame:
+        """Return the given columns as a DataFrame."""
+        return pd.DataFrame({name: self.column(name) for name in names})
+    
+    def rows(self, indices: Sequence[int]) -> List[Dict[str, Any]]:
+        """Fetch full records for the given row indices only."""
+        indices = [int(i) for i in indices]
+        if not indices:
+            return []
+        
+        if self._df is not None:
+            return [self._df.iloc[i].to_dict() for i in indices]
+        
+        return self._table.take(pa.array(indices, type=pa.int64())).to_pylist()
+    
+    def slice(self, start: int, stop: int) -> 'PostStore':
+        """Rows [start, stop) as a new store (zero-copy for Arrow)."""
+        if self._table is not None:
+            return PostStore(table=self._table.slice(start, stop - start))
+        return PostStore(df=self._df.iloc[start:stop].reset_index(drop=True))
+    
+    def row(self, idx: int) -> Dict[str, Any]:
+        """Fetch the full record of a single row."""
+        return self.rows([idx])[0]
@@ -0,0 +1,251 @@
+"""
+Profile Store
+=============
+Server-side user profiles so clients can send history deltas.
+
+Each profile keeps:
+- accumulated term counts of everything the user has read (sparse, as
+  parallel index/count arrays over the model vocabulary); the recommender
+  turns them into a TF-IDF profile vector at scoring time, so appending
+  never re-vectorizes old history
+- a bounded, insertion-ordered set of recently seen post ids
+
+Profiles live in an in-memory LRU bounded by ``max_profiles``. With a
+``db_path`` every change is also written to SQLite, so evicted profiles
+are reloaded on demand and all profiles survive restarts.
+
+Author: DSAA2044 Team
+Date: December 2025
+"""
+
+import json
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+
+class ProfileNotFoundError(KeyError):
+    """Raised when a profile id is unknown."""
+    
+    def __str__(self):
+        return f"Unknown profile_id: {self.args[0]}"
+
+
+class ProfileExistsError(KeyError):
+    """Raised when creating a profile whose id is already taken."""
+    
+    def __str__(self):
+        return f"profile_id already exists: {self.args[0]}"
+
+
+class UserProfile:
+    """
+    Accumulated term counts and recently seen ids for one user.
+    
+    Updates run under the store lock, but requests read profiles without
+    it. So an update never mutates what a reader may hold: the counts are
+    replaced as one (indices, counts) tuple and seen_ids as a new dict.
+    """
+    
+    def __init__(
+        self,
+        profile_id: str,
+        term_indices: Optional[np.ndarray] = None,
+        term_counts: Optional[np.ndarray] = None,
+        seen_ids: Optional[Iterable[str]] = None,
+        num_items: int = 0,
+        updated_at: Optional[float] = None
+    ):
+        self.profile_id = profile_id
+        self.terms = (
+            np.asarray(term_indices if term_indices is not None else [], dtype=np.int32),
+            np.asarray(term_counts if term_counts is not None else [], dtype=np.float32)
+        )
+        self.seen_ids = OrderedDict.fromkeys(seen_ids or [])
+        self.num_items = num_items
+        self.updated_at = updated_at or time.time()
+    
+    @property
+    def term_indices(self) -> np.ndarray:
+        return self.terms[0]
+    
+    @property
+    def term_counts(self) -> np.ndarray:
+        return self.terms[1]
+    
+    @property
+    def is_empty(self) -> bool:
+        return len(self.terms[0]) == 0
+    
+    def add_counts(self, term_indices: np.ndarray, term_counts: np.ndarray):
+        """Merge new term counts into the profile."""
+        old_indices, old_counts = self.terms
+        indices = np.concatenate([old_indices, np.asarray(term_indices, dtype=np.int32)])
+        counts = np.concatenate([old_counts, np.asarray(term_counts, dtype=np.float32)])
+        if len(indices) == 0:
+            return
+        
+        unique, inverse = np.unique(indices, return_inverse=True)
+        self.terms = (unique.astype(np.int32), np.bincount(inverse, weights=counts).astype(np.float32))
+    
+    def add_seen_ids(self, seen_ids: Iterable[str], max_seen_ids: int):
+        """Record seen post ids, keeping only the most recent ``max_seen_ids``."""
+        updated = OrderedDict(self.seen_ids)
+        for post_id in seen_ids:
+            post_id = str(post_id)
+            updated.pop(post_id, None)
+            updated[post_id] = None
+        while len(updated) > max_seen_ids:
+            updated.popitem(last=False)
+        self.seen_ids = updated
+    
+    def summary(self) -> Dict[str, Any]:
+        return {
+            'profile_id': self.profile_id,
+            'num_items': self.num_items,
+            'num_terms': int(len(self.terms[0])),
+            'num_seen_ids': len(self.seen_ids),
+            'updated_at': int(self.updated_at)
+        }
+
+
+class ProfileStore:
+    """
+    Thread-safe LRU of UserProfile objects with optional SQLite persistence.
+    """
+    
+    def __init__(
+        self,
+        max_profiles: int = 10000,
+        max_seen_ids: int = 500,
+        db_path: Optional[str] = None
+    ):
+        self.max_profiles = max_profiles
+        self.max_seen_ids = max_seen_ids
+        self.db_path = db_path
+        self._profiles = OrderedDict()
+        self._lock = threading.RLock()
+        self._db = None
+        
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                'CREATE TABLE IF NOT EXISTS profiles ('
+                ' profile_id TEXT PRIMARY KEY,'
+                ' term_indices BLOB NOT NULL,'
+                ' term_counts BLOB NOT NULL,'
+                ' seen_ids TEXT NOT NULL,'
+                ' num_items INTEGER NOT NULL,'
+                ' updated_at REAL NOT NULL)'
+            )
+            self._db.commit()
+    
+    def create(self, profile_id: Optional[str] = None, replace: bool = False) -> UserProfile:
+        """
+        Create an empty profile (with a random id unless one is given).
+        
+        Raises:
+            ProfileExistsError: if ``profile_id`` exists and not ``replace``
+        """
+        profile = UserProfile(profile_id or secrets.token_urlsafe(16))
+        with self._lock:
+            if not replace and (profile.profile_id in self._profiles
+                                or self._load(profile.profile_id) is not None):
+                raise ProfileExistsError(profile.profile_id)
+            self._remember(profile)
+            self._persist(profile)
+        return profile
+    
+    def get(self, profile_id: str) -> UserProfile:
+        """
+        Return a profile, reloading it from disk if it was evicted.
+        
+        Raises:
+            ProfileNotFoundError: if the profile does not exist
+        """
+        with self._lock:
+            profile = self._profiles.get(profile_id)
+            if profile is not None:
+                self._profiles.move_to_end(profile_id)
+                return profile
+            
+            profile = self._load(profile_id)
+            if profile is None:
+                raise ProfileNotFoundError(profile_id)
+            self._remember(profile)
+            return profile
+    
+    def append(
+        self,
+        profile_id: str,
+        term_counts: Tuple[np.ndarray, np.ndarray],
+        num_items: int = 0,
+        seen_ids: Iterable[str] = ()
+    ) -> UserProfile:
+        """Add newly read items (as term counts) and seen ids to a profile."""
+        with self._lock:
+            profile = self.get(profile_id)
+            profile.add_counts(*term_counts)
+            profile.add_seen_ids(seen_ids, self.max_seen_ids)
+            profile.num_items += num_items
+            profile.updated_at = time.time()
+            self._persist(profile)
+            return profile
+    
+    def reset(self, profile_id: str) -> UserProfile:
+        """Clear a profile's history and seen ids, keeping its id."""
+        with self._lock:
+            self.get(profile_id)
+            return self.create(profile_id, replace=True)
+    
+    def __len__(self) -> int:
+        return len(self._profiles)
+    
+    def _remember(self, profile: UserProfile):
+        self._profiles[profile.profile_id] = profile
+        self._profiles.move_to_end(profile.profile_id)
+        # Evicted profiles are already on disk (write-through) if persisted
+        while len(self._profiles) > self.max_profiles:
+            self._profiles.popitem(last=False)
+    
+    def _persist(self, profile: UserProfile):
+        if self._db is None:
+            return
+        self._db.execute(
+            'INSERT OR REPLACE INTO profiles VALUES (?, ?, ?, ?, ?, ?)',
+            (
+                profile.profile_id,
+                profile.terms[0].astype(np.int32).tobytes(),
+                profile.terms[1].astype(np.float32).tobytes(),
+                json.dumps(list(profile.seen_ids)),
+                profile.num_items,
+                profile.updated_at
+            )
+        )
+        self._db.commit()
+    
+    def _load(self, profile_id: str) -> Optional[UserProfile]:
+        if self._db is None:
+            return None
+        row = self._db.execute(
+            'SELECT term_indices, term_counts, seen_ids, num_items, updated_at'
+            ' FROM profiles WHERE profile_id = ?',
+            (profile_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        
+        term_indices, term_counts, seen_ids, num_items, updated_at = row
+        return UserProfile(
+            profile_id,
+            term_indices=np.frombuffer(term_indices, dtype=np.int32).copy(),
+            term_counts=np.frombuffer(term_counts, dtype=np.float32).copy(),
+            seen_ids=json.loads(seen_ids),
+            num_items=num_items,
+            updated_at=updated_at
+        )
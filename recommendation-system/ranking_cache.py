@@ -0,0 +1,98 @@
+"""
+Ranking Cache
+=============
+TTL cache of ranked candidate lists used for cursor-based pagination.
+
+The first page of a paginated request scores the whole corpus once and
+stores the top-N (indices, scores) under an opaque cursor. Later pages are
+sliced from the cached list instead of re-running the similarity scan.
+
+Author: DSAA2044 Team
+Date: December 2025
+"""
+
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+class CursorExpiredError(LookupError):
+    """Raised when a pagination cursor is unknown, malformed or expired."""
+    pass
+
+
+class RankingCache:
+    """
+    Thread-safe LRU cache of ranked candidate lists with a per-entry TTL.
+    
+    Cursors have the form ``<session token>.<offset>`` so retrying a page
+    with the same cursor is idempotent.
+    """
+    
+    def __init__(self, ttl_seconds: float = 600.0, max_entries: int = 1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def put(self, indices: np.ndarray, scores: np.ndarray) -> str:
+        """Store a ranked list and return its session token."""
+        token = secrets.token_urlsafe(12)
+        expires_at = time.monotonic() + self.ttl_seconds
+        
+        with self._lock:
+            self._entries[token] = (indices, scores, expires_at)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        
+        return token
+    
+    def get(self, cursor: str) -> Tuple[np.ndarray, np.ndarray, int]:
+        """
+        Resolve a cursor to its cached ranked list and offset.
+        
+        Raises:
+            CursorExpiredError: if the cursor is malformed, unknown or expired
+        """
+        token, offset = self.parse_cursor(cursor)
+        now = time.monotonic()
+        
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                raise CursorExpiredError("Cursor expired or invalid")
+            
+            indices, scores, expires_at = entry
+            if expires_at < now:
+                del self._entries[token]
+                raise CursorExpiredError("Cursor expired or invalid")
+            
+            self._entries.move_to_end(token)
+        
+        return indices, scores, offset
+    
+    @staticmethod
+    def make_cursor(token: str, offset: int) -> str:
+        """Build an opaque cursor for the page starting at ``offset``."""
+        return f"{token}.{offset}"
+    
+    @staticmethod
+    def parse_cursor(cursor: Optional[str]) -> Tuple[str, int]:
+        """Split a cursor into its session token and offset."""
+        if not isinstance(cursor, str) or '.' not in cursor:
+            raise CursorExpiredError("Cursor expired or invalid")
+        
+        token, _, offset = cursor.rpartition('.')
+        try:
+            offset = int(offset)
+        except ValueError:
+            raise CursorExpiredError("Cursor expired or invalid")
+        
+        if offset < 0:
+            raise CursorExpiredError("Cursor expired or invalid")
+        
+        return token, offset
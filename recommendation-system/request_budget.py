@@ -0,0 +1,56 @@
+"""
+Request Budget
+==============
+Per-request wall-clock deadline and degradation state.
+
+Scoring code checks ``expired()`` between chunks of work (candidate
+batches, corpus row blocks). When the deadline has passed it stops, keeps
+what it has already scored and calls ``mark_degraded()``; the API then
+returns those partial (or fallback) results with ``degraded: true``
+instead of letting one oversized request stall a worker.
+
+Input size limits (candidate body truncation, history token cap) are
+configured on the recommender itself, since they apply to every request.
+
+Author: DSAA2044 Team
+Date: December 2025
+"""
+
+import threading
+import time
+from typing import Any, Dict, Optional
+
+
+class RequestBudget:
+    """Deadline of one request, plus whether scoring had to cut corners."""
+    
+    def __init__(self, deadline_ms: Optional[float] = None):
+        self.deadline_ms = deadline_ms
+        self.started_at = time.perf_counter()
+        self.expires_at = None if deadline_ms is None else self.started_at + deadline_ms / 1000.0
+        self.degraded = False
+        self.reasons = []
+        self._lock = threading.Lock()
+    
+    def expired(self) -> bool:
+        return self.expires_at is not None and time.perf_counter() >= self.expires_at
+    
+    def remaining_seconds(self) -> Optional[float]:
+        """Seconds left (never negative), or None without a deadline."""
+        if self.expires_at is None:
+            return None
+        return max(self.expires_at - time.perf_counter(), 0.0)
+    
+    def mark_degraded(self, reason: str):
+        """Record that results are partial or from a fallback."""
+        with self._lock:
+            self.degraded = True
+            if reason not in self.reasons:
+                self.reasons.append(reason)
+    
+    def describe(self) -> Dict[str, Any]:
+        """Fields added to API responses."""
+        info = {'degraded': self.degraded}
+        if self.degraded:
+            info['degraded_reasons'] = list(self.reasons)
+        return info
@@ -0,0 +1,145 @@
+"""
+Score Blending
+==============
+Freshness and popularity priors for ranking training-set posts.
+
+Blended score:
+
+    score = cos^alpha * decay(created_utc)^beta * f(score)^gamma
+
+    decay(t) = 0.5 ^ (age_days / half_life_days)
+    f(s)     = 1 + log(1 + max(s, 0))
+
+Per-post priors are precomputed once as NumPy arrays when the model is
+loaded. The decay vector is evaluated against a "now" rounded down to a
+time bucket and cached, so requests inside the same bucket reuse it. The
+blend is computed in log space so large ages never underflow to zero.
+
+Author: DSAA2044 Team
+Date: December 2025
+"""
+
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+SECONDS_PER_DAY = 86400.0
+
+DEFAULT_BLEND = {
+    'alpha': 1.0,
+    'beta': 0.0,
+    'gamma': 0.0,
+    'half_life_days': 30.0
+}
+
+
+class PostPriors:
+    """
+    Precomputed per-post prior vectors aligned with the rows of tfidf_matrix.
+    """
+    
+    def __init__(
+        self,
+        created_utc: np.ndarray,
+        popularity: np.ndarray,
+        bucket_seconds: float = 3600.0
+    ):
+        self.created_utc = np.asarray(created_utc, dtype=np.float64)
+        # log f(score), with f(score) = 1 + log1p(score) >= 1
+        popularity = np.maximum(np.asarray(popularity, dtype=np.float64), 0.0)
+        self.log_popularity = np.log1p(np.log1p(popularity))
+        self.bucket_seconds = bucket_seconds
+        self._decay_cache = {}
+        self._lock = threading.Lock()
+    
+    @classmethod
+    def from_dataframe(cls, df, **kwargs) -> 'PostPriors':
+        """Build priors from the processed posts dataframe."""
+        import pandas as pd
+        
+        created = pd.to_numeric(df['created_utc'], errors='coerce')
+        
+        # Some dumps store created_utc as datetime strings
+        missing = created.isna()
+        if missing.any():
+            parsed = pd.to_datetime(df.loc[missing, 'created_utc'], errors='coerce', utc=True)
+            created.loc[missing] = (parsed - pd.Timestamp(0, tz='UTC')).dt.total_seconds()
+        
+        popularity = pd.to_numeric(df['score'], errors='coerce')
+        
+        return cls(
+            created_utc=created.fillna(0.0).to_numpy(),
+            popularity=popularity.fillna(0.0).to_numpy(),
+            **kwargs
+        )
+    
+    def log_decay(self, half_life_days: float, now: Optional[float] = None) -> np.ndarray:
+        """Log of the time-decay prior, cached per (now bucket, half-life)."""
+        now = time.time() if now is None else now
+        bucket = int(now // self.bucket_seconds)
+        key = (bucket, float(half_life_days))
+        
+        with self._lock:
+            cached = self._decay_cache.get(key)
+        if cached is not None:
+            return cached
+        
+        bucket_now = bucket * self.bucket_seconds
+        age_days = np.maximum(bucket_now - self.created_utc, 0.0) / SECONDS_PER_DAY
+        log_decay = -np.log(2.0) * age_days / half_life_days
+        
+        with self._lock:
+            # Only the current bucket is worth keeping
+            self._decay_cache = {k: v for k, v in self._decay_cache.items() if k[0] == bucket}
+            self._decay_cache[key] = log_decay
+        
+        return log_decay
+    
+    def log_blend(
+        self,
+        similarity_scores: np.ndarray,
+        blend: Dict[str, Any],
+        now: Optional[float] = None,
+        rows: slice = slice(None)
+    ) -> np.ndarray:
+        """
+        Log of the blended score for every post.
+        
+        Args:
+            similarity_scores: Cosine similarity per post (full corpus, or
+                the ``rows`` slice of it)
+            blend: Dict with 'alpha', 'beta', 'gamma', 'half_life_days'
+            now: Reference time (default: current time)
+            rows: Rows of the corpus that similarity_scores covers
+        
+        Returns:
+            Array of log-scores; ranking by it equals ranking by the blend
+        """
+        params = {**DEFAULT_BLEND, **blend}
+        
+        log_scores = params['alpha'] * np.log(np.maximum(similarity_scores, 1e-12))
+        if params['beta']:
+            log_scores += params['beta'] * self.log_decay(params['half_life_days'], now)[rows]
+        if params['gamma']:
+            log_scores += params['gamma'] * self.log_popularity[rows]
+        
+        return log_scores
+
+
+def validate_blend(blend: Any) -> Optional[str]:
+    """Return an error message if ``blend`` is not a valid blend config."""
+    if not isinstance(blend, dict):
+        return 'blend must be an object'
+    
+    for key, value in blend.items():
+        if key not in DEFAULT_BLEND:
+            return f'Unknown blend parameter: {key}'
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0:
+            return f'blend.{key} must be a non-negative number'
+    
+    if blend.get('half_life_days', DEFAULT_BLEND['half_life_days']) <= 0:
+        return 'blend.half_life_days must be positive'
+    
+    return None
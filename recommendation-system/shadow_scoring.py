@@ -0,0 +1,208 @@
+"""
+Shadow Scoring
+==============
+Compare a candidate recommender against the serving one on live traffic.
+
+Before switching RECOMMENDER_ALGORITHM, a second recommender (the shadow)
+is loaded next to the primary one. A sampled fraction of ``/api/score`` and
+``/api/recommend`` requests is re-scored by the shadow once the primary
+response has been sent, and the two rankings are compared:
+
+- overlap@k: shared ids in both top-k lists, divided by k
+- Kendall tau: rank correlation over the ids both rankings returned
+- latency of the primary and of the shadow call
+
+Each comparison is appended as one JSON line to a local log file.
+
+The shadow never slows the primary path. Jobs run on a small background
+executor behind a bounded queue: when ``max_queue`` jobs are pending, new
+samples are dropped instead of queued. Jobs can also hold an admission
+slot (at 'prefetch' priority), so they are shed while the server is busy.
+
+Author: DSAA2044 Team
+Date: December 2025
+"""
+
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from admission_control import AdmissionRejectedError
+from model_loader import ModelLoader, ModelNotReadyError
+from request_budget import RequestBudget
+
+
+def rank_agreement(primary_ids: List[str], shadow_ids: List[str], k: int = 10) -> Dict[str, Any]:
+    """overlap@k and Kendall tau (over the common ids) of two rankings, best first."""
+    k = min(k, max(len(primary_ids), len(shadow_ids)))
+    overlap = None
+    if k > 0:
+        overlap = len(set(primary_ids[:k]) & set(shadow_ids[:k])) / k
+    
+    shadow_rank = {post_id: rank for rank, post_id in enumerate(shadow_ids)}
+    common = [post_id for post_id in primary_ids if post_id in shadow_rank]
+    tau = None
+    if len(common) >= 2:
+        # Ranks have no ties, so tau is (concordant - discordant) / pairs
+        shadow_ranks = np.array([shadow_rank[post_id] for post_id in common])
+        signs = np.sign(shadow_ranks[None, :] - shadow_ranks[:, None])
+        pairs = len(common) * (len(common) - 1) / 2
+        tau = float(np.triu(signs, 1).sum() / pairs)
+    
+    return {'overlap_at_k': overlap, 'kendall_tau': tau, 'common': len(common)}
+
+
+class ShadowScorer:
+    """
+    Samples requests, re-runs them on the shadow recommender in the
+    background and logs the rank agreement with the primary result.
+    """
+    
+    def __init__(
+        self,
+        loader: ModelLoader,
+        sample_rate: float = 0.05,
+        max_queue: int = 32,
+        log_path: Optional[str] = 'shadow_scores.jsonl',
+        k: int = 10,
+        deadline_ms: Optional[float] = None,
+        workers: int = 1
+    ):
+        """
+        ``loader`` provides the shadow recommender. Shadow calls get their
+        own RequestBudget of ``deadline_ms`` (None: no deadline), so
+        deadline-bound degradation is comparable with the primary.
+        """
+        self.loader = loader
+        self.sample_rate = sample_rate
+        self.max_queue = max_queue
+        self.log_path = log_path
+        self.k = k
+        self.deadline_ms = deadline_ms
+        
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='shadow')
+        self._slots = threading.BoundedSemaphore(max_queue)
+        self._lock = threading.Lock()
+        self._stats = {'sampled': 0, 'dropped': 0, 'completed': 0, 'failed': 0}
+        self._overlap_sum = 0.0
+        self._overlap_count = 0
+        self._tau_sum = 0.0
+        self._tau_count = 0
+    
+    def sample(self) -> bool:
+        """Whether to shadow the current request (only once the shadow is ready)."""
+        if not self.loader.is_ready or random.random() >= self.sample_rate:
+            return False
+        with self._lock:
+            self._stats['sampled'] += 1
+        return True
+    
+    def submit(
+        self,
+        endpoint: str,
+        method: str,
+        kwargs: Dict[str, Any],
+        primary_ids: List[str],
+        primary_ms: float,
+        slot=None,
+        postprocess: Optional[Callable[[List[Dict[str, Any]]], List[Dict[str, Any]]]] = None
+    ) -> bool:
+        """
+        Queue ``shadow.<method>(**kwargs)`` for comparison with the
+        primary ranking. ``slot`` is an optional context manager held
+        while the shadow scores; ``postprocess`` applies the endpoint's
+        own ordering to the shadow results. Returns False if the job was
+        dropped.
+        """
+        if not self._slots.acquire(blocking=False):
+            self._count('dropped')
+            return False
+        
+        try:
+            future = self._executor.submit(
+                self._run, endpoint, method, kwargs, primary_ids, primary_ms, slot, postprocess
+            )
+        except RuntimeError:
+            # Executor shut down
+            self._slots.release()
+            self._count('dropped')
+            return False
+        
+        future.add_done_callback(lambda _: self._slots.release())
+        return True
+    
+    def _run(self, endpoint, method, kwargs, primary_ids, primary_ms, slot, postprocess):
+        record = {
+            'time': time.time(),
+            'endpoint': endpoint,
+            'shadow_algorithm': None,
+            'primary_ms': round(primary_ms, 3)
+        }
+        try:
+            model = self.loader.get()
+            record['shadow_algorithm'] = model.get_model_info().get('algorithm')
+            budget = RequestBudget(self.deadline_ms)
+            with slot if slot is not None else nullcontext():
+                started = time.perf_counter()
+                results = getattr(model, method)(**kwargs, budget=budget)
+                record['shadow_ms'] = round((time.perf_counter() - started) * 1000.0, 3)
+        except (AdmissionRejectedError, ModelNotReadyError):
+            self._count('dropped')
+            return
+        except Exception as e:
+            self._count('failed')
+            record['error'] = f"{type(e).__name__}: {e}"
+            self._log(record)
+            return
+        
+        if postprocess is not None:
+            results = postprocess(results)
+        shadow_ids = [str(result['id']) for result in results]
+        agreement = rank_agreement(primary_ids, shadow_ids, self.k)
+        record.update(agreement)
+        record.update({
+            'k': self.k,
+            'num_primary': len(primary_ids),
+            'num_shadow': len(shadow_ids),
+            'shadow_degraded': budget.degraded
+        })
+        
+        with self._lock:
+            self._stats['completed'] += 1
+            if agreement['overlap_at_k'] is not None:
+                self._overlap_sum += agreement['overlap_at_k']
+                self._overlap_count += 1
+            if agreement['kendall_tau'] is not None:
+                self._tau_sum += agreement['kendall_tau']
+                self._tau_count += 1
+        self._log(record)
+    
+    def _count(self, key: str):
+        with self._lock:
+            self._stats[key] += 1
+    
+    def _log(self, record: Dict[str, Any]):
+        if not self.log_path:
+            return
+        line = json.dumps(record)
+        with self._lock:
+            with open(self.log_path, 'a', encoding='utf-8') as f:
+                f.write(line + '\n')
+    
+    def describe(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'model': self.loader.describe(),
+                'sample_rate': self.sample_rate,
+                'max_queue': self.max_queue,
+                'log_path': self.log_path,
+                **self._stats,
+                'mean_overlap_at_k': self._overlap_sum / self._overlap_count if self._overlap_count else None,
+                'mean_kendall_tau': self._tau_sum / self._tau_count if self._tau_count else None
+            }
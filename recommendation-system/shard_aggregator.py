@@ -0,0 +1,211 @@
+"""
+Shard Aggregator
+================
+Multi-node deployment: one aggregator fans requests out to shard servers.
+
+Each shard server is a normal ``app.py`` started with SERVER_ROLE=shard. It
+keeps only its row range of the corpus vectors and posts (with
+CORPUS_MMAP=1 and the Arrow post store the other rows are never read),
+scores it and answers ``POST /internal/shard/topk`` with its local top-k
+(formatted posts included). The aggregator loads only
+the vectorizer, builds the history vector, queries all relevant shards
+concurrently over pooled HTTP connections, and merges the partial results.
+
+Shards that time out or fail are skipped: the response is built from the
+shards that answered, as long as at least ``min_shards`` did.
+
+Config file (JSON), shared by the aggregator and the shards:
+
+    {
+        "timeout_seconds": 2.0,
+        "min_shards": 1,
+        "shards": [
+            {"url": "http://10.0.0.1:5001", "rows": [0, 500000]},
+            {"url": "http://10.0.0.2:5001", "rows": [500000, 1000000]}
+        ]
+    }
+
+Author: DSAA2044 Team
+Date: December 2025
+"""
+
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
+from scipy.sparse import vstack
+
+from sharded_scoring import ShardHits, decode_vector, encode_vector, merge_hits
+
+TOPK_PATH = '/internal/shard/topk'
+
+
+def load_shard_config(path: str) -> Dict[str, Any]:
+    """Read and validate a shard config file."""
+    with open(path) as f:
+        config = json.load(f)
+    
+    shards = config.get('shards')
+    if not shards:
+        raise ValueError(f"No shards defined in {path}")
+    for shard in shards:
+        if 'url' not in shard or len(shard.get('rows', [])) != 2:
+            raise ValueError(f"Each shard needs a url and rows [start, stop]: {shard}")
+    
+    return config
+
+
+class ShardAggregator:
+    """
+    Scatter-gather over shard servers, with the same ``top_k`` interface
+    as the in-machine ShardPool.
+    """
+    
+    remote = True
+    alive = True
+    
+    def __init__(
+        self,
+        shards: List[Dict[str, Any]],
+        timeout_seconds: float = 2.0,
+        min_shards: int = 1
+    ):
+        self.shards = [
+            {'url': shard['url'].rstrip('/'), 'rows': tuple(shard['rows'])}
+            for shard in shards
+        ]
+        self.timeout_seconds = timeout_seconds
+        self.min_shards = min_shards
+        
+        # One keep-alive connection pool per shard host
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=len(self.shards), pool_maxsize=32)
+        self._session.mount('http://', adapter)
+        self._session.mount('https://', adapter)
+        self._executor = ThreadPoolExecutor(
+            max_workers=4 * len(self.shards), thread_name_prefix='shard-client'
+        )
+        
+        self._stats_lock = threading.Lock()
+        self._failures = {shard['url']: 0 for shard in self.shards}
+        self._last_error = {}
+    
+    @classmethod
+    def from_config(cls, path: str) -> 'ShardAggregator':
+        config = load_shard_config(path)
+        return cls(
+            config['shards'],
+            timeout_seconds=config.get('timeout_seconds', 2.0),
+            min_shards=config.get('min_shards', 1)
+        )
+    
+    @property
+    def num_shards(self) -> int:
+        return len(self.shards)
+    
+    def top_k(self, request: Dict[str, Any], k: int) -> ShardHits:
+        """
+        Global top-``k`` rows for ``request`` from all shards that answered.
+        
+        Raises:
+            RuntimeError: if fewer than ``min_shards`` shards answered
+        """
+        targets = self._target_shards(request.get('row_ranges'))
+        if not targets:
+            empty = np.empty(0)
+            return ShardHits(empty.astype(np.int64), empty, empty)
+        
+        payload = {
+            **request,
+            'k': k,
+            'history_vector': encode_vector(request['history_vector'])
+        }
+        
+        futures = {
+            self._executor.submit(self._query, shard, payload): shard
+            for shard in targets
+        }
+        done, _ = wait(futures, timeout=self.timeout_seconds)
+        
+        results = []
+        failed = []
+        for future, shard in futures.items():
+            if future in done and future.exception() is None:
+                results.append(future.result())
+                continue
+            
+            error = future.exception() if future in done else 'timed out'
+            failed.append(shard['url'])
+            with self._stats_lock:
+                self._failures[shard['url']] += 1
+                self._last_error[shard['url']] = str(error)
+        
+        if len(results) < min(self.min_shards, len(targets)):
+            raise RuntimeError(
+                f"Only {len(results)} of {len(targets)} shards answered: {', '.join(failed)}"
+            )
+        if failed:
+            print(f"⚠ Partial results, shards failed: {', '.join(failed)}")
+        
+        return merge_hits(results, k)._replace(failed_shards=tuple(failed))
+    
+    def _target_shards(
+        self,
+        row_ranges: Optional[List[Tuple[int, int]]]
+    ) -> List[Dict[str, Any]]:
+        """Shards whose rows intersect the requested subreddit ranges."""
+        if row_ranges is None:
+            return self.shards
+        return [
+            shard for shard in self.shards
+            if any(start < shard['rows'][1] and stop > shard['rows'][0] for start, stop in row_ranges)
+        ]
+    
+    def _query(self, shard: Dict[str, Any], payload: Dict[str, Any]) -> ShardHits:
+        """POST the request to one shard and decode its hits."""
+        response = self._session.post(
+            shard['url'] + TOPK_PATH,
+            json=payload,
+            timeout=self.timeout_seconds
+        )
+        response.raise_for_status()
+        data = response.json()
+        if not data.get('success'):
+            raise RuntimeError(data.get('error', 'shard error'))
+        
+        vectors = None
+        if data.get('vectors'):
+            vectors = vstack([decode_vector(vector) for vector in data['vectors']]).tocsr()
+        
+        return ShardHits(
+            np.array(data['indices'], dtype=np.int64),
+            np.array(data['ranking_scores'], dtype=np.float64),
+            np.array(data['similarity_scores'], dtype=np.float64),
+            posts=data['posts'],
+            vectors=vectors
+        )
+    
+    def describe(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            return {
+                'mode': 'remote',
+                'num_shards': self.num_shards,
+                'timeout_seconds': self.timeout_seconds,
+                'shards': [
+                    {
+                        'url': shard['url'],
+                        'rows': list(shard['rows']),
+                        'failures': self._failures[shard['url']],
+                        'last_error': self._last_error.get(shard['url'])
+                    }
+                    for shard in self.shards
+                ]
+            }
+    
+    def close(self):
+        self._executor.shutdown(wait=False)
+        self._session.close()
@@ -0,0 +1,236 @@
+"""
+Sharded Scoring
+===============
+Scatter-gather top-K retrieval over row shards held by worker processes.
+
+The corpus is split into ``num_shards`` contiguous row ranges. Each range is
+served by a long-lived worker process forked from the server after the
+model is loaded, so the TF-IDF matrix and post metadata are shared
+copy-on-write rather than copied. For every request the coordinator:
+
+1. broadcasts the request (history vector, filters, k) to all shards
+2. each shard scores its rows and returns its local top-k, best first
+3. the local lists are merged with a heap into the global top-k
+
+Every row is scored by exactly one shard, so the merged result equals a
+single-process scan. The same merge is used by the multi-node aggregator
+(see shard_aggregator), whose shards are HTTP servers instead of processes.
+
+Author: DSAA2044 Team
+Date: December 2025
+"""
+
+import atexit
+import heapq
+import itertools
+import multiprocessing
+import threading
+import traceback
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy.sparse import csr_matrix, vstack
+
+# (start, stop) -> callable(request) -> (indices, ranking_scores, similarity_scores)
+ShardFactory = Callable[[int, int], Callable[[Dict[str, Any]], Tuple[np.ndarray, np.ndarray, np.ndarray]]]
+
+
+class ShardHits(NamedTuple):
+    """Top rows of a shard (or of all shards), best first."""
+    indices: np.ndarray
+    ranking_scores: np.ndarray
+    similarity_scores: np.ndarray
+    # Remote shards also return formatted posts and, for MMR, row vectors
+    posts: Optional[List[Dict[str, Any]]] = None
+    vectors: Optional[csr_matrix] = None
+    failed_shards: Tuple[str, ...] = ()
+
+
+def merge_hits(results: Sequence[ShardHits], k: int) -> ShardHits:
+    """Merge per-shard hit lists (each sorted best-first) into the global top-k."""
+    # (ranking score, shard, position): lazily merged, stops after k rows
+    streams = [
+        zip(hits.ranking_scores.tolist(), itertools.repeat(shard), itertools.count())
+        for shard, hits in enumerate(results)
+    ]
+    merged = list(itertools.islice(
+        heapq.merge(*streams, key=lambda item: -item[0]), k
+    ))
+    
+    if not merged:
+        empty = np.empty(0)
+        return ShardHits(empty.astype(np.int64), empty, empty)
+    
+    def gather(field):
+        return [getattr(results[shard], field)[position] for _, shard, position in merged]
+    
+    # Shards without hits contribute nothing, whatever they returned
+    contributing = [hits for hits in results if len(hits.indices)]
+    
+    posts = None
+    if all(hits.posts is not None for hits in contributing):
+        posts = gather('posts')
+    
+    vectors = None
+    if all(hits.vectors is not None for hits in contributing):
+        vectors = vstack([
+            results[shard].vectors[position] for _, shard, position in merged
+        ]).tocsr()
+    
+    return ShardHits(
+        np.array(gather('indices'), dtype=np.int64),
+        np.array(gather('ranking_scores'), dtype=np.float64),
+        np.array(gather('similarity_scores'), dtype=np.float64),
+        posts=posts,
+        vectors=vectors
+    )
+
+
+def encode_vector(vector: csr_matrix) -> Dict[str, Any]:
+    """JSON-friendly form of a single sparse row."""
+    vector = csr_matrix(vector)
+    return {
+        'indices': vector.indices.tolist(),
+        'values': vector.data.tolist(),
+        'num_features': vector.shape[1]
+    }
+
+
+def decode_vector(encoded: Dict[str, Any]) -> csr_matrix:
+    """Inverse of encode_vector."""
+    indices = encoded['indices']
+    return csr_matrix(
+        (encoded['values'], indices, [0, len(indices)]),
+        shape=(1, encoded['num_features'])
+    )
+
+
+def shard_bounds(num_rows: int, num_shards: int) -> List[Tuple[int, int]]:
+    """Split ``num_rows`` rows into ``num_shards`` near-equal contiguous ranges."""
+    num_shards = max(1, min(num_shards, num_rows))
+    edges = np.linspace(0, num_rows, num_shards + 1).astype(int)
+    return [(int(edges[i]), int(edges[i + 1])) for i in range(num_shards)]
+
+
+def _shard_worker(conn, factory: ShardFactory, start: int, stop: int):
+    """Worker process: build the shard scorer once, then serve requests."""
+    score = factory(start, stop)
+    while True:
+        try:
+            request = conn.recv()
+        except EOFError:
+            break
+        if request is None:
+            break
+        
+        try:
+            conn.send(('ok', score(request)))
+        except Exception as e:
+            conn.send(('error', f"{e}\n{traceback.format_exc()}"))
+    conn.close()
+
+
+class ShardPool:
+    """
+    A fixed set of worker processes, one per row shard.
+    
+    Requests are serialized with a lock: each request already uses every
+    shard (and so every core), and the pipes carry one request at a time.
+    """
+    
+    remote = False
+    
+    def __init__(self, factory: ShardFactory, num_rows: int, num_shards: int):
+        if 'fork' not in multiprocessing.get_all_start_methods():
+            raise RuntimeError("Sharded scoring needs the 'fork' start method")
+        
+        self.bounds = shard_bounds(num_rows, num_shards)
+        self._lock = threading.Lock()
+        self._connections = []
+        self._processes = []
+        self.alive = True
+        
+        context = multiprocessing.get_context('fork')
+        for shard_id, (start, stop) in enumerate(self.bounds):
+            parent_conn, child_conn = context.Pipe()
+            process = context.Process(
+                target=_shard_worker,
+                args=(child_conn, factory, start, stop),
+                name=f'shard-{shard_id}',
+                daemon=True
+            )
+            process.start()
+            child_conn.close()
+            self._connections.append(parent_conn)
+            self._processes.append(process)
+        
+        atexit.register(self.close)
+    
+    @property
+    def num_shards(self) -> int:
+        return len(self.bounds)
+    
+    def top_k(self, request: Dict[str, Any], k: int) -> ShardHits:
+        """Global top-``k`` rows for ``request``, best first."""
+        request = {**request, 'k': k}
+        
+        with self._lock:
+            if not self.alive:
+                raise RuntimeError("Shard pool is closed")
+            
+            try:
+                for conn in self._connections:
+                    conn.send(request)
+                replies = [conn.recv() for conn in self._connections]
+            except (EOFError, OSError) as e:
+                # A worker died; the pipes are out of sync now
+                self._shutdown()
+                raise RuntimeError(f"Shard worker failed: {e}")
+        
+        results = []
+        for status, payload in replies:
+            if status != 'ok':
+                raise RuntimeError(f"Shard scoring failed: {payload}")
+            results.append(ShardHits(*payload))
+        
+        return merge_hits(results, k)
+    
+    def describe(self) -> Dict[str, Any]:
+        return {'mode': 'processes', 'num_shards': self.num_shards, 'alive': self.alive}
+    
+    def close(self):
+        """Stop all workers."""
+        with self._lock:
+            self._shutdown()
+    
+    def _shutdown(self):
+        if not self.alive:
+            return
+        self.alive = False
+        
+        for conn in self._connections:
+            try:
+                conn.send(None)
+                conn.close()
+            except (OSError, ValueError):
+                pass
+        for process in self._processes:
+            process.join(timeout=1.0)
+            if process.is_alive():
+                process.terminate()
+
+
+def local_top_k(
+    ranking_scores: np.ndarray,
+    valid_local: np.ndarray,
+    k: int
+) -> np.ndarray:
+    """Positions (into ``ranking_scores``) of the best ``k`` valid rows, best first."""
+    if len(valid_local) == 0 or k <= 0:
+        return valid_local[:0]
+    
+    k = min(k, len(valid_local))
+    valid_scores = ranking_scores[valid_local]
+    top = np.argpartition(-valid_scores, k - 1)[:k]
+    top = top[np.argsort(-valid_scores[top], kind='stable')]
+    return valid_local[top]
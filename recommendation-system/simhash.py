@@ -0,0 +1,127 @@
+"""
+SimHash Near-Duplicate Collapsing
+=================================
+Serving-time dedup of candidates mirrored across Lemmy communities.
+
+Each candidate vector is reduced to a 64-bit SimHash: it is projected onto
+64 fixed pseudo-random +-1 directions (one sparse x dense product for all
+candidates) and bit b is set when projection b is positive. Vectors with a
+small angle between them agree on most bits, so near-duplicates have a
+small Hamming distance.
+
+Grouping is a bucketed lookup. The 64 bits are split into
+``max_distance + 1`` bands; two fingerprints within ``max_distance`` bits
+must agree exactly on at least one band (pigeonhole), so only candidates
+sharing a band value are compared. Candidates are visited best score
+first: each one joins the first representative within ``max_distance``
+bits, or becomes a representative itself. Only representatives are
+bucketed, so the work per candidate stays constant for typical feeds.
+
+Author: DSAA2044 Team
+Date: December 2025
+"""
+
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
+import numpy as np
+from scipy.sparse import issparse
+
+SIMHASH_BITS = 64
+
+# Fixed seed: fingerprints must not change between requests or restarts
+SIMHASH_SEED = 2044
+
+
+@lru_cache(maxsize=8)
+def _directions(dim: int) -> np.ndarray:
+    """(dim x 64) matrix of +-1 entries, fixed per vector dimension."""
+    rng = np.random.default_rng(SIMHASH_SEED)
+    return rng.choice(np.array([-1.0, 1.0], dtype=np.float32), size=(dim, SIMHASH_BITS))
+
+
+def simhash64(vectors) -> np.ndarray:
+    """64-bit SimHash of each row of a sparse or dense matrix, as uint64."""
+    projections = np.asarray(vectors @ _directions(vectors.shape[1]))
+    bits = (projections > 0).astype(np.uint64)
+    weights = np.left_shift(np.uint64(1), np.arange(SIMHASH_BITS, dtype=np.uint64))
+    return (bits * weights).sum(axis=1, dtype=np.uint64)
+
+
+def collapse_near_duplicates(
+    fingerprints: np.ndarray,
+    scores: np.ndarray,
+    max_distance: int = 3
+) -> Tuple[np.ndarray, Dict[int, List[int]]]:
+    """
+    Group fingerprints within ``max_distance`` bits, keeping the best score.
+    
+    Returns:
+        (representative positions in input order,
+         {representative: [duplicate positions, best first]})
+    """
+    if not 0 <= max_distance < SIMHASH_BITS // 4:
+        raise ValueError(f"max_distance must be between 0 and {SIMHASH_BITS // 4 - 1}")
+    
+    num_bands = max_distance + 1
+    width = SIMHASH_BITS // num_bands
+    shifts = [band * width for band in range(num_bands)]
+    widths = [width] * (num_bands - 1) + [SIMHASH_BITS - shifts[-1]]
+    
+    fingerprints = [int(fingerprint) for fingerprint in fingerprints]
+    buckets = [{} for _ in range(num_bands)]
+    duplicates = {}
+    representatives = []
+    
+    for position in np.argsort(-np.asarray(scores), kind='stable').tolist():
+        fingerprint = fingerprints[position]
+        bands = [(fingerprint >> shift) & ((1 << bits) - 1) for shift, bits in zip(shifts, widths)]
+        
+        owner = None
+        for band, value in enumerate(bands):
+            for representative in buckets[band].get(value, ()):
+                if bin(fingerprint ^ fingerprints[representative]).count('1') <= max_distance:
+                    owner = representative
+                    break
+            if owner is not None:
+                break
+        
+        if owner is not None:
+            duplicates[owner].append(position)
+            continue
+        
+        representatives.append(position)
+        duplicates[position] = []
+        for band, value in enumerate(bands):
+            buckets[band].setdefault(value, []).append(position)
+    
+    return np.sort(np.array(representatives, dtype=np.int64)), {
+        representative: positions
+        for representative, positions in duplicates.items()
+        if positions
+    }
+
+
+def dedup_candidates(
+    vectors,
+    scores: np.ndarray,
+    max_distance: int = 3
+) -> Tuple[np.ndarray, Dict[int, List[int]]]:
+    """
+    collapse_near_duplicates over candidate vectors. All-zero rows (empty
+    texts) carry no content to compare and are always kept.
+    """
+    if issparse(vectors):
+        nonempty_mask = vectors.getnnz(axis=1) > 0
+    else:
+        nonempty_mask = np.any(vectors != 0, axis=1)
+    nonempty = np.flatnonzero(nonempty_mask)
+    
+    representatives, duplicates = collapse_near_duplicates(
+        simhash64(vectors[nonempty]), np.asarray(scores)[nonempty], max_distance
+    )
+    keep = np.sort(np.concatenate([nonempty[representatives], np.flatnonzero(~nonempty_mask)]))
+    return keep, {
+        int(nonempty[representative]): [int(nonempty[position]) for position in positions]
+        for representative, positions in duplicates.items()
+    }
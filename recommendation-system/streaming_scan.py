@@ -0,0 +1,164 @@
+"""
+Streaming Corpus Scan
+=====================
+Bounded-memory top-k retrieval over the corpus in row blocks.
+
+The classic scan, ``cosine_similarity(history_vector, tfidf_matrix)``,
+materializes a float64 score for every post and then sorts a mask over
+all of them, so each request allocates O(num_posts) memory and the whole
+matrix has to be resident. The streaming scan instead walks the corpus
+``block_rows`` rows at a time:
+
+1. score the block (similarity, then the ranking score, e.g. blended)
+2. drop rows below min_score and excluded rows (a sorted row array)
+3. merge the block's local top-k into a running top-k buffer
+
+Per request memory is O(block_rows + k). With the TF-IDF matrix saved as
+memory-mapped ``.npy`` arrays (save_matrix_mmap, or
+``python streaming_scan.py --models-dir models``), each block is read
+through the page cache, so corpora larger than RAM can be served.
+
+Author: DSAA2044 Team
+Date: December 2025
+"""
+
+import argparse
+import os
+import pickle
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+from scipy.sparse import csr_matrix
+
+from request_budget import RequestBudget
+from sharded_scoring import local_top_k
+
+MATRIX_PARTS = ('data', 'indices', 'indptr', 'shape')
+
+
+def matrix_mmap_paths(models_dir: str) -> List[str]:
+    return [os.path.join(models_dir, f'tfidf_matrix_{part}.npy') for part in MATRIX_PARTS]
+
+
+def save_matrix_mmap(matrix, models_dir: str) -> List[str]:
+    """Save a CSR matrix as separate .npy arrays that load memory-mapped."""
+    matrix = csr_matrix(matrix)
+    matrix.sort_indices()
+    paths = matrix_mmap_paths(models_dir)
+    arrays = (matrix.data, matrix.indices, matrix.indptr, np.array(matrix.shape, dtype=np.int64))
+    for path, array in zip(paths, arrays):
+        np.save(path, array)
+    return paths
+
+
+def load_matrix_mmap(models_dir: str) -> Optional[csr_matrix]:
+    """CSR matrix over memory-mapped arrays (no copy), or None if not saved."""
+    paths = matrix_mmap_paths(models_dir)
+    if not all(os.path.exists(path) for path in paths):
+        return None
+    
+    data, indices, indptr = (np.load(path, mmap_mode='r') for path in paths[:3])
+    shape = tuple(int(n) for n in np.load(paths[3]))
+    matrix = csr_matrix((data, indices, indptr), shape=shape, copy=False)
+    # Saved sorted; spares scipy a check that would read every row
+    matrix.has_sorted_indices = True
+    return matrix
+
+
+def row_slice(matrix: csr_matrix, start: int, stop: int) -> csr_matrix:
+    """
+    Rows [start, stop) of a CSR matrix. The data and indices arrays are
+    views, so slicing a memory-mapped matrix reads none of the other rows.
+    """
+    if not 0 <= start <= stop <= matrix.shape[0]:
+        raise ValueError(f"Rows {start}-{stop} are outside the matrix ({matrix.shape[0]:,} rows)")
+    
+    lo, hi = matrix.indptr[start], matrix.indptr[stop]
+    sliced = csr_matrix(
+        (matrix.data[lo:hi], matrix.indices[lo:hi], np.asarray(matrix.indptr[start:stop + 1]) - lo),
+        shape=(stop - start, matrix.shape[1]),
+        copy=False
+    )
+    sliced.has_sorted_indices = matrix.has_sorted_indices
+    return sliced
+
+
+def stream_top_k(
+    score_block: Callable[[int, int], np.ndarray],
+    row_ranges: List[Tuple[int, int]],
+    k: int,
+    block_rows: int,
+    min_score: float = 0.0,
+    excluded_rows: Optional[np.ndarray] = None,
+    rank_block: Optional[Callable[[np.ndarray, int, int], np.ndarray]] = None,
+    budget: Optional[RequestBudget] = None
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Best ``k`` rows of ``row_ranges`` by ranking score.
+    
+    Args:
+        score_block: (start, stop) -> similarity of rows [start, stop)
+        row_ranges: Sorted, non-overlapping (start, stop) ranges to scan
+        k: Number of rows to keep
+        block_rows: Rows scored per step
+        min_score: Minimum similarity
+        excluded_rows: Sorted rows never returned
+        rank_block: (similarities, start, stop) -> ranking scores
+            (default: the similarities)
+        budget: Stops the scan at the deadline (marked 'deadline'); the
+            rows scored so far are ranked
+    
+    Returns:
+        (rows, ranking scores, similarity scores), best first
+    """
+    if excluded_rows is None:
+        excluded_rows = np.empty(0, dtype=np.int64)
+    
+    top_rows = np.empty(0, dtype=np.int64)
+    top_ranking = np.empty(0)
+    top_similarity = np.empty(0)
+    
+    for range_start, range_stop in row_ranges:
+        for start in range(range_start, range_stop, block_rows):
+            if budget is not None and budget.expired():
+                budget.mark_degraded('deadline')
+                return _best_first(top_rows, top_ranking, top_similarity)
+            
+            stop = min(start + block_rows, range_stop)
+            similarity = np.asarray(score_block(start, stop)).ravel()
+            ranking = rank_block(similarity, start, stop) if rank_block is not None else similarity
+            
+            valid_mask = similarity >= min_score
+            lo, hi = np.searchsorted(excluded_rows, (start, stop))
+            valid_mask[excluded_rows[lo:hi] - start] = False
+            local = local_top_k(ranking, np.flatnonzero(valid_mask), k)
+            if len(local) == 0:
+                continue
+            
+            # Merge into the running top-k
+            top_rows = np.concatenate([top_rows, local + start])
+            top_ranking = np.concatenate([top_ranking, ranking[local]])
+            top_similarity = np.concatenate([top_similarity, similarity[local]])
+            if len(top_rows) > k:
+                keep = np.argpartition(-top_ranking, k - 1)[:k]
+                top_rows, top_ranking, top_similarity = top_rows[keep], top_ranking[keep], top_similarity[keep]
+    
+    return _best_first(top_rows, top_ranking, top_similarity)
+
+
+def _best_first(rows: np.ndarray, ranking: np.ndarray, similarity: np.ndarray):
+    """Sort by ranking score, ties by row."""
+    order = np.lexsort((rows, -ranking))
+    return rows[order], ranking[order], similarity[order]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Save tfidf_matrix.pkl as memory-mappable arrays")
+    parser.add_argument('--models-dir', default='models')
+    args = parser.parse_args()
+    
+    with open(os.path.join(args.models_dir, 'tfidf_matrix.pkl'), 'rb') as f:
+        tfidf_matrix = pickle.load(f)
+    
+    for path in save_matrix_mmap(tfidf_matrix, args.models_dir):
+        print(f"✓ Saved {path}")
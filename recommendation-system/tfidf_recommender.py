@@ -9,11 +9,44 @@ Date: December 2025
 
 import pickle
 import re
+from bisect import bisect_right
+import threading
+import time
 import pandas as pd
 import numpy as np
+from scipy.sparse import csr_matrix, issparse, vstack
+from sklearn.feature_extraction.text import CountVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
-from typing import List, Dict, Any
-from base_recommender import BaseRecommender
+from sklearn.preprocessing import normalize
+from sklearn.utils.extmath import row_norms
+from typing import List, Dict, Any, Optional, Tuple
+from base_recommender import BaseRecommender, WARMUP_QUERIES
+from ranking_cache import RankingCache
+from diversity import mmr_rerank
+from score_blending import PostPriors
+from post_store import PostStore
+from neighbor_graph import load_neighbor_graph, neighbors_of
+from sharded_scoring import ShardPool, decode_vector, encode_vector, local_top_k
+from request_budget import RequestBudget
+from live_index import LiveIndex
+from interest_clustering import POOLING_METHODS, cluster_interests, pool_interest_scores
+from field_vectors import COMBINED_FIELD, FIELDS, FieldVectorCache, combine_fields, combined_text, validate_field_weights
+from simhash import dedup_candidates
+from parallel_vectorize import VectorizePool
+from streaming_scan import load_matrix_mmap, row_slice, stream_top_k
+from cold_start import COLD_START_ORDERS, ColdStartRankings, load_cold_start_posts
+
+# Corpus rows scored between two deadline checks: the first block is
+# DEADLINE_FIRST_BLOCK_CHUNKS score chunks; later blocks are what the
+# measured scan rate gets through in 1/DEADLINE_CHECKS_PER_REMAINING of
+# the time left, at most MAX_SCAN_BLOCK_ROWS (also the block size without
+# a deadline)
+DEADLINE_FIRST_BLOCK_CHUNKS = 16
+DEADLINE_CHECKS_PER_REMAINING = 8
+MAX_SCAN_BLOCK_ROWS = 131072
+
+# Average characters per token, to cut raw history before cleaning it
+CHARS_PER_TOKEN = 16
 
 
 class TFIDFRecommender(BaseRecommender):
@@ -22,12 +55,168 @@ class TFIDFRecommender(BaseRecommender):
     Supports history-based recommendations.
     """
     
-    def __init__(self, models_dir: str = 'models'):
+    supports_profiles = True
+    
+    def __init__(
+        self,
+        models_dir: str = 'models',
+        cursor_ttl: float = 600.0,
+        cursor_pool_size: int = 1000,
+        max_cursors: int = 1024,
+        mmr_pool_factor: int = 5,
+        legacy_artifacts: str = 'eager',
+        num_shards: int = 0,
+        shard_config: Optional[str] = None,
+        shard_rows: Optional[Tuple[int, int]] = None,
+        max_body_chars: Optional[int] = 20000,
+        max_history_tokens: Optional[int] = 20000,
+        score_chunk_size: int = 256,
+        live_index_size: int = 0,
+        live_index_max_age: float = 86400.0,
+        max_interests: int = 1,
+        interest_threshold: float = 0.3,
+        interest_pooling: str = 'max',
+        field_weights: Optional[Dict[str, float]] = None,
+        field_cache_size: int = 10000,
+        vectorize_workers: int = 0,
+        parallel_min_texts: int = 2000,
+        scan_block_rows: int = 0,
+        corpus_mmap: bool = False,
+        cold_start_order: str = 'hot'
+    ):
+        """
+        legacy_artifacts controls when tfidf_matrix.pkl and processed_posts
+        (only used by recommend_from_history) are loaded:
+        'eager' in load_model(), 'background' in a thread started by
+        load_model(), or 'lazy' on the first legacy request.
+        
+        num_shards > 1 serves recommend_from_history from that many worker
+        processes, each scanning one row shard (see sharded_scoring). The
+        workers fork from load_model(), so the legacy artifacts are then
+        loaded eagerly whatever ``legacy_artifacts`` says, and load_model()
+        must run on the main thread before other threads start (otherwise
+        sharding is disabled with a warning).
+        
+        Multi-node mode (see shard_aggregator): with ``shard_config`` this
+        instance is an aggregator that loads only the vectorizer and queries
+        the shard servers; with ``shard_rows`` it is a shard server that
+        answers score_shard() for that row range. A shard server keeps only
+        its rows of the corpus vectors and posts (see _keep_shard_rows), so
+        its other endpoints see just that slice.
+        
+        Request size limits: candidate titles and bodies are cut to
+        ``max_body_chars`` before cleaning, and histories to their first
+        ``max_history_tokens`` tokens (None disables a limit). Candidates
+        are scored ``score_chunk_size`` at a time so a RequestBudget
+        deadline can stop scoring between chunks.
+        
+        live_index_size > 0 keeps up to that many recently scored or
+        ingested candidates, for at most ``live_index_max_age`` seconds, in
+        a LiveIndex served by recommend_live().
+        
+        max_interests > 1 enables multi-interest profiles: history items are
+        vectorized separately and clustered into up to that many centroids
+        (see interest_clustering); candidates and posts are scored against
+        all of them and pooled by ``interest_pooling`` ('max' or
+        'softmax'). Server-side profiles and sharded scoring keep a single
+        profile vector.
+        
+        Candidate vectors are cached (up to ``field_cache_size`` vectors).
+        Without ``field_weights`` a candidate is vectorized as
+        "title title body", like the corpus posts were at training time.
+        With them (or with per-request weights in score_candidates) title
+        and body are vectorized separately and combined with the weights;
+        this ranks differently, see field_vectors.
+        
+        vectorize_workers > 1 cleans and vectorizes batches of at least
+        ``parallel_min_texts`` uncached candidate texts on that many worker
+        processes (see parallel_vectorize); smaller batches stay in the
+        request thread. Like the shard workers they fork from load_model()
+        on the main thread only.
+        
+        scan_block_rows > 0 serves recommend_from_history and first pages
+        with a streaming scan in blocks of that many rows that keeps only
+        a running top-k (see streaming_scan). corpus_mmap=True loads the
+        TF-IDF matrix from memory-mapped arrays saved by streaming_scan,
+        if present.
+        
+        Empty histories, and histories without any known term, are served
+        the precomputed ``cold_start_order`` ranking ('hot', 'popular' or
+        'recent', see cold_start) instead of a corpus scan.
+        """
         super().__init__(models_dir)
+        if legacy_artifacts not in ('eager', 'background', 'lazy'):
+            raise ValueError(f"Unknown legacy_artifacts mode: {legacy_artifacts}")
+        if interest_pooling not in POOLING_METHODS:
+            raise ValueError(f"Unknown interest_pooling method: {interest_pooling}")
+        if cold_start_order not in COLD_START_ORDERS:
+            raise ValueError(f"Unknown cold_start_order: {cold_start_order}")
+        if field_weights and validate_field_weights(field_weights):
+            raise ValueError(f"Invalid field_weights: {validate_field_weights(field_weights)}")
         self.vectorizer = None
         self.tfidf_matrix = None
-        self.df = None
+        self.posts = None
         self.metadata = None
+        self.priors = None
+        self.subreddit_partitions = None
+        self.neighbor_graph = None
+        self._row_by_id = None
+        # Recommender over the same corpus whose posts, priors and cold-start
+        # rankings this one uses instead of loading its own (see hybrid)
+        self.post_artifacts_from = None
+        
+        # Legacy artifacts: not_loaded -> loading -> loaded / missing
+        self.legacy_artifacts = legacy_artifacts
+        self.legacy_state = 'not_loaded'
+        self._legacy_lock = threading.Lock()
+        
+        # Ranked candidate lists for cursor-based pagination
+        self.cursor_pool_size = cursor_pool_size
+        self.ranking_cache = RankingCache(ttl_seconds=cursor_ttl, max_entries=max_cursors)
+        
+        # Candidate pool size (as a multiple of top_k) for MMR re-ranking
+        self.mmr_pool_factor = mmr_pool_factor
+        
+        # Scatter-gather workers, started once the legacy artifacts are loaded
+        self.num_shards = num_shards
+        self.shards = None
+        self.shard_config = shard_config
+        self.shard_rows = tuple(shard_rows) if shard_rows is not None else None
+        self._shard_score = None
+        
+        # Per-request input limits and deadline granularity
+        self.max_body_chars = max_body_chars
+        self.max_history_tokens = max_history_tokens
+        self.score_chunk_size = score_chunk_size
+        
+        # Fresh candidates (live Lemmy posts) for recommend_live
+        self.live_index = None
+        if live_index_size > 0:
+            self.live_index = LiveIndex(max_items=live_index_size, max_age_seconds=live_index_max_age)
+        
+        # Multi-interest profiles (1 = one combined history vector)
+        self.max_interests = max_interests
+        self.interest_threshold = interest_threshold
+        self.interest_pooling = interest_pooling
+        
+        # Per-field candidate vectors, combined at scoring time (None: one
+        # combined-text vector, as in training)
+        self.field_weights = dict(field_weights) if field_weights else None
+        self.field_cache = FieldVectorCache(max_entries=field_cache_size)
+        
+        # Process pool for very large candidate batches, forked after loading
+        self.vectorize_workers = vectorize_workers
+        self.parallel_min_texts = parallel_min_texts
+        self.vectorize_pool = None
+        
+        # Bounded-memory corpus scan (0 = one score vector over the corpus)
+        self.scan_block_rows = scan_block_rows
+        self.corpus_mmap = corpus_mmap
+        
+        # Precomputed rankings for users without a usable history
+        self.cold_start_order = cold_start_order
+        self.cold_start = None
+        self.cold_start_posts = None
     
     def load_model(self):
         """Load TF-IDF model artifacts from disk."""
@@ -37,33 +226,257 @@ class TFIDFRecommender(BaseRecommender):
         with open(f'{self.models_dir}/tfidf_vectorizer.pkl', 'rb') as f:
             self.vectorizer = pickle.load(f)
         
+        # Load metadata
+        try:
+            with open(f'{self.models_dir}/model_metadata.pkl', 'rb') as f:
+                self.metadata = pickle.load(f)
+        except FileNotFoundError:
+            print("  Warning: model_metadata.pkl not found")
+            self.metadata = None
+        
+        # Row ranges per subreddit (models trained with partitioning only)
+        if self.metadata:
+            self.subreddit_partitions = self.metadata.get('subreddit_partitions')
+        
+        self.is_loaded = True
+        print(f"✓ Model loaded: {self.metadata['num_posts']:,} posts, "
+              f"{self.metadata['num_features']:,} features")
+        
+        if self.shard_config:
+            # Aggregator: the corpus lives on the shard servers
+            self._start_vectorize_pool()
+            from shard_aggregator import ShardAggregator
+            self.shards = ShardAggregator.from_config(self.shard_config)
+            self.legacy_state = 'remote'
+            # No posts here: cold-start requests are served from the lists
+            # and post records saved at training time
+            self.cold_start = ColdStartRankings.load(self.models_dir)
+            self.cold_start_posts = load_cold_start_posts(self.models_dir)
+            if self.cold_start is None or self.cold_start_posts is None:
+                print("  Warning: cold_start.npz / cold_start_posts.pkl not found, "
+                      "cold-start requests return no posts")
+                self.cold_start = None
+            print(f"✓ Aggregating {self.shards.num_shards} shard servers")
+            return
+        
+        # Shard workers fork here, once the artifacts are loaded, rather
+        # than from the legacy-loader thread
+        if self.legacy_artifacts == 'eager' or self.shard_rows is not None or self.num_shards > 1:
+            self._ensure_legacy_loaded()
+        
+        # After the shards fork (the pool runs handler threads in this
+        # process) and before the legacy-loader thread starts
+        self._start_vectorize_pool()
+        
+        if self.legacy_artifacts == 'background' and self.legacy_state == 'not_loaded':
+            threading.Thread(
+                target=self._ensure_legacy_loaded, name='legacy-loader', daemon=True
+            ).start()
+    
+    def _ensure_legacy_loaded(self):
+        """Load the artifacts used only by recommend_from_history, once."""
+        if self.legacy_state in ('loaded', 'missing', 'remote'):
+            return
+        
+        with self._legacy_lock:
+            if self.legacy_state in ('loaded', 'missing', 'remote'):
+                return
+            self.legacy_state = 'loading'
+            self._load_legacy_artifacts()
+            if not self._corpus_vectors_loaded() or self.posts is None:
+                self.legacy_state = 'missing'
+            else:
+                if self.shard_rows is not None:
+                    self._shard_score = self._shard_scorer(0, self.tfidf_matrix.shape[0])
+                    print(f"✓ Serving shard rows {self.shard_rows[0]:,}-{self.shard_rows[1]:,}")
+                else:
+                    self._start_shards()
+                self.legacy_state = 'loaded'
+    
+    def _load_legacy_artifacts(self):
+        """Load tfidf_matrix, processed posts, the ranking priors and cold-start rankings."""
+        print("Loading legacy recommendation artifacts...")
+        
+        self._load_corpus_vectors()
+        
+        source = self.post_artifacts_from
+        if source is not None:
+            source._ensure_legacy_loaded()
+            self.posts, self.priors, self.cold_start = source.posts, source.priors, source.cold_start
+            print("✓ Legacy artifacts loaded (posts shared)")
+            return
+        
+        # Optional: Open processed posts (only needed for legacy recommend_from_history).
+        # The Arrow store is memory-mapped; columns are read on first use.
+        self.posts = PostStore.load(self.models_dir)
+        if self.posts is None:
+            print("  Warning: processed_posts not found (not needed for candidate scoring)")
+        
+        if self.shard_rows is not None:
+            self._keep_shard_rows()
+        
+        # Precompute freshness/popularity priors for blended ranking
+        if self.posts is not None:
+            self.priors = PostPriors.from_dataframe(self.posts.frame(['created_utc', 'score']))
+        
+        # Cold-start rankings are built at training time (for all rows, so a
+        # shard server ranks its own); rank older models now
+        self.cold_start = ColdStartRankings.load(self.models_dir) if self.shard_rows is None else None
+        if self.cold_start is None and self.priors is not None:
+            print("  Warning: cold_start.npz not found, ranking cold-start posts now")
+            subreddit_names = None
+            if 'subreddit.name' in self.posts.columns:
+                subreddit_names = self.posts.column('subreddit.name').astype(str).to_numpy()
+            self.cold_start = ColdStartRankings.build(self.priors, subreddit_names)
+        
+        # Optional: precomputed item-to-item neighbors (only needed for similar_posts;
+        # the graph links rows across shards, so shard servers do without it)
+        if self.shard_rows is None:
+            self.neighbor_graph = load_neighbor_graph(self.models_dir)
+        if self.neighbor_graph is None and self.shard_rows is None:
+            print("  Warning: neighbor_graph.npz not found (not needed for recommendations)")
+        
+        print("✓ Legacy artifacts loaded")
+    
+    def _keep_shard_rows(self):
+        """
+        Drop everything outside shard_rows; row i of the slice is corpus
+        row shard_rows[0] + i.
+        
+        Memory-mapped vectors (corpus_mmap) and the Arrow post store are
+        sliced without reading the other rows. A pickled matrix or post
+        DataFrame is loaded whole once and the rest freed here.
+        """
+        start, stop = self.shard_rows
+        if self.tfidf_matrix is not None:
+            sliced = row_slice(self.tfidf_matrix, start, stop)
+            # Memory-mapped arrays are read-only views of the files; pickled
+            # rows are copied so the full matrix can be freed
+            self.tfidf_matrix = sliced if not sliced.data.flags.writeable else sliced.copy()
+        if self.posts is not None:
+            self.posts = self.posts.slice(start, stop)
+        
+        # Subreddit row ranges in slice coordinates
+        if self.subreddit_partitions is not None:
+            self.subreddit_partitions = {
+                name: (max(lo, start) - start, min(hi, stop) - start)
+                for name, (lo, hi) in self.subreddit_partitions.items()
+                if lo < stop and hi > start
+            }
+    
+    def _load_corpus_vectors(self):
+        """Load the per-post vectors that recommend_from_history scans."""
         # Optional: Load TF-IDF matrix (only needed for legacy recommend_from_history)
+        if self.corpus_mmap:
+            self.tfidf_matrix = load_matrix_mmap(self.models_dir)
+            if self.tfidf_matrix is not None:
+                print("✓ TF-IDF matrix memory-mapped")
+                return
+            print("  Warning: memory-mapped TF-IDF matrix not found, loading tfidf_matrix.pkl")
         try:
             with open(f'{self.models_dir}/tfidf_matrix.pkl', 'rb') as f:
                 self.tfidf_matrix = pickle.load(f)
         except FileNotFoundError:
             print("  Warning: tfidf_matrix.pkl not found (not needed for candidate scoring)")
             self.tfidf_matrix = None
+    
+    def _corpus_vectors_loaded(self) -> bool:
+        return self.tfidf_matrix is not None
+    
+    def _post_vectors(self, indices) -> Any:
+        """Vectors of the posts at ``indices`` (used for MMR re-ranking)."""
+        return self.tfidf_matrix[indices]
+    
+    def _vectorize(self, cleaned_texts: List[str]):
+        """Vectorize already cleaned texts, one row per text."""
+        return self.vectorizer.transform(cleaned_texts)
+    
+    def _start_vectorize_pool(self):
+        """Fork the vectorization workers; they inherit the vectorizer."""
+        if self.vectorize_workers <= 1 or not self._fork_allowed('parallel vectorization'):
+            return
         
-        # Optional: Load processed dataframe (only needed for legacy recommend_from_history)
         try:
-            with open(f'{self.models_dir}/processed_posts.pkl', 'rb') as f:
-                self.df = pickle.load(f)
-        except FileNotFoundError:
-            print("  Warning: processed_posts.pkl not found (not needed for candidate scoring)")
-            self.df = None
+            self.vectorize_pool = VectorizePool(
+                self._clean_and_vectorize_local, self.vectorize_workers, self.parallel_min_texts
+            )
+            print(f"✓ Started {self.vectorize_workers} vectorization workers "
+                  f"(batches of {self.vectorize_pool.min_texts}+ texts)")
+        except (RuntimeError, OSError) as e:
+            print(f"  Warning: parallel vectorization disabled: {e}")
+            self.vectorize_pool = None
+    
+    @staticmethod
+    def _fork_allowed(workers: str) -> bool:
+        """
+        Worker processes fork only from the main thread: a fork from another
+        thread (model loader, request handler) copies whatever locks the
+        process's other threads hold at that moment.
+        """
+        if threading.current_thread() is threading.main_thread():
+            return True
+        print(f"  Warning: {workers} disabled: the model is loading on thread "
+              f"{threading.current_thread().name}; load it on the main thread "
+              f"(MODEL_LOAD_MODE=eager) to fork workers")
+        return False
+    
+    def _start_shards(self):
+        """Fork the shard workers; they inherit the loaded artifacts."""
+        if self.num_shards <= 1 or not self._fork_allowed('sharded scoring'):
+            return
+        
+        # Read lazily loaded columns before forking so every worker shares them
+        if 'id' in self.posts.columns:
+            self.posts.column('id')
         
-        # Load metadata
         try:
-            with open(f'{self.models_dir}/model_metadata.pkl', 'rb') as f:
-                self.metadata = pickle.load(f)
-        except FileNotFoundError:
-            print("  Warning: model_metadata.pkl not found")
-            self.metadata = None
+            self.shards = ShardPool(self._shard_scorer, self.tfidf_matrix.shape[0], self.num_shards)
+            print(f"✓ Started {self.shards.num_shards} scoring shards")
+        except RuntimeError as e:
+            print(f"  Warning: sharded scoring disabled: {e}")
+            self.shards = None
+    
+    def _shard_scorer(self, start: int, stop: int):
+        """
+        Build the scoring function of one shard (runs in the worker process).
         
-        self.is_loaded = True
-        print(f"✓ Model loaded: {self.metadata['num_posts']:,} posts, "
-              f"{self.metadata['num_features']:,} features")
+        The function applies the same filters and ranking as the in-process
+        path, restricted to rows [start, stop), and returns the local top-k.
+        """
+        # The rows are views of the parent's matrix (shared copy-on-write);
+        # only their inverse norms are per worker. rows @ h.T divided by the
+        # row norms is what cosine_similarity computes for a normalized h
+        matrix = row_slice(self.tfidf_matrix, start, stop)
+        norms = row_norms(matrix)
+        inverse_norms = np.divide(1.0, norms, out=np.zeros_like(norms), where=norms > 0)
+        ids = self.posts.column('id').iloc[start:stop] if 'id' in self.posts.columns else None
+        rows = slice(start, stop)
+        
+        def score(request):
+            similarity_scores = (matrix @ request['history_vector'].T).toarray().ravel() * inverse_norms
+            valid_mask = similarity_scores >= request['min_score']
+            
+            if request['row_ranges'] is not None:
+                partition_mask = np.zeros(stop - start, dtype=bool)
+                for range_start, range_stop in request['row_ranges']:
+                    lo, hi = max(range_start, start), min(range_stop, stop)
+                    if lo < hi:
+                        partition_mask[lo - start:hi - start] = True
+                valid_mask &= partition_mask
+            
+            if request['exclude_ids'] and ids is not None:
+                valid_mask &= ~ids.isin(set(request['exclude_ids'])).to_numpy()
+            
+            ranking_scores = similarity_scores
+            if request['blend']:
+                ranking_scores = self.priors.log_blend(
+                    similarity_scores, request['blend'], request['now'], rows
+                )
+            
+            top = local_top_k(ranking_scores, np.where(valid_mask)[0], request['k'])
+            return top + start, ranking_scores[top], similarity_scores[top]
+        
+        return score
     
     @staticmethod
     def clean_text(text: str) -> str:
@@ -81,7 +494,14 @@ class TFIDFRecommender(BaseRecommender):
     def score_candidates(
         self,
         history_contents: List[str],
-        candidates: List[Dict[str, Any]]
+        candidates: List[Dict[str, Any]],
+        diversity: float = 0.0,
+        top_k: Optional[int] = None,
+        history_counts: Optional[Tuple[np.ndarray, np.ndarray]] = None,
+        budget: Optional[RequestBudget] = None,
+        ingest: bool = False,
+        field_weights: Optional[Dict[str, float]] = None,
+        dedup_distance: Optional[int] = None
     ) -> List[Dict[str, Any]]:
         """
         Score candidate posts based on user's reading history.
@@ -89,60 +509,247 @@ class TFIDFRecommender(BaseRecommender):
         Args:
             history_contents: User's reading history
             candidates: List of dicts with 'id', 'title', 'body'
-            
+            diversity: MMR lambda in [0, 1]; when > 0 the result is re-ranked
+                for diversity and returned in MMR order
+            top_k: Number of candidates to select when re-ranking (default: all)
+            history_counts: Accumulated term counts of a server-side profile,
+                used instead of history_contents
+            budget: Request deadline, checked between chunks of candidates.
+                Once it has passed, the remaining candidates keep score 0.0
+                (after the scored ones when re-ranking) and the budget is
+                marked degraded. Batches large enough for the vectorization
+                pool are vectorized up front in one step, so only their
+                scoring is chunked.
+            ingest: Also add the (scored) candidates to the live index,
+                reusing their vectors
+            field_weights: Title/body weights for this request (default:
+                the model's field_weights, or the combined text)
+            dedup_distance: If given, near-duplicates (SimHash within this
+                many bits, see simhash) are collapsed into their best-scoring
+                candidate, which lists the others in 'duplicate_ids'
+        
         Returns:
             List of {'id': str, 'similarity_score': float}
         """
         if not self.is_loaded:
             raise RuntimeError("Model not loaded. Call load_model() first.")
         
-        if not history_contents or not candidates:
-            return [{'id': c.get('id', ''), 'similarity_score': 0.0} for c in candidates]
+        if not candidates:
+            return []
         
-        # Build user profile from history
-        combined_history = ' '.join(history_contents)
-        cleaned_history = self.clean_text(combined_history)
+        # Build user profile (one row per interest) from history
+        history_vector = self._interest_vectors(history_contents, history_counts)
         
-        if not cleaned_history:
+        if history_vector is None:
+            if ingest:
+                self.ingest_candidates(candidates)
             return [{'id': c.get('id', ''), 'similarity_score': 0.0} for c in candidates]
         
-        # Vectorize user profile
-        history_vector = self.vectorizer.transform([cleaned_history])
+        # Chunks are too small for the vectorization pool; large batches
+        # go to it whole (only the uncached texts are vectorized)
+        batch_matrix = None
+        if self.vectorize_pool is not None and self.vectorize_pool.accepts(len(candidates)):
+            batch_matrix = self.candidate_vectors(candidates, field_weights)
         
-        # Process and vectorize each candidate
-        results = []
-        for candidate in candidates:
-            candidate_id = candidate.get('id', '')
-            title = candidate.get('title', '')
-            body = candidate.get('body', '')
-            
-            # Combine title and body (title weighted 2x)
-            combined_text = f"{title} {title} {body}"
-            cleaned_text = self.clean_text(combined_text)
-            
-            if not cleaned_text:
-                results.append({'id': candidate_id, 'similarity_score': 0.0})
-                continue
-            
-            # Vectorize candidate
-            candidate_vector = self.vectorizer.transform([cleaned_text])
-            
-            # Calculate similarity
-            similarity = cosine_similarity(history_vector, candidate_vector)[0][0]
+        # Vectorize and score in chunks, checking the deadline in between
+        similarities = np.zeros(len(candidates))
+        chunk_vectors = []
+        num_scored = len(candidates)
+        for start in range(0, len(candidates), self.score_chunk_size):
+            if budget is not None and budget.expired():
+                budget.mark_degraded('deadline')
+                num_scored = start
+                break
             
-            results.append({
-                'id': candidate_id,
-                'similarity_score': float(similarity)
-            })
+            if batch_matrix is not None:
+                chunk_matrix = batch_matrix[start:start + self.score_chunk_size]
+            else:
+                chunk_matrix = self.candidate_vectors(
+                    candidates[start:start + self.score_chunk_size], field_weights
+                )
+            similarities[start:start + chunk_matrix.shape[0]] = (
+                self._pool_interests(cosine_similarity(history_vector, chunk_matrix))
+            )
+            chunk_vectors.append(chunk_matrix)
+        
+        # The live index keeps vectors with the model's field weights; with
+        # request weights they are recombined from the cached field vectors
+        reuse_vectors = ingest and self.live_index is not None and field_weights is None
+        candidate_matrix = None
+        dedup = dedup_distance is not None
+        if num_scored > 0 and (diversity > 0.0 or reuse_vectors or dedup):
+            candidate_matrix = vstack(chunk_vectors) if issparse(chunk_vectors[0]) else np.vstack(chunk_vectors)
+        if ingest and self.live_index is not None and num_scored > 0:
+            if reuse_vectors:
+                self.live_index.add(candidates[:num_scored], candidate_matrix)
+            else:
+                self.ingest_candidates(candidates[:num_scored])
+        
+        # Collapse near-duplicates among the scored candidates
+        keep = np.arange(num_scored)
+        duplicates = {}
+        if dedup and num_scored > 0:
+            keep, duplicates = dedup_candidates(candidate_matrix, similarities[:num_scored], dedup_distance)
+        
+        if diversity > 0.0 and num_scored > 0:
+            selected = mmr_rerank(similarities[keep], candidate_matrix[keep], k=top_k, diversity=diversity)
+            order = list(keep[selected])
+            # Candidates left unscored by the deadline follow in input order
+            order += range(num_scored, len(candidates))
+            if top_k is not None:
+                order = order[:top_k]
+        else:
+            order = list(keep) + list(range(num_scored, len(candidates)))
         
+        results = []
+        for i in order:
+            result = {
+                'id': candidates[i].get('id', ''),
+                'similarity_score': float(similarities[i])
+            }
+            if i in duplicates:
+                result['duplicate_ids'] = [candidates[j].get('id', '') for j in duplicates[i]]
+            results.append(result)
         return results
     
+    def candidate_vectors(
+        self,
+        candidates: List[Dict[str, Any]],
+        field_weights: Optional[Dict[str, float]] = None
+    ):
+        """
+        Vectors of candidate posts, one row per candidate.
+        
+        Without field weights (neither ``field_weights`` nor the model's),
+        each candidate is vectorized as "title title body", the text the
+        corpus vectors were built from. With them, titles and bodies are
+        vectorized as separate fields and combined as the normalized
+        weighted sum. Vectors are cached by text, uncached ones vectorized
+        in one batch (per field). Each field is cut to ``max_body_chars``
+        before cleaning; empty texts become all-zero rows.
+        """
+        field_weights = field_weights or self.field_weights
+        if field_weights is None:
+            return self.field_cache.vectors(
+                COMBINED_FIELD,
+                [combined_text(self._field_text(c, 'title'), self._field_text(c, 'body')) for c in candidates],
+                self._clean_and_vectorize
+            )
+        
+        field_vectors = {
+            field: self.field_cache.vectors(
+                field,
+                [self._field_text(c, field) for c in candidates],
+                self._clean_and_vectorize
+            )
+            for field in FIELDS
+            if field_weights.get(field, 0.0) > 0
+        }
+        return combine_fields(field_vectors, field_weights)
+    
+    def _clean_and_vectorize(self, texts: List[str]):
+        """Clean and vectorize raw texts; large batches go to the vectorization pool."""
+        if self.vectorize_pool is not None and self.vectorize_pool.accepts(len(texts)):
+            return self.vectorize_pool.vectorize(texts)
+        return self._clean_and_vectorize_local(texts)
+    
+    def _clean_and_vectorize_local(self, texts: List[str]):
+        return self._vectorize([self.clean_text(text) for text in texts])
+    
+    def _field_text(self, candidate: Dict[str, Any], field: str) -> str:
+        """A candidate field cut to max_body_chars ('' if missing or not a string)."""
+        text = candidate.get(field, '')
+        if not isinstance(text, str):
+            return ''
+        if self.max_body_chars is not None:
+            return text[:self.max_body_chars]
+        return text
+    
+    @property
+    def supports_pagination(self) -> bool:
+        """Cursor pages rank the corpus here, which an aggregator does not hold."""
+        return self.legacy_state != 'remote'
+    
+    @property
+    def supports_similar_posts(self) -> bool:
+        """The neighbor graph is not loaded by aggregators."""
+        return self.legacy_state != 'remote'
+    
+    @property
+    def supports_live_index(self) -> bool:
+        return self.live_index is not None
+    
+    def ingest_candidates(self, candidates: List[Dict[str, Any]]) -> int:
+        """
+        Vectorize candidates into the live index.
+        
+        Returns:
+            Number of candidates added (those without an 'id' are skipped)
+        """
+        if not self.is_loaded:
+            raise RuntimeError("Model not loaded. Call load_model() first.")
+        if self.live_index is None:
+            raise NotImplementedError("Live index is disabled (live_index_size=0)")
+        if not candidates:
+            return 0
+        
+        return self.live_index.add(candidates, self.candidate_vectors(candidates))
+    
+    def recommend_live(
+        self,
+        history_contents: List[str],
+        top_k: int = 10,
+        min_score: float = 0.0,
+        exclude_ids: List[str] = None,
+        diversity: float = 0.0,
+        history_counts: Optional[Tuple[np.ndarray, np.ndarray]] = None,
+        budget: Optional[RequestBudget] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Recommend from the live index instead of the training corpus.
+        
+        Posts are the stored candidate dicts (without body) plus
+        'similarity_score' and 'ingested_at'. Diversity re-ranks a pool of
+        ``mmr_pool_factor`` * top_k as in recommend_from_history.
+        """
+        if not self.is_loaded:
+            raise RuntimeError("Model not loaded. Call load_model() first.")
+        if self.live_index is None:
+            raise NotImplementedError("Live index is disabled (live_index_size=0)")
+        
+        history_vector = self._interest_vectors(history_contents, history_counts)
+        if history_vector is None:
+            return []
+        
+        pool_size = top_k * self.mmr_pool_factor if diversity > 0.0 else top_k
+        posts, scores, vectors = self.live_index.search(
+            history_vector,
+            pool_size,
+            min_score=min_score,
+            exclude_ids=exclude_ids,
+            budget=budget,
+            include_vectors=diversity > 0.0,
+            pool=self._pool_interests
+        )
+        
+        order = range(min(top_k, len(posts)))
+        if diversity > 0.0 and posts:
+            order = mmr_rerank(scores, vectors, k=min(top_k, len(posts)), diversity=diversity)
+        
+        return [{**posts[i], 'similarity_score': float(scores[i])} for i in order]
+    
     def recommend_from_history(
         self,
         history_contents: List[str],
         top_k: int = 10,
         min_score: float = 0.0,
-        exclude_ids: List[str] = None
+        exclude_ids: List[str] = None,
+        diversity: float = 0.0,
+        blend: Optional[Dict[str, float]] = None,
+        subreddits: Optional[List[str]] = None,
+        exclude_subreddits: Optional[List[str]] = None,
+        history_counts: Optional[Tuple[np.ndarray, np.ndarray]] = None,
+        budget: Optional[RequestBudget] = None
     ) -> List[Dict[str, Any]]:
         """
         [LEGACY] Recommend posts from training dataset based on history.
@@ -152,80 +759,798 @@ class TFIDFRecommender(BaseRecommender):
         2. Vectorize the user profile
         3. Calculate cosine similarity with all posts
         4. Return top-K most similar posts (excluding already seen)
+        5. Optionally re-rank a larger top pool with MMR (diversity > 0)
+        
+        If ``blend`` is given, step 4 ranks by
+        cos^alpha * decay(created_utc)^beta * f(score)^gamma instead of
+        cosine alone (see score_blending). min_score still applies to cosine.
+        
+        ``subreddits`` / ``exclude_subreddits`` restrict scoring to the
+        matching subreddit row ranges. ``history_counts`` (a server-side
+        profile) replaces history_contents when given.
+        
+        With a ``budget``, the corpus scan stops at the deadline and ranks
+        only the rows scored so far; if none were, the most popular posts
+        are returned instead. Either way the budget is marked degraded.
+        Sharded scoring does not check the deadline.
+        
+        With scan_block_rows > 0 the scan streams over row blocks and keeps
+        only the top rows (the MMR pool when diversifying).
+        
+        A history with no known term (or none at all) skips the scan and
+        gets the cold-start ranking, with similarity_score 0.
         """
         if not self.is_loaded:
             raise RuntimeError("Model not loaded. Call load_model() first.")
+        self._ensure_legacy_loaded()
         
-        if not history_contents:
+        row_ranges = self._partition_ranges(subreddits, exclude_subreddits)
+        if self.shards is not None and self.shards.alive:
+            return self._recommend_sharded(
+                history_contents, history_counts, top_k, min_score,
+                exclude_ids, diversity, blend, row_ranges, subreddits
+            )
+        
+        if self.scan_block_rows > 0:
+            return self._recommend_streaming(
+                history_contents, history_counts, top_k, min_score,
+                exclude_ids, diversity, blend, row_ranges, budget, subreddits
+            )
+        
+        similarity_scores = self._score_history(history_contents, row_ranges, history_counts, budget)
+        if similarity_scores is None:
+            return self._cold_start_recommendations(top_k, exclude_ids, row_ranges, subreddits)
+        
+        valid_indices = self._valid_indices(similarity_scores, min_score, exclude_ids, row_ranges)
+        
+        if len(valid_indices) == 0:
+            if budget is not None and budget.degraded:
+                return self._fallback_recommendations(top_k, exclude_ids, row_ranges, budget, subreddits)
             return []
         
-        # Combine all history texts into one document
-        combined_history = ' '.join(history_contents)
-        cleaned_history = self.clean_text(combined_history)
+        ranking_scores = self._ranking_scores(similarity_scores, blend)
         
-        if not cleaned_history:
+        # Get top-K
+        valid_scores = ranking_scores[valid_indices]
+        top_k = min(top_k, len(valid_indices))
+        
+        if diversity > 0.0:
+            # Diversify within a relevance pool a few times larger than top-K
+            pool_size = min(top_k * self.mmr_pool_factor, len(valid_indices))
+            pool_local = np.argpartition(-valid_scores, pool_size - 1)[:pool_size]
+            pool_indices = valid_indices[pool_local]
+            relevance = ranking_scores[pool_indices]
+            if blend:
+                relevance = np.exp(relevance)
+            order = mmr_rerank(
+                relevance,
+                self._post_vectors(pool_indices),
+                k=top_k,
+                diversity=diversity
+            )
+            top_indices = pool_indices[order]
+        else:
+            top_local_indices = valid_scores.argsort()[-top_k:][::-1]
+            top_indices = valid_indices[top_local_indices]
+        
+        return self._format_ranked(
+            top_indices, similarity_scores[top_indices], ranking_scores[top_indices], blend
+        )
+    
+    def _recommend_streaming(
+        self,
+        history_contents: List[str],
+        history_counts: Optional[Tuple[np.ndarray, np.ndarray]],
+        top_k: int,
+        min_score: float,
+        exclude_ids: Optional[List[str]],
+        diversity: float,
+        blend: Optional[Dict[str, float]],
+        row_ranges: Optional[List[Tuple[int, int]]],
+        budget: Optional[RequestBudget],
+        subreddits: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """recommend_from_history via the bounded-memory streaming scan."""
+        pool_size = top_k * self.mmr_pool_factor if diversity > 0.0 else top_k
+        top = self._stream_top_rows(
+            history_contents, history_counts, pool_size, min_score,
+            exclude_ids, row_ranges, blend, budget
+        )
+        if top is None:
+            return self._cold_start_recommendations(top_k, exclude_ids, row_ranges, subreddits)
+        
+        indices, ranking_scores, similarity_scores = top
+        if len(indices) == 0:
+            if budget is not None and budget.degraded:
+                return self._fallback_recommendations(top_k, exclude_ids, row_ranges, budget, subreddits)
             return []
         
-        # Vectorize user's history
+        if diversity > 0.0:
+            relevance = np.exp(ranking_scores) if blend else ranking_scores
+            order = mmr_rerank(
+                relevance,
+                self._post_vectors(indices),
+                k=min(top_k, len(indices)),
+                diversity=diversity
+            )
+        else:
+            order = np.arange(min(top_k, len(indices)))
+        
+        return self._format_ranked(
+            indices[order], similarity_scores[order], ranking_scores[order], blend
+        )
+    
+    def _stream_top_rows(
+        self,
+        history_contents: List[str],
+        history_counts: Optional[Tuple[np.ndarray, np.ndarray]],
+        k: int,
+        min_score: float,
+        exclude_ids: Optional[List[str]],
+        row_ranges: Optional[List[Tuple[int, int]]],
+        blend: Optional[Dict[str, float]],
+        budget: Optional[RequestBudget] = None
+    ) -> Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """
+        Best ``k`` rows as (rows, ranking scores, similarity scores), best
+        first, or None if the history is empty.
+        """
+        history_vector = self._interest_vectors(history_contents, history_counts)
+        if history_vector is None:
+            return None
+        
+        rank_block = None
+        if blend:
+            if self.priors is None:
+                raise RuntimeError("Blended ranking requires processed_posts.pkl")
+            
+            def rank_block(similarity, start, stop):
+                return self.priors.log_blend(similarity, blend, rows=slice(start, stop))
+        
+        return stream_top_k(
+            lambda start, stop: self._scan_rows(history_vector, start, stop),
+            row_ranges if row_ranges is not None else [(0, self._num_corpus_rows())],
+            k,
+            self.scan_block_rows,
+            min_score=min_score,
+            excluded_rows=self._excluded_rows(exclude_ids),
+            rank_block=rank_block,
+            budget=budget
+        )
+    
+    def _excluded_rows(self, exclude_ids: Optional[List[str]]) -> np.ndarray:
+        """Sorted rows of the known ``exclude_ids``."""
+        rows = set()
+        for post_id in exclude_ids or []:
+            try:
+                rows.add(self._row_of(post_id))
+            except KeyError:
+                continue
+        return np.array(sorted(rows), dtype=np.int64)
+    
+    def _recommend_sharded(
+        self,
+        history_contents: List[str],
+        history_counts: Optional[Tuple[np.ndarray, np.ndarray]],
+        top_k: int,
+        min_score: float,
+        exclude_ids: Optional[List[str]],
+        diversity: float,
+        blend: Optional[Dict[str, float]],
+        row_ranges: Optional[List[Tuple[int, int]]],
+        subreddits: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        recommend_from_history via scatter-gather over the shard workers.
+        
+        A history with no known term gets the cold-start ranking (from the
+        saved cold-start posts on an aggregator).
+        """
+        history_vector = self._history_vector(history_contents, history_counts)
+        if history_vector is None:
+            return self._cold_start_recommendations(top_k, exclude_ids, row_ranges, subreddits)
+        
+        # Remote shards check for their own priors
+        if blend and self.priors is None and not self.shards.remote:
+            raise RuntimeError("Blended ranking requires processed_posts.pkl")
+        
+        pool_size = top_k * self.mmr_pool_factor if diversity > 0.0 else top_k
+        hits = self.shards.top_k({
+            'history_vector': normalize(history_vector),
+            'min_score': min_score,
+            'exclude_ids': list(exclude_ids or []),
+            'row_ranges': row_ranges,
+            'blend': blend,
+            # One reference time for all shards' decay priors
+            'now': time.time(),
+            'include_vectors': diversity > 0.0
+        }, pool_size)
+        
+        if len(hits.indices) == 0:
+            return []
+        
+        order = np.arange(len(hits.indices))
+        if diversity > 0.0:
+            relevance = np.exp(hits.ranking_scores) if blend else hits.ranking_scores
+            vectors = hits.vectors if hits.vectors is not None else self._post_vectors(hits.indices)
+            order = mmr_rerank(
+                relevance,
+                vectors,
+                k=min(top_k, len(hits.indices)),
+                diversity=diversity
+            )
+        
+        if hits.posts is None:
+            return self._format_ranked(
+                hits.indices[order], hits.similarity_scores[order], hits.ranking_scores[order], blend
+            )
+        
+        # Remote shards already formatted their posts
+        results = [dict(hits.posts[i]) for i in order]
+        if blend:
+            for post, i in zip(results, order):
+                post['blended_score'] = float(np.exp(hits.ranking_scores[i]))
+        return results
+    
+    def score_shard(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Answer an aggregator's top-k request for this shard's rows.
+        
+        Takes and returns JSON-friendly dicts (see shard_aggregator).
+        """
+        if not self.is_loaded:
+            raise RuntimeError("Model not loaded. Call load_model() first.")
+        if self._shard_score is None:
+            raise RuntimeError("This instance is not a shard server (shard_rows not set)")
+        if request.get('blend') and self.priors is None:
+            raise RuntimeError("Blended ranking requires processed_posts.pkl")
+        
+        # The aggregator speaks corpus rows; this server holds rows offset..
+        offset = self.shard_rows[0]
+        row_ranges = request.get('row_ranges')
+        if row_ranges is not None:
+            row_ranges = [(lo - offset, hi - offset) for lo, hi in row_ranges]
+        indices, ranking_scores, similarity_scores = self._shard_score({
+            **request,
+            'row_ranges': row_ranges,
+            'history_vector': decode_vector(request['history_vector'])
+        })
+        
+        response = {
+            'indices': (indices + offset).tolist(),
+            'ranking_scores': ranking_scores.tolist(),
+            'similarity_scores': similarity_scores.tolist(),
+            'posts': [
+                self._format_post(idx + offset, similarity, post)
+                for idx, similarity, post in zip(indices, similarity_scores, self.posts.rows(indices))
+            ]
+        }
+        if request.get('include_vectors'):
+            response['vectors'] = [encode_vector(self.tfidf_matrix[idx]) for idx in indices]
+        return response
+    
+    def _format_ranked(
+        self,
+        indices: np.ndarray,
+        similarity_scores: np.ndarray,
+        ranking_scores: np.ndarray,
+        blend: Optional[Dict[str, float]] = None
+    ) -> List[Dict[str, Any]]:
+        """Format ranked rows, adding the blended score when blending."""
+        results = self._format_posts(indices, similarity_scores)
+        if blend:
+            for post, ranking_score in zip(results, ranking_scores):
+                post['blended_score'] = float(np.exp(ranking_score))
+        return results
+    
+    def recommend_page(
+        self,
+        history_contents: Optional[List[str]] = None,
+        top_k: int = 10,
+        min_score: float = 0.0,
+        exclude_ids: List[str] = None,
+        cursor: Optional[str] = None,
+        blend: Optional[Dict[str, float]] = None,
+        subreddits: Optional[List[str]] = None,
+        exclude_subreddits: Optional[List[str]] = None,
+        history_counts: Optional[Tuple[np.ndarray, np.ndarray]] = None
+    ) -> Dict[str, Any]:
+        """
+        Cursor-based pagination over recommend_from_history results.
+        
+        The first page (no cursor) scores the corpus once and caches the
+        top ``cursor_pool_size`` candidates. Later pages are served from that
+        list; min_score and exclude_ids are re-applied on every page. A
+        ``blend`` and subreddit filters only affect the first page, where the
+        candidate list is fixed. Without a usable history the pages walk the
+        cold-start ranking.
+        
+        Returns:
+            {'recommendations': [...], 'next_cursor': str or None}
+        
+        Raises:
+            CursorExpiredError: if the cursor is unknown or expired
+        """
+        if not self.is_loaded:
+            raise RuntimeError("Model not loaded. Call load_model() first.")
+        if self.legacy_state == 'remote':
+            raise NotImplementedError("Cursor pagination is not available in aggregator mode")
+        self._ensure_legacy_loaded()
+        
+        if cursor is None:
+            row_ranges = self._partition_ranges(subreddits, exclude_subreddits)
+            if self.scan_block_rows > 0:
+                top = self._stream_top_rows(
+                    history_contents, history_counts, self.cursor_pool_size,
+                    min_score, exclude_ids, row_ranges, blend
+                )
+                if top is None:
+                    indices = self._cold_start_rows(self.cursor_pool_size, exclude_ids, row_ranges, subreddits)
+                    scores = np.zeros(len(indices))
+                else:
+                    indices, _, scores = top
+            else:
+                similarity_scores = self._score_history(history_contents, row_ranges, history_counts)
+                if similarity_scores is None:
+                    indices = self._cold_start_rows(self.cursor_pool_size, exclude_ids, row_ranges, subreddits)
+                    scores = np.zeros(len(indices))
+                else:
+                    valid_indices = self._valid_indices(similarity_scores, min_score, exclude_ids, row_ranges)
+                    pool_size = min(self.cursor_pool_size, len(valid_indices))
+                    
+                    # Partial sort: only the pool needs to be ordered
+                    valid_scores = self._ranking_scores(similarity_scores, blend)[valid_indices]
+                    pool_local = np.argpartition(-valid_scores, pool_size - 1)[:pool_size] if pool_size else valid_indices[:0]
+                    pool_local = pool_local[np.argsort(-valid_scores[pool_local], kind='stable')]
+                    indices = valid_indices[pool_local]
+                    scores = similarity_scores[indices]
+            
+            if len(indices) == 0:
+                return {'recommendations': [], 'next_cursor': None}
+            
+            token = self.ranking_cache.put(indices, scores)
+            offset = 0
+        else:
+            token, _ = RankingCache.parse_cursor(cursor)
+            indices, scores, offset = self.ranking_cache.get(cursor)
+        
+        exclude_set = set(exclude_ids) if exclude_ids else set()
+        selected = []
+        position = offset
+        
+        while position < len(indices) and len(selected) < top_k:
+            idx = indices[position]
+            score = scores[position]
+            position += 1
+            
+            if score < min_score or self._post_id(idx) in exclude_set:
+                continue
+            
+            selected.append(position - 1)
+        
+        results = self._format_posts(indices[selected], scores[selected])
+        
+        next_cursor = None
+        if position < len(indices):
+            next_cursor = RankingCache.make_cursor(token, position)
+        
+        return {'recommendations': results, 'next_cursor': next_cursor}
+    
+    def similar_posts(self, post_id: str, top_k: int = 10) -> List[Dict[str, Any]]:
+        """
+        "More like this" from the precomputed neighbor graph.
+        
+        No scoring happens at request time: the neighbors of the post's row
+        are read straight from the graph (see neighbor_graph).
+        """
+        if not self.is_loaded:
+            raise RuntimeError("Model not loaded. Call load_model() first.")
+        if self.legacy_state == 'remote':
+            raise NotImplementedError("Similar posts are not available in aggregator mode")
+        self._ensure_legacy_loaded()
+        
+        if self.neighbor_graph is None:
+            raise RuntimeError("neighbor_graph.npz not found; run neighbor_graph.py")
+        
+        row = self._row_of(post_id)
+        indices, scores = neighbors_of(self.neighbor_graph, row)
+        return self._format_posts(indices[:top_k], scores[:top_k])
+    
+    def _fallback_recommendations(
+        self,
+        top_k: int,
+        exclude_ids: Optional[List[str]],
+        row_ranges: Optional[List[Tuple[int, int]]],
+        budget: RequestBudget,
+        subreddits: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Most popular posts (by score), for requests whose deadline passed
+        before any row was scored. Served from the cold-start rankings.
+        """
+        budget.mark_degraded('fallback')
+        return self._cold_start_recommendations(top_k, exclude_ids, row_ranges, subreddits, order='popular')
+    
+    def _cold_start_recommendations(
+        self,
+        top_k: int,
+        exclude_ids: Optional[List[str]],
+        row_ranges: Optional[List[Tuple[int, int]]],
+        subreddits: Optional[List[str]] = None,
+        order: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """The first ``top_k`` cold-start posts, with similarity_score 0."""
+        selected = self._cold_start_rows(top_k, exclude_ids, row_ranges, subreddits, order)
+        return self._format_posts(selected, np.zeros(len(selected)))
+    
+    def _cold_start_rows(
+        self,
+        top_k: int,
+        exclude_ids: Optional[List[str]],
+        row_ranges: Optional[List[Tuple[int, int]]],
+        subreddits: Optional[List[str]] = None,
+        order: Optional[str] = None
+    ) -> np.ndarray:
+        """
+        Rows of the cold-start ranking (``order``, default cold_start_order)
+        inside ``row_ranges`` and not excluded. ``subreddits`` only picks
+        the per-subreddit lists to merge; row_ranges does the filtering.
+        """
+        if self.cold_start is None:
+            return np.empty(0, dtype=np.int64)
+        
+        exclude_set = set(exclude_ids) if exclude_ids else set()
+        range_starts = [start for start, _ in row_ranges] if row_ranges is not None else None
+        
+        def accept(row):
+            if range_starts is not None:
+                i = bisect_right(range_starts, row) - 1
+                if i < 0 or row >= row_ranges[i][1]:
+                    return False
+            return not exclude_set or self._post_id(row) not in exclude_set
+        
+        return self.cold_start.top(order or self.cold_start_order, top_k, subreddits, accept)
+    
+    def _row_of(self, post_id: str) -> int:
+        """Row of a post id (KeyError if unknown); the lookup table is built once."""
+        if self._row_by_id is None:
+            with self._legacy_lock:
+                if self._row_by_id is None:
+                    if 'id' in self.posts.columns:
+                        ids = self.posts.column('id').astype(str)
+                    else:
+                        ids = (f"post_{idx}" for idx in range(len(self.posts)))
+                    self._row_by_id = {post_id: row for row, post_id in enumerate(ids)}
+        
+        return self._row_by_id[str(post_id)]
+    
+    def _score_history(
+        self,
+        history_contents: List[str],
+        row_ranges: Optional[List[Tuple[int, int]]] = None,
+        history_counts: Optional[Tuple[np.ndarray, np.ndarray]] = None,
+        budget: Optional[RequestBudget] = None
+    ) -> Optional[np.ndarray]:
+        """
+        Cosine similarity of the combined history against every post.
+        
+        With ``row_ranges`` only those rows are scored; the rest stay 0 and
+        must be masked out with the same ranges in _valid_indices.
+        
+        Rows are scanned in blocks sized from the deadline (see
+        _deadline_block_rows), so small corpora are checked too. If the
+        budget's deadline passes, the rows not scored yet are NaN (never >=
+        min_score, so _valid_indices drops them) and the budget is marked
+        degraded.
+        """
+        # Vectorize user's history (one row per interest)
+        history_vector = self._interest_vectors(history_contents, history_counts)
+        
+        if history_vector is None:
+            return None
+        
+        # Calculate similarity with all posts (or the ranged ones)
+        num_posts = self._num_corpus_rows()
+        similarity_scores = np.zeros(num_posts)
+        block_rows = self._deadline_block_rows(budget, 0, 0.0)
+        scanned_rows, scan_seconds = 0, 0.0
+        for range_start, range_stop in row_ranges if row_ranges is not None else [(0, num_posts)]:
+            start = range_start
+            while start < range_stop:
+                if budget is not None and budget.expired():
+                    budget.mark_degraded('deadline')
+                    similarity_scores[start:range_stop] = np.nan
+                    break
+                stop = min(start + block_rows, range_stop)
+                started = time.perf_counter()
+                similarity_scores[start:stop] = self._scan_rows(history_vector, start, stop)
+                scanned_rows += stop - start
+                scan_seconds += time.perf_counter() - started
+                block_rows = self._deadline_block_rows(budget, scanned_rows, scan_seconds)
+                start = stop
+        return similarity_scores
+    
+    def _deadline_block_rows(
+        self,
+        budget: Optional[RequestBudget],
+        scanned_rows: int,
+        scan_seconds: float
+    ) -> int:
+        """
+        Rows to scan before the next deadline check, from the scan rate so
+        far and the time left: a small first block, then about
+        1/DEADLINE_CHECKS_PER_REMAINING of the remaining time per block.
+        """
+        remaining = budget.remaining_seconds() if budget is not None else None
+        if remaining is None:
+            return MAX_SCAN_BLOCK_ROWS
+        if scanned_rows == 0 or scan_seconds <= 0.0:
+            return min(self.score_chunk_size * DEADLINE_FIRST_BLOCK_CHUNKS, MAX_SCAN_BLOCK_ROWS)
+        
+        rows = scanned_rows / scan_seconds * remaining / DEADLINE_CHECKS_PER_REMAINING
+        return int(min(max(rows, self.score_chunk_size), MAX_SCAN_BLOCK_ROWS))
+    
+    def _num_corpus_rows(self) -> int:
+        return self.tfidf_matrix.shape[0]
+    
+    def _scan_rows(self, history_vector, start: int, stop: int) -> np.ndarray:
+        """Cosine similarity of rows [start, stop) with the (pooled) history vectors."""
+        # Contiguous CSR row slices are cheap views
+        return self._pool_interests(cosine_similarity(history_vector, self.tfidf_matrix[start:stop]))
+    
+    def _pool_interests(self, similarities: np.ndarray) -> np.ndarray:
+        """One score per column of a (num_interests x n) similarity matrix."""
+        return pool_interest_scores(similarities, self.interest_pooling)
+    
+    def _history_vector(
+        self,
+        history_contents: List[str],
+        history_counts: Optional[Tuple[np.ndarray, np.ndarray]] = None
+    ):
+        """TF-IDF user profile vector, or None if the history has no known term."""
+        if history_counts is not None:
+            return self._counts_to_vector(*history_counts)
+        
+        if not history_contents:
+            return None
+        
+        cleaned_history = self._clean_history(history_contents)
+        
+        if not cleaned_history:
+            return None
+        
         history_vector = self.vectorizer.transform([cleaned_history])
+        return history_vector if history_vector.nnz else None
+    
+    def _interest_vectors(
+        self,
+        history_contents: List[str],
+        history_counts: Optional[Tuple[np.ndarray, np.ndarray]] = None
+    ):
+        """
+        Profile matrix with one row per interest centroid, or None.
+        
+        A single row (the combined history vector) unless multi-interest
+        profiles are enabled and there are per-item history texts.
+        """
+        if self.max_interests <= 1 or history_counts is not None or len(history_contents or []) <= 1:
+            return self._history_vector(history_contents, history_counts)
+        
+        cleaned_items = [item for item in self._clean_history_items(history_contents) if item]
+        if not cleaned_items:
+            return None
+        
+        item_vectors = self._vectorize(cleaned_items)
+        if not (item_vectors.nnz if issparse(item_vectors) else np.any(item_vectors)):
+            return None
+        
+        clusters = cluster_interests(
+            item_vectors,
+            max_interests=self.max_interests,
+            threshold=self.interest_threshold
+        )
+        return clusters[0] if clusters is not None else None
+    
+    def _clean_history(self, history_contents: List[str]) -> str:
+        """Combine history texts into one cleaned document of at most max_history_tokens."""
+        return ' '.join(item for item in self._clean_history_items(history_contents) if item)
+    
+    def _clean_history_items(self, history_contents: List[str]) -> List[str]:
+        """Clean each history text; together they keep at most max_history_tokens."""
+        texts = [text for text in history_contents if isinstance(text, str)]
+        if self.max_history_tokens is None:
+            return [self.clean_text(text) for text in texts]
         
-        # Calculate similarity with all posts
-        similarity_scores = cosine_similarity(history_vector, self.tfidf_matrix).flatten()
+        # Bound the cleaning work first, then cap the tokens exactly
+        chars_left = self.max_history_tokens * CHARS_PER_TOKEN
+        tokens_left = self.max_history_tokens
+        cleaned_items = []
+        for text in texts:
+            if chars_left <= 0 or tokens_left <= 0:
+                break
+            cleaned = self.clean_text(text[:chars_left])
+            tokens = cleaned.split(' ')[:tokens_left] if cleaned else []
+            chars_left -= len(text) + 1
+            tokens_left -= len(tokens)
+            cleaned_items.append(' '.join(tokens))
+        return cleaned_items
+    
+    def history_term_counts(self, history_contents: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Raw vocabulary term counts of history texts, as (indices, counts).
+        
+        Counts are additive, so a server-side profile can accumulate them
+        and _counts_to_vector applies the TF-IDF weighting at scoring time.
+        """
+        if not self.is_loaded:
+            raise RuntimeError("Model not loaded. Call load_model() first.")
+        
+        cleaned_history = self._clean_history(history_contents)
+        if not cleaned_history:
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32)
+        
+        # CountVectorizer.transform on the fitted TfidfVectorizer = raw counts
+        counts = CountVectorizer.transform(self.vectorizer, [cleaned_history]).tocsr()
+        return counts.indices.astype(np.int32), counts.data.astype(np.float32)
+    
+    def _counts_to_vector(self, term_indices: np.ndarray, term_counts: np.ndarray):
+        """Apply the vectorizer's tf scaling, idf and norm to raw term counts."""
+        if len(term_indices) == 0:
+            return None
         
+        tf = np.asarray(term_counts, dtype=np.float64)
+        if self.vectorizer.sublinear_tf:
+            tf = np.log(tf) + 1.0
+        weights = tf * self.vectorizer.idf_[term_indices]
+        
+        num_features = len(self.vectorizer.idf_)
+        vector = csr_matrix(
+            (weights, np.asarray(term_indices), [0, len(term_indices)]),
+            shape=(1, num_features)
+        )
+        if self.vectorizer.norm:
+            vector = normalize(vector, norm=self.vectorizer.norm)
+        return vector
+    
+    def _partition_ranges(
+        self,
+        subreddits: Optional[List[str]] = None,
+        exclude_subreddits: Optional[List[str]] = None
+    ) -> Optional[List[Tuple[int, int]]]:
+        """
+        Row ranges matching the subreddit filters, or None for no filter.
+        
+        Uses the partition table saved at training time. Older models without
+        it fall back to the runs of matching rows in processed_posts.
+        """
+        if not subreddits and not exclude_subreddits:
+            return None
+        
+        if self.subreddit_partitions is None and self.posts is None:
+            raise RuntimeError("Subreddit filters need subreddit_partitions in model_metadata.pkl")
+        
+        if self.subreddit_partitions is not None:
+            names = set(subreddits) if subreddits else set(self.subreddit_partitions)
+            names -= set(exclude_subreddits or [])
+            return sorted(
+                self.subreddit_partitions[name]
+                for name in names
+                if name in self.subreddit_partitions
+            )
+        
+        column = self.posts.column('subreddit.name').astype(str)
+        mask = column.isin(subreddits) if subreddits else np.ones(len(column), dtype=bool)
+        if exclude_subreddits:
+            mask = mask & ~column.isin(exclude_subreddits)
+        
+        # Start/stop of each run of matching rows
+        padded = np.concatenate(([0], np.asarray(mask, dtype=np.int8), [0]))
+        edges = np.flatnonzero(np.diff(padded))
+        return list(zip(edges[::2].tolist(), edges[1::2].tolist()))
+    
+    def _ranking_scores(
+        self,
+        similarity_scores: np.ndarray,
+        blend: Optional[Dict[str, float]] = None
+    ) -> np.ndarray:
+        """Scores used for top-K selection: cosine, or the log blended score."""
+        if not blend:
+            return similarity_scores
+        
+        if self.priors is None:
+            raise RuntimeError("Blended ranking requires processed_posts.pkl")
+        
+        return self.priors.log_blend(similarity_scores, blend)
+    
+    def _valid_indices(
+        self,
+        similarity_scores: np.ndarray,
+        min_score: float,
+        exclude_ids: List[str] = None,
+        row_ranges: Optional[List[Tuple[int, int]]] = None
+    ) -> np.ndarray:
+        """Indices passing the min_score, exclude_ids and subreddit filters."""
         # Filter by minimum score
         valid_mask = similarity_scores >= min_score
         
+        # Keep only the scored subreddit partitions
+        if row_ranges is not None:
+            partition_mask = np.zeros(len(similarity_scores), dtype=bool)
+            for start, stop in row_ranges:
+                partition_mask[start:stop] = True
+            valid_mask &= partition_mask
+        
         # Exclude already seen posts if IDs provided
         if exclude_ids:
             exclude_set = set(exclude_ids)
-            if 'id' in self.df.columns:
-                exclude_mask = ~self.df['id'].isin(exclude_set)
+            if 'id' in self.posts.columns:
+                exclude_mask = ~self.posts.column('id').isin(exclude_set).to_numpy()
                 valid_mask = valid_mask & exclude_mask
         
-        valid_indices = np.where(valid_mask)[0]
-        
-        if len(valid_indices) == 0:
-            return []
-        
-        # Get top-K
-        valid_scores = similarity_scores[valid_indices]
-        top_k = min(top_k, len(valid_indices))
-        top_local_indices = valid_scores.argsort()[-top_k:][::-1]
-        top_indices = valid_indices[top_local_indices]
+        return np.where(valid_mask)[0]
+    
+    def _post_id(self, idx: int) -> str:
+        """Public id of the post at row ``idx``."""
+        if self.posts is None:
+            return str(self.cold_start_posts[idx].get('id', f"post_{idx}"))
+        if 'id' in self.posts.columns:
+            return str(self.posts.column('id').iat[idx])
+        return f"post_{idx}"
+    
+    def _format_posts(self, indices, similarities) -> List[Dict[str, Any]]:
+        """Build API representations, fetching only the requested rows."""
+        if self.posts is None:
+            # Aggregator: only cold-start rows are formatted here
+            rows = [self.cold_start_posts[int(idx)] for idx in indices]
+        else:
+            rows = self.posts.rows(indices)
+        return [
+            self._format_post(idx, similarity, post)
+            for idx, similarity, post in zip(indices, similarities, rows)
+        ]
+    
+    def _format_post(
+        self,
+        idx: int,
+        similarity: float,
+        post: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Build the API representation of the post at row ``idx``."""
+        if post is None:
+            post = self.posts.row(idx)
         
-        # Build results
-        results = []
-        for idx in top_indices:
-            post = self.df.iloc[idx]
-            
-            # Safe type conversions
-            try:
-                created_utc = int(float(post['created_utc']))
-            except:
-                try:
-                    created_utc = int(pd.to_datetime(post['created_utc']).timestamp())
-                except:
-                    created_utc = 0
-            
+        # Safe type conversions
+        try:
+            created_utc = int(float(post['created_utc']))
+        except:
             try:
-                score = int(float(post['score']))
+                created_utc = int(pd.to_datetime(post['created_utc']).timestamp())
             except:
-                score = 0
-            
-            post_id = str(post['id']) if 'id' in post.index else f"post_{idx}"
-            
-            results.append({
-                'id': post_id,
-                'title': str(post['title']),
-                'text': str(post['combined_text'])[:500],  # Truncate for API
-                'url': str(post.get('url', '')),
-                'subreddit': str(post['subreddit.name']),
-                'score': score,
-                'similarity_score': float(similarity_scores[idx]),
-                'created_utc': created_utc
-            })
+                created_utc = 0
         
-        return results
+        try:
+            score = int(float(post['score']))
+        except:
+            score = 0
+        
+        post_id = str(post['id']) if 'id' in post else f"post_{idx}"
+        
+        return {
+            'id': post_id,
+            'title': str(post['title']),
+            'text': str(post['combined_text'])[:500],  # Truncate for API
+            'url': str(post.get('url', '')),
+            'subreddit': str(post['subreddit.name']),
+            'score': score,
+            'similarity_score': float(similarity),
+            'created_utc': created_utc
+        }
+    
+    def warm_up(self):
+        """Warm up candidate scoring, and the legacy path if it is loaded."""
+        super().warm_up()
+        if self.legacy_state == 'loaded':
+            self.recommend_from_history(WARMUP_QUERIES, top_k=10)
     
     def get_model_info(self) -> Dict[str, Any]:
         """Return model metadata."""
@@ -238,7 +1563,23 @@ class TFIDFRecommender(BaseRecommender):
             'num_features': self.metadata['num_features'],
             'training_date': self.metadata['training_date'],
             'max_features': self.metadata.get('max_features', 10000),
-            'strategy': self.metadata.get('recommendation_strategy', 'content-based')
+            'strategy': self.metadata.get('recommendation_strategy', 'content-based'),
+            'legacy_artifacts': self.legacy_state,
+            'sharding': self.shards.describe() if self.shards is not None else None,
+            'request_limits': {
+                'max_body_chars': self.max_body_chars,
+                'max_history_tokens': self.max_history_tokens,
+                'score_chunk_size': self.score_chunk_size
+            },
+            'live_index': self.live_index.describe() if self.live_index is not None else None,
+            'max_interests': self.max_interests,
+            'interest_pooling': self.interest_pooling,
+            'field_weights': self.field_weights,
+            'field_cache': self.field_cache.describe(),
+            'vectorize_pool': self.vectorize_pool.describe() if self.vectorize_pool is not None else None,
+            'scan_block_rows': self.scan_block_rows,
+            'cold_start_order': self.cold_start_order,
+            'cold_start': self.cold_start.describe() if self.cold_start is not None else None
         }
 
 
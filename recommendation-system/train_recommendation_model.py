@@ -17,6 +17,14 @@ import pickle
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
 import os
+import time
+from dedup import minhash_signatures, find_duplicate_clusters
+from post_store import PostStore, ARROW_FILENAME
+from neighbor_graph import build_neighbor_graph, save_neighbor_graph
+from lsa_recommender import fit_lsa, save_lsa
+from streaming_scan import save_matrix_mmap
+from score_blending import PostPriors
+from cold_start import ColdStartRankings
 
 # ============================================================================
 # 1. DATA LOADING
@@ -174,6 +182,64 @@ print(f"✓ Created and cleaned 'combined_text' column")
 print(f"✓ Removed {initial_count - final_count} posts with empty text")
 print(f"✓ Final dataset size: {final_count} posts")
 
+# Collapse reposts/crossposts: MinHash signatures over word shingles of
+# combined_text, LSH banding for candidate pairs, and one canonical post
+# (highest score) kept per near-duplicate cluster
+print("\nCollapsing near-duplicate posts (MinHash + LSH)...")
+print("  - num_perm: 128, bands: 16, shingle_size: 3, jaccard_threshold: 0.8")
+
+if 'id' not in df.columns:
+    df['id'] = 'post_' + df.index.astype(str)
+df['id'] = df['id'].astype(str)
+
+dedup_start = time.time()
+signatures = minhash_signatures(df['combined_text'].tolist(), num_perm=128, shingle_size=3)
+clusters = find_duplicate_clusters(signatures, bands=16, threshold=0.8)
+
+popularity = pd.to_numeric(df['score'], errors='coerce').fillna(0) if 'score' in df.columns else 0
+ranked = pd.DataFrame({'cluster': clusters, 'popularity': popularity, 'row': np.arange(len(df))})
+ranked = ranked.sort_values(['cluster', 'popularity', 'row'], ascending=[True, False, True])
+canonical_row = ranked.groupby('cluster')['row'].first()
+
+canonical_ids = df['id'].to_numpy()[canonical_row.loc[clusters].to_numpy()]
+is_duplicate = canonical_ids != df['id'].to_numpy()
+duplicate_mapping = dict(zip(df['id'][is_duplicate], canonical_ids[is_duplicate]))
+
+df = df.iloc[np.sort(canonical_row.to_numpy())].reset_index(drop=True)
+dedup_runtime = time.time() - dedup_start
+
+dedup_stats = {
+    'rows_before': int(len(clusters)),
+    'rows_collapsed': len(duplicate_mapping),
+    'rows_after': len(df),
+    'runtime_seconds': round(dedup_runtime, 2),
+    'num_perm': 128,
+    'bands': 16,
+    'shingle_size': 3,
+    'jaccard_threshold': 0.8
+}
+
+print(f"✓ Collapsed {len(duplicate_mapping)} near-duplicate posts "
+      f"({len(duplicate_mapping) / max(len(clusters), 1) * 100:.2f}%) in {dedup_runtime:.2f}s")
+print(f"✓ Dataset size after deduplication: {len(df)} posts")
+
+# Partition rows by subreddit so each community is a contiguous row range
+# of the TF-IDF matrix. Subreddit filters at serving time then only score
+# the matching ranges instead of the whole corpus.
+print("\nPartitioning posts by subreddit...")
+if 'subreddit.name' not in df.columns:
+    df['subreddit.name'] = 'unknown'
+df['subreddit.name'] = df['subreddit.name'].fillna('unknown').astype(str)
+df = df.sort_values('subreddit.name', kind='stable').reset_index(drop=True)
+
+subreddit_partitions = {}
+partition_start = 0
+for name, count in df['subreddit.name'].value_counts().sort_index().items():
+    subreddit_partitions[name] = (partition_start, partition_start + int(count))
+    partition_start += int(count)
+
+print(f"✓ {len(subreddit_partitions)} subreddit partitions")
+
 # Display sample of cleaned text
 print("\nSample of cleaned text:")
 print("-" * 80)
@@ -358,6 +424,28 @@ with open(tfidf_matrix_path, 'wb') as f:
     pickle.dump(tfidf_matrix, f)
 print(f"✓ Saved TF-IDF matrix to: {tfidf_matrix_path}")
 
+# The same matrix as memory-mappable arrays, for the streaming scan
+save_matrix_mmap(tfidf_matrix, models_dir)
+print(f"✓ Saved memory-mappable TF-IDF matrix to: {models_dir}/tfidf_matrix_*.npy")
+
+# Precompute the item-to-item neighbor graph for "more like this"
+NEIGHBOR_TOP_N = 20
+print(f"\nComputing top-{NEIGHBOR_TOP_N} neighbors per post...")
+neighbor_start = time.time()
+neighbor_graph = build_neighbor_graph(tfidf_matrix, top_n=NEIGHBOR_TOP_N)
+neighbors_path = save_neighbor_graph(neighbor_graph, models_dir)
+print(f"✓ Saved neighbor graph ({neighbor_graph.nnz:,} edges) to: {neighbors_path} "
+      f"in {time.time() - neighbor_start:.1f}s")
+
+# Dense LSA embeddings for the 'lsa' recommender (float32 + int8-quantized)
+LSA_COMPONENTS = 256
+print(f"\nFitting {LSA_COMPONENTS}-dimensional LSA embeddings...")
+lsa_start = time.time()
+lsa_svd, lsa_embeddings = fit_lsa(tfidf_matrix, n_components=LSA_COMPONENTS)
+lsa_paths = save_lsa(models_dir, lsa_svd, lsa_embeddings, quantize=True)
+print(f"✓ Saved LSA model ({lsa_embeddings.shape[1]} dims, "
+      f"{lsa_svd.explained_variance_ratio_.sum():.1%} variance) in {time.time() - lsa_start:.1f}s")
+
 # Save the processed dataframe (with only necessary columns to save space)
 # Select only columns that exist
 columns_to_save = []
@@ -388,13 +476,40 @@ if df['created_utc'].dtype == 'object':
 # Ensure score is numeric
 df['score'] = pd.to_numeric(df['score'], errors='coerce').fillna(0)
 
-columns_to_save = ['title', 'combined_text', 'score', 'url', 'subreddit.name', 'created_utc']
+columns_to_save = ['id', 'title', 'combined_text', 'score', 'url', 'subreddit.name', 'created_utc']
 df_to_save = df[columns_to_save].copy()
 df_path = os.path.join(models_dir, 'processed_posts.pkl')
 with open(df_path, 'wb') as f:
     pickle.dump(df_to_save, f)
 print(f"✓ Saved processed dataframe to: {df_path}")
 
+# Save a columnar copy (Arrow IPC, dictionary-encoded subreddit names) that
+# the recommender memory-maps and reads column by column
+arrow_path = os.path.join(models_dir, ARROW_FILENAME)
+try:
+    PostStore.write_arrow(df_to_save, arrow_path)
+    print(f"✓ Saved columnar post store to: {arrow_path}")
+except RuntimeError as e:
+    arrow_path = None
+    print(f"⚠ Warning: Skipping columnar post store: {e}")
+
+# Precompute cold-start rankings (hot / popular / recent, global and per
+# subreddit) for users without a usable history
+cold_start = ColdStartRankings.build(
+    PostPriors.from_dataframe(df_to_save), df_to_save['subreddit.name'].astype(str).to_numpy()
+)
+cold_start_path = cold_start.save(models_dir)
+print(f"✓ Saved cold-start rankings to: {cold_start_path}")
+# The listed posts' API fields, for shard aggregators (which hold no posts)
+cold_start_posts_path = cold_start.save_posts(PostStore(df=df_to_save), models_dir)
+print(f"✓ Saved cold-start posts to: {cold_start_posts_path}")
+
+# Save the duplicate -> canonical post id mapping
+duplicates_path = os.path.join(models_dir, 'duplicate_mapping.pkl')
+with open(duplicates_path, 'wb') as f:
+    pickle.dump(duplicate_mapping, f)
+print(f"✓ Saved duplicate mapping to: {duplicates_path}")
+
 # Save metadata about the model
 subreddit_counts = df['subreddit.name'].value_counts().to_dict() if 'subreddit.name' in df.columns else {}
 
@@ -406,6 +521,10 @@ metadata = {
     'max_features': 10000,
     'subreddit_distribution': subreddit_counts,
     'num_subreddits': len(subreddit_counts),
+    'subreddit_partitions': subreddit_partitions,
+    'dedup': dedup_stats,
+    'neighbor_top_n': NEIGHBOR_TOP_N,
+    'lsa_components': int(lsa_embeddings.shape[1]),
     'recommendation_strategy': 'content-based (subreddit-independent)',
     'description': 'Model trained to recommend based on content similarity, not subreddit matching',
     'data_source': os.path.basename(data_path)
@@ -428,6 +547,7 @@ print(f"""
 Model Summary:
 --------------
 ✓ Total posts processed: {len(df):,}
+✓ Near-duplicates collapsed: {dedup_stats['rows_collapsed']:,} ({dedup_stats['runtime_seconds']}s)
 ✓ Vocabulary size: {tfidf_matrix.shape[1]:,} features
 ✓ Matrix sparsity: {(1.0 - tfidf_matrix.nnz / (tfidf_matrix.shape[0] * tfidf_matrix.shape[1])) * 100:.2f}%
 
@@ -437,6 +557,10 @@ Saved Artifacts:
 2. {tfidf_matrix_path}
 3. {df_path}
 4. {metadata_path}
+5. {duplicates_path}
+6. {arrow_path or '(columnar post store skipped: pyarrow not installed)'}
+7. {neighbors_path}
+8. {', '.join(lsa_paths)}
 
 Next Steps:
 -----------